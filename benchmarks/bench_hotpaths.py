@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+bench_hotpaths.py - Timings of the hot paths of steps 3, 4 and 6.
+
+Every case runs on the synthetic corpora of corpus.py (small, book,
+archive), several times; the median is reported. Results can be written as
+JSON and compared with a stored baseline, by default the reference
+numbers checked in as benchmarks/baseline.json:
+
+    python benchmarks/bench_hotpaths.py                          # compare with the baseline
+    python benchmarks/bench_hotpaths.py --save-baseline          # re-record it on this machine
+
+A case whose median is more than --threshold slower than in the baseline
+is flagged as a regression (and the exit code is 1). Cases whose
+dependencies are missing (Pillow for step 4, moviepy/ffmpeg for step 6)
+are reported as skipped.
+"""
+
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from corpus import SIZES, make_corpus
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+STEP3_FOLDER = os.path.join(ROOT, "step_3-aligning_texts_with_each_other")
+STEP4_SCRIPT = os.path.join(ROOT, "step_4-tool_to_group_words_for_subtitles", "group_words_gui-v4-(step_a).py")
+STEP6_SCRIPT = os.path.join(ROOT, "step_6-tool_to_merge_text_and_videos_(adding_subtitles_to_videos)",
+                            "burn_subtitles_gui-v4-(step_c).py")
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+sys.path.insert(0, STEP3_FOLDER)
+
+
+class Skip(Exception):
+    """Raised by a case that cannot run here."""
+
+
+def load_script(path, name):
+    """Import a step script by path (their file names are not module names)."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except ImportError as e:
+        raise Skip(f"{os.path.basename(path)}: {e}")
+    return module
+
+
+# -----------------------------------------------------------------------------
+# Cases
+#
+# A case is called as case(orig, trans, workdir) and returns a function that
+# runs the measured work once; setup happens before that function is returned.
+# -----------------------------------------------------------------------------
+
+def case_group_pairs(orig, trans, workdir):
+    step4 = load_script(STEP4_SCRIPT, "group_words")
+    font = step4.default_font(None, 36)
+    return lambda: step4.group_pairs(orig, trans, font, 1200, 10)
+
+
+def case_measure_text_px(orig, trans, workdir):
+    step4 = load_script(STEP4_SCRIPT, "group_words")
+    font = step4.default_font(None, 36)
+    words = [w for w in orig if w]
+    return lambda: [step4.measure_text_px(w, font) for w in words]
+
+
+def case_render_words(orig, trans, workdir):
+    from interlinear.exporter.html_export import render_words
+    return lambda: render_words(orig, trans, None)
+
+
+def case_render_mobile_content(orig, trans, workdir):
+    from interlinear.exporter.html_export import render_mobile_content
+    return lambda: render_mobile_content(orig, trans)
+
+
+def case_merge_from_lines(orig, trans, workdir):
+    from interlinear.dictionary import merge_from_lines
+    return lambda: merge_from_lines({}, orig, trans)
+
+
+def case_dictionary_roundtrip(orig, trans, workdir):
+    from interlinear.dictionary import merge_from_lines, save_dictionary, load_dictionary
+    d = merge_from_lines({}, orig, trans)
+    path = os.path.join(workdir, "bench.dict.txt")
+
+    def run():
+        save_dictionary(path, d)
+        return load_dictionary(path)
+    return run
+
+
+def case_generate_app_package(orig, trans, workdir):
+    from interlinear.exporter.html_export import generate_app_package
+    audio = os.path.join(workdir, "audio.mp3")
+    with open(audio, "wb") as f:
+        # 4 MB of deterministic bytes stand in for the recording
+        f.write(bytes(range(256)) * (4 * 4096))
+    return lambda: generate_app_package(workdir, "Bench", orig, trans, "Swiss German", "de",
+                                        audio_path=audio, force=True)
+
+
+def case_burn_clip(orig, trans, workdir):
+    step6 = load_script(STEP6_SCRIPT, "burn_subtitles")
+    try:
+        from moviepy.editor import ColorClip
+        video = os.path.join(workdir, "clip.mp4")
+        ColorClip(size=(320, 240), color=(0, 0, 0), duration=2).write_videofile(
+            video, fps=12, codec="libx264", logger=None)
+    except Exception as e:
+        raise Skip(f"test clip: {e}")
+    groups = [{"start_line": i + 1, "end_line": min(i + 4, len(orig))} for i in range(0, min(len(orig), 40), 4)]
+    output = os.path.join(workdir, "burned.mp4")
+    return lambda: step6.burn_subtitles(video, groups, orig, trans, output, fontsize=18)
+
+
+# (name, case, sizes it runs on)
+CASES = [
+    ("group_pairs", case_group_pairs, ("small", "book", "archive")),
+    ("measure_text_px", case_measure_text_px, ("small", "book", "archive")),
+    ("render_words", case_render_words, ("small", "book", "archive")),
+    ("render_mobile_content", case_render_mobile_content, ("small", "book", "archive")),
+    ("merge_from_lines", case_merge_from_lines, ("small", "book", "archive")),
+    ("dictionary_roundtrip", case_dictionary_roundtrip, ("small", "book", "archive")),
+    ("generate_app_package", case_generate_app_package, ("small", "book", "archive")),
+    # The burn time depends on the clip, not the corpus - one short clip is enough
+    ("burn_clip", case_burn_clip, ("small",)),
+]
+
+
+def run_case(case, orig, trans, repeat):
+    """Return the result dict of one case on one corpus."""
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            fn = case(orig, trans, workdir)
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - start)
+        except Skip as e:
+            return {"skipped": str(e)}
+    words = sum(1 for w in orig if w)
+    median = statistics.median(times)
+    return {"median": median, "min": min(times), "runs": repeat, "words": words,
+            "words_per_second": words / median if median else None}
+
+
+def compare(results, baseline, threshold):
+    """
+    Return {key: (ratio, regressed)} for the cases measured in both runs.
+    """
+    out = {}
+    for key, r in results.items():
+        b = baseline.get(key)
+        if not b or "median" not in r or "median" not in b or not b["median"]:
+            continue
+        ratio = r["median"] / b["median"]
+        out[key] = (ratio, ratio > 1 + threshold)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths of steps 3, 4 and 6.")
+    parser.add_argument("--sizes", default="small,book", help=f"comma separated, of {', '.join(SIZES)}")
+    parser.add_argument("--cases", help="comma separated case names (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline results to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown flagged as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes.split(",")
+    names = args.cases.split(",") if args.cases else [c[0] for c in CASES]
+    for size in sizes:
+        if size not in SIZES:
+            parser.error(f"unknown size {size!r}")
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    print(f"{'case':<36}{'median':>12}{'words/s':>14}{'vs baseline':>12}")
+    for size in sizes:
+        orig, trans = make_corpus(size)
+        for name, case, case_sizes in CASES:
+            if name not in names or size not in case_sizes:
+                continue
+            key = f"{name}[{size}]"
+            r = results[key] = run_case(case, orig, trans, args.repeat)
+            if "skipped" in r:
+                print(f"{key:<36}{'skipped':>12}  {r['skipped']}")
+                continue
+            ratio = compare({key: r}, baseline, args.threshold).get(key)
+            flag = "" if ratio is None else f"{ratio[0]:>11.2f}x" + ("  REGRESSION" if ratio[1] else "")
+            print(f"{key:<36}{r['median'] * 1000:>9.1f} ms{r['words_per_second']:>14,.0f}{flag}", flush=True)
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved: {args.baseline}")
+        return 0
+
+    regressions = [k for k, (_, regressed) in compare(results, baseline, args.threshold).items() if regressed]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+bench_startup.py - Cold import time of the Interlinear Text Creator modules.
+
+Every measurement runs in a fresh Python process, so nothing is cached
+between runs; the median of several runs is reported.
+
+To compare before/after a change, pass the step 3 folder of an older
+checkout as --baseline, for example:
+
+    git worktree add /tmp/old <commit>
+    python benchmarks/bench_startup.py --baseline /tmp/old/step_3-aligning_texts_with_each_other
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+STEP3_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                            "step_3-aligning_texts_with_each_other")
+
+MODULES = [
+    "interlinear.cli",
+    "interlinear.exporter.html_export",
+    "interlinear.gui",
+]
+
+# Prints the import time of one module in microseconds
+PROBE = "import time, importlib; t = time.perf_counter(); importlib.import_module({module!r}); " \
+        "print(int((time.perf_counter() - t) * 1e6))"
+
+
+def import_time(folder, module, runs):
+    """
+    Return the median cold import time of module (in ms), or None if it fails.
+    """
+    times = []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-c", PROBE.format(module=module)],
+                              cwd=folder, capture_output=True, text=True)
+        if proc.returncode != 0:
+            return None
+        times.append(int(proc.stdout.strip()) / 1000)
+    return statistics.median(times)
+
+
+def measure(folder, runs):
+    """Return {module: median ms} for every module in MODULES."""
+    return {module: import_time(folder, module, runs) for module in MODULES}
+
+
+def fmt(ms):
+    return "   failed" if ms is None else f"{ms:8.1f} ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import times of the step 3 modules.")
+    parser.add_argument("--path", default=STEP3_FOLDER, help="step 3 folder to measure")
+    parser.add_argument("--baseline", help="step 3 folder of an older checkout to compare with")
+    parser.add_argument("--runs", type=int, default=7, help="fresh processes per module")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    current = measure(args.path, args.runs)
+    baseline = measure(args.baseline, args.runs) if args.baseline else None
+
+    print(f"{'module':<36}{'baseline':>12}{'current':>12}")
+    for module in MODULES:
+        before = fmt(baseline[module]) if baseline else "           -"
+        print(f"{module:<36}{before:>12}{fmt(current[module]):>12}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"runs": args.runs, "current": current, "baseline": baseline}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
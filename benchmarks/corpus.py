@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+corpus.py - Deterministic synthetic corpora for the benchmarks.
+
+A corpus looks like a real project after step 2/3: one source word per
+line, an empty line after every sentence, and a translation line for each
+word. Word frequencies follow a Zipf-like distribution, so dictionaries,
+groups and search postings behave like they do on real texts. The same
+size and seed always give the same corpus.
+
+    python benchmarks/corpus.py book /tmp/book    # writes source.txt/target.txt
+"""
+
+import os
+import random
+import sys
+
+# Number of words per corpus size
+SIZES = {
+    "small": 500,       # a short story
+    "book": 80_000,     # a novel
+    "archive": 400_000, # a collection of books
+}
+
+VOCABULARY = 20_000
+
+SYLLABLES = ["ba", "be", "chi", "da", "dü", "ei", "fa", "ge", "hä", "ich", "ja", "ke", "li", "mu",
+             "na", "ö", "pf", "ri", "sch", "ta", "ü", "ve", "wa", "zi", "st", "ng", "ä", "tz"]
+
+
+def make_word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+
+
+def make_vocabulary(seed=0):
+    """Return (source words, translations) of the synthetic language, most frequent first."""
+    rng = random.Random(seed)
+    words, seen = [], set()
+    while len(words) < VOCABULARY:
+        w = make_word(rng)
+        if w not in seen:
+            seen.add(w)
+            words.append(w)
+    # Some words translate into two words, like "im" -> "in the"
+    translations = [w[::-1] + ("" if rng.random() < 0.8 else " " + make_word(rng)) for w in words]
+    return words, translations
+
+
+def make_corpus(size, seed=0):
+    """
+    Return (orig, trans) line lists with about SIZES[size] words.
+    """
+    words, translations = make_vocabulary(seed)
+    rng = random.Random(f"{size}-{seed}")
+    n = SIZES[size]
+    orig, trans = [], []
+    count = 0
+    while count < n:
+        for _ in range(rng.randint(4, 14)):
+            # Zipf-like: index VOCABULARY ** u - 1 for uniform u
+            i = int(VOCABULARY ** rng.random()) - 1
+            word = words[i].capitalize() if not orig or orig[-1] == "" else words[i]
+            orig.append(word)
+            trans.append(translations[i])
+            count += 1
+        orig.append("")
+        trans.append("")
+    return orig, trans
+
+
+def write_corpus(folder, size, seed=0):
+    """Write source.txt and target.txt of a corpus into folder."""
+    orig, trans = make_corpus(size, seed)
+    os.makedirs(folder, exist_ok=True)
+    for name, lines in (("source.txt", orig), ("target.txt", trans)):
+        with open(os.path.join(folder, name), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+    return folder
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in SIZES:
+        sys.exit(f"usage: corpus.py {{{','.join(SIZES)}}} <folder>")
+    print(write_corpus(sys.argv[2], sys.argv[1]))
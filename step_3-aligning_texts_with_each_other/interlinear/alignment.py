@@ -4,20 +4,195 @@ Alignment Module for Interlinear Text Creator
 Handles text alignment operations.
 """
 
-def align_texts(source_lines, target_lines):
+import math
+
+# Gale-Church bead types (source sentences, target sentences) with prior probabilities
+BEAD_PRIORS = {
+    (1, 1): 0.89,
+    (1, 0): 0.0099,
+    (0, 1): 0.0099,
+    (2, 1): 0.089,
+    (1, 2): 0.089,
+}
+
+# Variance of the target/source length difference per source character
+LENGTH_VARIANCE = 6.8
+
+def align_texts(source_lines, target_lines, band=20):
+    """
+    Align source and target text lines sentence by sentence.
+    
+    Sentences are paired with align_sentences(); within each pair of
+    sentence blocks the shorter side is padded with empty strings, so a
+    missing sentence no longer shifts every later word pair.
+    The input lists are not modified.
+    
+    Returns:
+        (aligned_source_lines, aligned_target_lines)
+    """
+    beads = align_sentences(source_lines, target_lines, band)
+    return apply_alignment(source_lines, target_lines, beads)
+
+def align_sentences(source_lines, target_lines, band=20):
     """
-    Align source and target text lines.
-    Pads shorter list with empty strings.
+    Propose a sentence alignment with a Gale-Church length-based model.
+    
+    Uses 1:1, 1:0, 0:1, 2:1 and 1:2 beads. The dynamic program only visits
+    cells within `band` sentences of the diagonal, so it runs in roughly
+    linear time on full-length transcripts.
+    
+    The confidence of a bead is its posterior among all beads that could
+    end at the same cell, weighted by the cost of the best path through
+    each of them.
+    
+    Returns:
+        List of beads, each a dict:
+        {'source': [sentence indices], 'target': [sentence indices], 'confidence': 0.0-1.0}
     """
-    max_len = max(len(source_lines), len(target_lines))
+    src = [_sentence_length(words) for _, words in iter_sentences(source_lines)]
+    tgt = [_sentence_length(words) for _, words in iter_sentences(target_lines)]
+    n, m = len(src), len(tgt)
+    ratio = (sum(tgt) / sum(src)) if sum(src) and sum(tgt) else 1.0
+    width = band + 2
+    log_priors = [((di, dj), -math.log(p)) for (di, dj), p in BEAD_PRIORS.items()]
+    length_costs = {}
+    
+    def length_cost(l1, l2):
+        c = length_costs.get((l1, l2))
+        if c is None:
+            c = -math.log(max(_match_probability(l1, l2, ratio), 1e-300))
+            length_costs[(l1, l2)] = c
+        return c
+    
+    # cost[i][j] = (cost of best alignment of src[:i] and tgt[:j], previous bead)
+    cost = [{} for _ in range(n + 1)]
+    cost[0][0] = (0.0, None)
+    
+    def candidates(i, j):
+        """Yield (cost, bead) for every bead that can end at cell (i, j)."""
+        for (di, dj), log_prior in log_priors:
+            if i < di or j < dj:
+                continue
+            prev = cost[i - di].get(j - dj)
+            if prev is None:
+                continue
+            l1 = src[i - 1] + (src[i - 2] if di == 2 else 0) if di else 0
+            l2 = tgt[j - 1] + (tgt[j - 2] if dj == 2 else 0) if dj else 0
+            yield prev[0] + log_prior + length_cost(l1, l2), (di, dj)
+    
+    for i in range(n + 1):
+        centre = i * m / n if n else 0
+        row = cost[i]
+        for j in range(max(0, int(centre - width)), min(m, int(centre + width)) + 1):
+            best = None
+            for c, bead in candidates(i, j):
+                if best is None or c < best[0]:
+                    best = (c, bead)
+            if best is not None:
+                row[j] = best
     
-    # Pad lists to equal length
-    while len(source_lines) < max_len:
-        source_lines.append("")
-    while len(target_lines) < max_len:
-        target_lines.append("")
+    if m not in cost[n]:
+        # Band too narrow for these texts - retry with a wider one
+        return align_sentences(source_lines, target_lines, band * 2 + abs(n - m))
     
-    return source_lines, target_lines
+    beads = []
+    i, j = n, m
+    while (i, j) != (0, 0):
+        best, (di, dj) = cost[i][j]
+        # Posterior of the chosen bead: exp(-cost) normalised over the candidates
+        confidence = 1 / sum(math.exp(best - c) for c, _ in candidates(i, j))
+        beads.append({
+            'source': list(range(i - di, i)),
+            'target': list(range(j - dj, j)),
+            'confidence': round(confidence, 3),
+        })
+        i, j = i - di, j - dj
+    beads.reverse()
+    return beads
+
+def apply_alignment(source_lines, target_lines, beads):
+    """
+    Build aligned line lists from a sentence alignment.
+    
+    Each bead becomes one block in which both sides have the same number of
+    lines. The empty lines before each sentence and after the last one are
+    kept; where the two sides differ, the longer run is used on both, so
+    texts that already line up come back unchanged.
+    """
+    src, src_gaps, src_tail = _split_sentences(source_lines)
+    tgt, tgt_gaps, tgt_tail = _split_sentences(target_lines)
+    out_src, out_tgt = [], []
+    
+    for bead in beads:
+        block_src = _join_sentences(src, bead['source'], src_gaps)
+        block_tgt = _join_sentences(tgt, bead['target'], tgt_gaps)
+        size = max(len(block_src), len(block_tgt))
+        gap = max([src_gaps[k] for k in bead['source'][:1]] +
+                  [tgt_gaps[k] for k in bead['target'][:1]])
+        if out_src:
+            gap = max(gap, 1)
+        out_src.extend([""] * gap + block_src + [""] * (size - len(block_src)))
+        out_tgt.extend([""] * gap + block_tgt + [""] * (size - len(block_tgt)))
+    
+    tail = max(src_tail, tgt_tail)
+    out_src.extend([""] * tail)
+    out_tgt.extend([""] * tail)
+    return out_src, out_tgt
+
+def iter_sentences(lines):
+    """
+    Yield (index_of_first_line, words) for each sentence.
+    
+    Sentences are groups of non-empty lines separated by empty lines.
+    Works on any iterable of lines, including open files.
+    """
+    words = []
+    first = 0
+    for i, line in enumerate(lines):
+        line = line.rstrip("\r\n")
+        if line.strip():
+            if not words:
+                first = i
+            words.append(line)
+        elif words:
+            yield first, words
+            words = []
+    if words:
+        yield first, words
+
+def _sentence_length(words):
+    """Length of a sentence in characters."""
+    return sum(len(w.strip()) for w in words) + len(words) - 1
+
+def _split_sentences(lines):
+    """
+    Return (sentences, number of empty lines before each sentence,
+    number of empty lines after the last one).
+    """
+    sentences, gaps = [], []
+    end = 0
+    for first, words in iter_sentences(lines):
+        sentences.append(words)
+        gaps.append(first - end)
+        end = first + len(words)
+    return sentences, gaps, len(lines) - end
+
+def _join_sentences(sentences, indices, gaps):
+    """Concatenate the word lines of several sentences, keeping their breaks."""
+    lines = []
+    for k in indices:
+        if lines:
+            lines.extend([""] * gaps[k])
+        lines.extend(sentences[k])
+    return lines
+
+def _match_probability(l1, l2, ratio):
+    """Two-tailed probability of the observed length difference."""
+    mean = (l1 + l2 / ratio) / 2
+    if mean <= 0:
+        return 1.0
+    delta = (l2 - l1 * ratio) / math.sqrt(mean * LENGTH_VARIANCE)
+    return math.erfc(abs(delta) / math.sqrt(2))
 
 def count_words(lines):
     """
@@ -29,15 +204,284 @@ def count_sentences(lines):
     """
     Count sentences (groups separated by empty lines).
     """
+    return sum(1 for _ in iter_sentence_counts(lines))
+
+def iter_sentence_counts(lines):
+    """
+    Yield (index_of_first_line, word_count) for each sentence.
+    
+    Only counts are kept, so this streams files of any size
+    in constant memory.
+    """
     count = 0
-    in_sentence = False
+    first = 0
     
-    for line in lines:
+    for i, line in enumerate(lines):
         if line.strip():
-            if not in_sentence:
-                count += 1
-                in_sentence = True
+            if not count:
+                first = i
+            count += 1
+        elif count:
+            yield first, count
+            count = 0
+    
+    if count:
+        yield first, count
+
+class AlignmentTracker:
+    """
+    Incrementally track word/sentence counts of the two panes
+    and the first line where they stop matching.
+    
+    Each pane is kept as _LineFlags with one flag per line (1 = line holds
+    a word, 0 = empty line / sentence break), so an edit only touches the
+    flags of the edited lines and sentence numbers are looked up in
+    O(log n). The first mismatch is cached: an edit only invalidates it if
+    it is at or before the edited lines, and the rescan starts at the edit.
+    """
+    
+    PANES = ("orig", "tran")
+    
+    def __init__(self):
+        self.flags = {pane: _LineFlags(b"\0") for pane in self.PANES}
+        self.words = {pane: 0 for pane in self.PANES}
+        self.sentences = {pane: 0 for pane in self.PANES}
+        self._first_mismatch = None
+        self._scan_from = None
+    
+    def reset(self, pane, lines):
+        """
+        Replace the whole content of a pane.
+        """
+        self.flags[pane] = _LineFlags(bytes(1 if line.strip() else 0 for line in lines))
+        self._update_counts(pane)
+        self._invalidate(0)
+    
+    def replace_lines(self, pane, start, end, lines):
+        """
+        Update the counts after lines[start:end] of a pane were replaced by lines.
+        """
+        self.flags[pane].replace(start, end, bytes(1 if line.strip() else 0 for line in lines))
+        self._update_counts(pane)
+        self._invalidate(start)
+    
+    def first_mismatch(self):
+        """
+        Return the index of the first line that is a word in one pane
+        and a sentence break (or missing) in the other, or None.
+        """
+        if self._scan_from is not None:
+            self._first_mismatch = _first_difference(
+                self.flags["orig"], self.flags["tran"], self._scan_from)
+            self._scan_from = None
+        return self._first_mismatch
+    
+    def sentence_of(self, pane, line):
+        """
+        Return the 1-based number of the sentence containing line,
+        or of the next sentence if line is a sentence break.
+        """
+        flags = self.flags[pane]
+        count = flags.starts_through(line)
+        if not flags.get(line):
+            count += 1
+        return count
+    
+    def _update_counts(self, pane):
+        self.words[pane] = self.flags[pane].words
+        self.sentences[pane] = self.flags[pane].starts_through(len(self.flags[pane]))
+    
+    def _invalidate(self, start):
+        # Lines before start are unchanged, so is a mismatch found before them
+        if self._first_mismatch is None or self._first_mismatch >= start:
+            self._first_mismatch = None
+            self._scan_from = start if self._scan_from is None else min(self._scan_from, start)
+
+
+class _Fenwick:
+    """
+    Fenwick (binary indexed) tree over a list of counts: point updates
+    and prefix sums in O(log n).
+    """
+    
+    def __init__(self, counts):
+        tree = [0] + list(counts)
+        for i in range(1, len(tree)):
+            j = i + (i & -i)
+            if j < len(tree):
+                tree[j] += tree[i]
+        self.tree = tree
+    
+    def add(self, i, delta):
+        """Add delta to counts[i]."""
+        i += 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+    
+    def prefix(self, i):
+        """Return sum(counts[:i])."""
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+    
+    def find(self, value):
+        """
+        Return (k, sum(counts[:k])) for the largest k with
+        sum(counts[:k]) <= value (counts must not be negative).
+        """
+        k = total = 0
+        step = 1 << len(self.tree).bit_length()
+        while step:
+            j = k + step
+            if j < len(self.tree) and total + self.tree[j] <= value:
+                k = j
+                total += self.tree[j]
+            step >>= 1
+        return k, total
+
+
+class _LineFlags:
+    """
+    Line flags of one pane, stored in blocks of about BLOCK lines.
+    
+    Fenwick trees over the block lengths and over the sentence starts
+    (word lines after a break) per block find the block of a line and
+    count the sentence starts before it in O(log n); an edit only
+    rewrites the blocks it touches.
+    """
+    
+    BLOCK = 4096
+    
+    def __init__(self, flags):
+        self.blocks = [bytearray(flags[i:i + self.BLOCK]) for i in range(0, len(flags), self.BLOCK)]
+        self.words = flags.count(1)
+        self._rebuild()
+    
+    def __len__(self):
+        return self._length
+    
+    def get(self, line):
+        """Return the flag of line (0 beyond the end)."""
+        if not 0 <= line < self._length:
+            return 0
+        k, offset = self._locate(line)
+        return self.blocks[k][offset]
+    
+    def starts_through(self, line):
+        """Return the number of sentence starts in lines 0..line."""
+        if line >= self._length:
+            return self._starts.prefix(len(self.blocks))
+        if line < 0:
+            return 0
+        k, offset = self._locate(line)
+        return self._starts.prefix(k) + self._block_starts(k, offset + 1)
+    
+    def replace(self, start, end, new):
+        """Replace the flags of lines start..end-1 with the bytes new."""
+        start = min(max(start, 0), self._length)
+        end = min(max(end, start), self._length)
+        # Splice inside the blocks holding start..end (the last block if at the end)
+        if self.blocks:
+            line = min(start, self._length - 1)
+            first, offset = self._locate(line)
+            base = line - offset
+            last = self._locate(end - 1)[0] if end > start else first
+        else:
+            first, base, last = 0, 0, -1
+        data = bytearray().join(self.blocks[first:last + 1])
+        self.words += new.count(1) - data.count(1, start - base, end - base)
+        data[start - base:end - base] = new
+        # Keep blocks from getting small, and split large ones
+        while len(data) < self.BLOCK // 2 and last + 1 < len(self.blocks):
+            last += 1
+            data += self.blocks[last]
+        if len(data) <= 2 * self.BLOCK:
+            pieces = [data] if data else []
         else:
-            in_sentence = False
+            pieces = [data[i:i + self.BLOCK] for i in range(0, len(data), self.BLOCK)]
+        
+        if len(pieces) != last + 1 - first:
+            self.blocks[first:last + 1] = pieces
+            self._rebuild()
+            return
+        for k, piece in enumerate(pieces, start=first):
+            self._lengths.add(k, len(piece) - len(self.blocks[k]))
+            self.blocks[k] = piece
+        self._length += len(new) - (end - start)
+        # The sentence start on the first line after the pieces may have changed too
+        for k in range(first, min(last + 2, len(self.blocks))):
+            count = self._block_starts(k)
+            self._starts.add(k, count - self._counts[k])
+            self._counts[k] = count
+    
+    def segments(self, start):
+        """Yield (block, lo, hi) covering lines start..end."""
+        if start >= self._length:
+            return
+        k, offset = self._locate(start)
+        for block in self.blocks[k:]:
+            yield block, offset, len(block)
+            offset = 0
+    
+    def _locate(self, line):
+        """Return (block index, offset in block) of line."""
+        k, before = self._lengths.find(line)
+        return k, line - before
+    
+    def _block_starts(self, k, stop=None):
+        """Count the sentence starts in blocks[k][:stop]."""
+        block = self.blocks[k]
+        previous = self.blocks[k - 1][-1] if k else 0
+        return block.count(b"\0\1", 0, stop) + (1 if block[0] and not previous else 0)
+    
+    def _rebuild(self):
+        self._length = sum(len(b) for b in self.blocks)
+        self._counts = [self._block_starts(k) for k in range(len(self.blocks))]
+        self._lengths = _Fenwick(len(b) for b in self.blocks)
+        self._starts = _Fenwick(self._counts)
+
+
+def _first_difference(a, b, start):
+    """
+    Return the first index >= start where the _LineFlags a and b differ,
+    treating lines beyond the end of the shorter one as sentence breaks;
+    None if equal.
+    
+    Both are compared segment by segment through memoryviews, so nothing
+    is copied and the scan stops at the first difference.
+    """
+    seg_a, seg_b = a.segments(start), b.segments(start)
+    cur_a, cur_b = next(seg_a, None), next(seg_b, None)
+    pos = start
+    while cur_a is not None and cur_b is not None:
+        (block_a, lo_a, hi_a), (block_b, lo_b, hi_b) = cur_a, cur_b
+        n = min(hi_a - lo_a, hi_b - lo_b)
+        view_a = memoryview(block_a)[lo_a:lo_a + n]
+        view_b = memoryview(block_b)[lo_b:lo_b + n]
+        if view_a != view_b:
+            # Bisect for the first differing line
+            lo, hi = 0, n
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if view_a[lo:mid] == view_b[lo:mid]:
+                    lo = mid
+                else:
+                    hi = mid
+            return pos + lo
+        pos += n
+        cur_a = (block_a, lo_a + n, hi_a) if lo_a + n < hi_a else next(seg_a, None)
+        cur_b = (block_b, lo_b + n, hi_b) if lo_b + n < hi_b else next(seg_b, None)
     
-    return count
+    # Past the end of one pane the other must only hold sentence breaks
+    rest, cur = (seg_a, cur_a) if cur_a is not None else (seg_b, cur_b)
+    while cur is not None:
+        block, lo, hi = cur
+        i = block.find(1, lo, hi)
+        if i >= 0:
+            return pos + i - lo
+        pos += hi - lo
+        cur = next(rest, None)
+    return None
@@ -0,0 +1,534 @@
+"""
+Audio Module for Interlinear Text Creator
+
+Estimates the display times of the subtitle groups from the audio of a
+project, for when nobody has tapped them in the step 5 tool yet, and
+corrects tapped times by snapping them to where the speech starts.
+
+The audio (or the audio track of a video) is decoded with a local ffmpeg
+into 16 kHz mono samples, streamed in chunks. For every 20 ms frame the
+energy is computed with NumPy; frames well above the noise floor are speech,
+and short gaps and blips are smoothed away, which gives the speech segments.
+The text is then spread over the speech (pauses get no text) in proportion
+to the number of characters of each group, so a group starts where its
+first character is spoken at an even speaking rate.
+
+The result is a timestamps.txt in the format of step 5, to be checked in
+the step 5 tool or used as it is. An hour of audio takes seconds, most of it
+in ffmpeg.
+
+Times tapped in step 5 lag the speech by the reaction time (200-400 ms) and
+jitter. Snapping moves each of them to the nearest speech onset (a sharp
+rise of the energy) within a window that reaches further back than forward.
+
+Requires: numpy, ffmpeg on the PATH (plain .wav files are read without it)
+
+Command line:
+    python -m interlinear.audio estimate <folder> [--media video.mp4] [--force]
+    python -m interlinear.audio snap <folder> [--media video.mp4] [--dry-run] [--list]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import wave
+
+import numpy as np
+
+from . import trace
+from .project_io import load_project, load_artifact, save_artifact, find_audio, text_lines
+from .timing import GROUPS_FILENAME, TIMESTAMPS_FILENAME, format_timestamp, format_timestamps, check_timestamps
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.02
+
+# Decoded audio is processed in chunks of this length (bounded memory)
+CHUNK_SECONDS = 60
+
+# Voice activity: position of the threshold between the noise floor and the
+# speech level (both estimated from the energy percentiles below)
+VAD_THRESHOLD = 0.35
+NOISE_PERCENTILE = 10
+SPEECH_PERCENTILE = 90
+
+# Pauses shorter than this are bridged, speech shorter than this is dropped
+MIN_PAUSE_SECONDS = 0.25
+MIN_SPEECH_SECONDS = 0.10
+
+# Onsets are found on finer frames; a tapped time is snapped to an onset at
+# most SNAP_BEFORE seconds earlier or SNAP_AFTER seconds later
+ONSET_FRAME_SECONDS = 0.01
+SNAP_BEFORE = 0.5
+SNAP_AFTER = 0.15
+
+# A rise counts as an onset if it is this many standard deviations above
+# the mean onset strength of the recording
+ONSET_THRESHOLD = 3.0
+
+
+# -----------------------------------------------------------------------------
+# Decoding
+# -----------------------------------------------------------------------------
+
+def iter_ffmpeg_pcm(path, rate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS):
+    """
+    Decode a media file with ffmpeg and yield mono float32 sample chunks.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg not found (install it, e.g. sudo apt install ffmpeg)")
+    cmd = [ffmpeg, "-nostdin", "-v", "error", "-i", path, "-vn", "-ac", "1", "-ar", str(rate),
+           "-f", "s16le", "-"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        size = int(rate * chunk_seconds) * 2
+        while True:
+            data = proc.stdout.read(size)
+            if not data:
+                break
+            yield np.frombuffer(data[:len(data) // 2 * 2], dtype="<i2").astype(np.float32) / 32768.0
+    finally:
+        proc.stdout.close()
+        error = proc.stderr.read().decode("utf-8", "replace").strip()
+        proc.stderr.close()
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg could not decode {path}: {error}")
+
+
+def iter_wave_pcm(path, chunk_seconds=CHUNK_SECONDS):
+    """
+    Read a 16-bit PCM .wav file and yield mono float32 sample chunks.
+    """
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise RuntimeError(f"{path}: only 16-bit .wav files can be read without ffmpeg")
+        channels = w.getnchannels()
+        frames = int(w.getframerate() * chunk_seconds)
+        while True:
+            data = w.readframes(frames)
+            if not data:
+                break
+            samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+            yield samples.reshape(-1, channels).mean(axis=1)
+
+
+def open_pcm(path, rate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS):
+    """
+    Return (sample rate, iterator of mono float32 chunks) of a media file.
+
+    ffmpeg is used for everything; without it, .wav files are read directly
+    at their own sample rate.
+    """
+    if not shutil.which("ffmpeg") and path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as w:
+            file_rate = w.getframerate()
+        return file_rate, iter_wave_pcm(path, chunk_seconds)
+    return rate, iter_ffmpeg_pcm(path, rate, chunk_seconds)
+
+
+def decode_audio(path, rate=SAMPLE_RATE):
+    """
+    Decode a whole media file into (sample rate, mono float32 samples).
+    """
+    rate, chunks = open_pcm(path, rate)
+    chunks = list(chunks)
+    return rate, np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+
+# -----------------------------------------------------------------------------
+# Energy and voice activity
+# -----------------------------------------------------------------------------
+
+def frame_energy_db(samples, frame_length):
+    """
+    Return the energy (dB) of each complete frame of samples.
+    """
+    n = len(samples) // frame_length
+    frames = samples[:n * frame_length].reshape(n, frame_length)
+    power = np.einsum("ij,ij->i", frames, frames) / frame_length
+    return 10 * np.log10(power + 1e-10)
+
+
+def media_energy(path, frame_seconds=FRAME_SECONDS):
+    """
+    Return the frame energies (dB) of a media file, decoded in chunks.
+
+    Returns:
+        (energy array, frame length in seconds)
+    """
+    rate, chunks = open_pcm(path)
+    frame_length = max(1, int(round(rate * frame_seconds)))
+    parts = []
+    rest = np.zeros(0, dtype=np.float32)
+    with trace.span("decode_energy", file=os.path.basename(path)):
+        for chunk in chunks:
+            samples = np.concatenate([rest, chunk]) if len(rest) else chunk
+            n = len(samples) // frame_length * frame_length
+            parts.append(frame_energy_db(samples[:n], frame_length))
+            rest = samples[n:]
+    energy = np.concatenate(parts) if parts else np.zeros(0)
+    return energy, frame_length / rate
+
+
+def _runs(mask):
+    """Return (starts, ends) of the runs of True in a boolean array."""
+    edges = np.diff(np.concatenate([[False], mask, [False]]).astype(np.int8))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _set_runs(mask, starts, ends, value):
+    """Set mask[s:e] = value for all runs at once."""
+    delta = np.zeros(len(mask) + 1, dtype=np.int32)
+    np.add.at(delta, starts, 1)
+    np.add.at(delta, ends, -1)
+    mask[np.cumsum(delta[:-1]) > 0] = value
+
+
+def voice_activity(energy, frame_seconds=FRAME_SECONDS, threshold=VAD_THRESHOLD,
+                   min_pause=MIN_PAUSE_SECONDS, min_speech=MIN_SPEECH_SECONDS):
+    """
+    Return a boolean array marking the frames that contain speech.
+
+    The threshold lies between the noise floor and the speech level of the
+    recording, so it adapts to the recording level. Pauses shorter than
+    min_pause are filled, speech shorter than min_speech is dropped.
+    """
+    if not len(energy):
+        return np.zeros(0, dtype=bool)
+    floor, level = np.percentile(energy, [NOISE_PERCENTILE, SPEECH_PERCENTILE])
+    active = energy > floor + threshold * (level - floor)
+
+    starts, ends = _runs(~active)
+    # Pauses at the very start and end are real silence, whatever their length
+    short = (ends - starts < min_pause / frame_seconds) & (starts > 0) & (ends < len(active))
+    _set_runs(active, starts[short], ends[short], True)
+
+    starts, ends = _runs(active)
+    short = ends - starts < min_speech / frame_seconds
+    _set_runs(active, starts[short], ends[short], False)
+    return active
+
+
+def speech_segments(active, frame_seconds=FRAME_SECONDS):
+    """
+    Return the speech segments of a voice_activity() array as an (n, 2)
+    array of start/end seconds.
+    """
+    starts, ends = _runs(active)
+    return np.stack([starts, ends], axis=1) * frame_seconds
+
+
+# -----------------------------------------------------------------------------
+# Estimation
+# -----------------------------------------------------------------------------
+
+def group_characters(groups, orig):
+    """
+    Return the number of characters spoken in each group (its source words
+    plus a space between them).
+    """
+    counts = []
+    for g in groups:
+        words = [line.strip() for line in orig[g["start_line"] - 1:g["end_line"]] if line.strip()]
+        counts.append(sum(len(w) for w in words) + max(len(words) - 1, 0))
+    return np.array(counts, dtype=np.float64)
+
+
+def estimate_starts(characters, segments):
+    """
+    Spread groups over the speech segments by their character counts.
+
+    The segments are laid end to end as one stretch of speech; each group
+    starts at the share of that stretch taken by the characters before it,
+    mapped back to the time of the recording. A group that would start at
+    the end of a segment starts at the beginning of the next one instead.
+
+    Returns:
+        Array of start seconds, one per group
+    """
+    characters = np.asarray(characters, dtype=np.float64)
+    if not len(characters):
+        return np.zeros(0)
+    if not len(segments) or not characters.sum():
+        return np.zeros(len(characters))
+    durations = segments[:, 1] - segments[:, 0]
+    # speech_before[k] = speech time before segment k
+    speech_before = np.concatenate([[0.0], np.cumsum(durations)])
+    share = np.concatenate([[0.0], np.cumsum(characters)[:-1]]) / characters.sum()
+    speech = share * speech_before[-1]
+    k = np.searchsorted(speech_before[1:], speech, side="right")
+    k = np.minimum(k, len(segments) - 1)
+    return segments[k, 0] + (speech - speech_before[k])
+
+
+# -----------------------------------------------------------------------------
+# Onsets and snapping
+# -----------------------------------------------------------------------------
+
+def onset_strength(energy):
+    """
+    Return the onset strength of each frame: how fast the (smoothed) energy
+    rises into it, in dB per frame; falls count as 0.
+    """
+    if len(energy) < 2:
+        return np.zeros(len(energy))
+    smooth = np.convolve(energy, np.ones(3) / 3, mode="same")
+    return np.concatenate([[0.0], np.maximum(np.diff(smooth), 0.0)])
+
+
+def onset_times(energy, frame_seconds=ONSET_FRAME_SECONDS, threshold=ONSET_THRESHOLD):
+    """
+    Return the times (seconds, sorted) of the speech onsets in frame energies.
+
+    An onset is a local maximum of onset_strength() that is threshold
+    standard deviations above its mean and followed by speech (see
+    voice_activity()) within 50 ms.
+    """
+    strength = onset_strength(energy)
+    if len(strength) < 3:
+        return np.zeros(0)
+    speech = voice_activity(energy, frame_seconds)
+    # Speech within 50 ms after the rise
+    ahead = max(1, int(round(0.05 / frame_seconds)))
+    speech_ahead = np.convolve(speech.astype(np.int32), np.ones(ahead, dtype=np.int32), mode="full")[ahead - 1:]
+    peak = np.zeros(len(strength), dtype=bool)
+    peak[1:-1] = (strength[1:-1] >= strength[:-2]) & (strength[1:-1] > strength[2:])
+    peak &= strength > strength.mean() + threshold * strength.std()
+    peak &= speech_ahead[:len(strength)] > 0
+    # The rise into frame i starts at the beginning of frame i - 1
+    return (np.flatnonzero(peak) - 1).clip(0) * frame_seconds
+
+
+def snap_times(times, onsets, before=SNAP_BEFORE, after=SNAP_AFTER):
+    """
+    Move each time to the nearest onset in [t - before, t + after].
+
+    The times must increase, and so do the snapped times: a time is only
+    snapped to an onset after the previous snapped time and before the next
+    tapped time, so no onset is used twice. Times without such an onset
+    stay where they are.
+
+    Returns:
+        Array of snapped times (rounded to ms, like timestamps.txt)
+    """
+    times = np.asarray(times, dtype=np.float64)
+    onsets = np.asarray(onsets, dtype=np.float64)
+    if not len(times) or not len(onsets):
+        return times.copy()
+    if np.any(np.diff(times) <= 0):
+        raise ValueError("times to snap must increase")
+    # The two onsets around each time (the nearest ones on either side)
+    i = np.searchsorted(onsets, times)
+    earlier = onsets[np.maximum(i - 1, 0)].round(3)
+    later = onsets[np.minimum(i, len(onsets) - 1)].round(3)
+    upper = np.concatenate([times[1:], [np.inf]])
+    earlier_ok = (i > 0) & (times - earlier <= before)
+    later_ok = (i < len(onsets)) & (later - times <= after) & (later < upper)
+    earlier_first = times - earlier <= later - times
+
+    # Sequential pass: the lower bound is the final previous value
+    snapped = times.copy()
+    previous = -np.inf
+    for k in range(len(times)):
+        candidates = ((earlier[k], earlier_ok[k]), (later[k], later_ok[k]))
+        if not earlier_first[k]:
+            candidates = candidates[::-1]
+        for onset, ok in candidates:
+            if ok and onset > previous:
+                snapped[k] = onset
+                break
+        previous = snapped[k]
+    return snapped
+
+
+def snap_report(times, snapped):
+    """
+    Return a summary of how far snap_times() moved the times (shifts in
+    seconds, negative = earlier).
+    """
+    shifts = (np.asarray(snapped) - np.asarray(times)).round(3)
+    moved = shifts != 0
+    return {
+        "shifts": shifts.tolist(),
+        "moved": int(moved.sum()),
+        "total": len(shifts),
+        "median_shift": float(np.median(shifts[moved])) if moved.any() else 0.0,
+        "max_shift": float(np.abs(shifts).max()) if len(shifts) else 0.0,
+    }
+
+
+def find_media(folder, title, media=None):
+    """
+    Return the media file to analyse: the given one, the project audio, or
+    the project video (<title>.mp4 or video.mp4).
+    """
+    if media:
+        return media
+    audio = find_audio(folder, title)
+    if audio:
+        return audio
+    for name in [f"{title}.mp4", "video.mp4"]:
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def estimate_project(folder, media=None, force=False, threshold=VAD_THRESHOLD):
+    """
+    Write an estimated timestamps.txt for a project.
+
+    Args:
+        folder: Project folder with groups.json (step 4)
+        media: Audio or video file (default: the project audio or video)
+        force: Replace an existing timestamps.txt
+        threshold: Voice activity threshold (see voice_activity())
+
+    Returns:
+        dict with the timestamps path, starts, number of speech segments,
+        speech and media seconds and the processing time
+    """
+    start = time.perf_counter()
+    data, source_text, _ = load_project(folder)
+    title = data.get("title") or "Project"
+    groups = load_artifact(folder, GROUPS_FILENAME)
+    if groups is None:
+        raise ValueError(f"{GROUPS_FILENAME} not found in {folder} (create it in step 4)")
+    if load_artifact(folder, TIMESTAMPS_FILENAME) is not None and not force:
+        raise ValueError(f"{TIMESTAMPS_FILENAME} already exists in {folder} (use force to replace it)")
+    media = find_media(folder, title, media)
+    if not media:
+        raise ValueError(f"no audio or video found in {folder}")
+
+    groups = json.loads(groups)["groups"]
+    energy, frame_seconds = media_energy(media)
+    with trace.span("estimate", groups=len(groups)):
+        segments = speech_segments(voice_activity(energy, frame_seconds, threshold), frame_seconds)
+        starts = estimate_starts(group_characters(groups, text_lines(source_text)), segments)
+    path = save_artifact(folder, TIMESTAMPS_FILENAME, format_timestamps(starts))
+    return {
+        "path": path,
+        "media": media,
+        "starts": starts.tolist(),
+        "segments": len(segments),
+        "speech_seconds": float((segments[:, 1] - segments[:, 0]).sum()) if len(segments) else 0.0,
+        "media_seconds": len(energy) * frame_seconds,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def media_onsets(media):
+    """Return the speech onset times (seconds) of a media file."""
+    energy, frame_seconds = media_energy(media, ONSET_FRAME_SECONDS)
+    with trace.span("onsets"):
+        return onset_times(energy, frame_seconds)
+
+
+def snap_timestamps(timestamps, media, before=SNAP_BEFORE, after=SNAP_AFTER):
+    """
+    Snap tapped times (seconds) to the speech onsets of a media file.
+
+    Returns:
+        (snapped times as a list, snap_report() dict)
+    """
+    snapped = snap_times(timestamps, media_onsets(media), before, after)
+    return snapped.tolist(), snap_report(timestamps, snapped)
+
+
+def snap_project(folder, media=None, before=SNAP_BEFORE, after=SNAP_AFTER, write=True):
+    """
+    Snap the times of a project's timestamps.txt to the speech onsets.
+
+    Args:
+        folder: Project folder with timestamps.txt (step 5)
+        media: Audio or video file (default: the project audio or video)
+        before, after: Snap window around each tapped time (seconds)
+        write: Write the snapped times back to timestamps.txt
+
+    Returns:
+        snap_report() dict with the original and snapped times, the media
+        and the processing time added
+    """
+    start = time.perf_counter()
+    data, _, _ = load_project(folder)
+    text = load_artifact(folder, TIMESTAMPS_FILENAME)
+    if text is None:
+        raise ValueError(f"{TIMESTAMPS_FILENAME} not found in {folder}")
+    media = find_media(folder, data.get("title") or "Project", media)
+    if not media:
+        raise ValueError(f"no audio or video found in {folder}")
+    timestamps, problems = check_timestamps(text)
+    if problems:
+        raise ValueError(f"{TIMESTAMPS_FILENAME}: {'; '.join(problems)}")
+    snapped, report = snap_timestamps(timestamps, media, before, after)
+    if write and report["moved"]:
+        save_artifact(folder, TIMESTAMPS_FILENAME, format_timestamps(snapped))
+    report.update(times=timestamps, snapped=snapped, media=media, seconds=time.perf_counter() - start)
+    return report
+
+
+def cmd_estimate(args):
+    """Estimate timestamps.txt from the speech in the audio."""
+    result = estimate_project(args.folder, args.media, args.force, args.threshold)
+    print(f"{len(result['starts'])} groups timed over {result['segments']} speech segments "
+          f"({result['speech_seconds']:.0f} s speech in {result['media_seconds']:.0f} s)")
+    print(f"Processed in {result['seconds']:.1f} s "
+          f"({result['media_seconds'] / max(result['seconds'], 1e-9):.0f}x real time)")
+    print(f"Written: {result['path']}")
+    return 0
+
+
+def cmd_snap(args):
+    """Snap the tapped times of timestamps.txt to the speech onsets."""
+    report = snap_project(args.folder, args.media, args.before, args.after, write=not args.dry_run)
+    if args.list:
+        for line, (old, new) in enumerate(zip(report["times"], report["snapped"]), start=1):
+            if old != new:
+                print(f"{line:>5}  {format_timestamp(old)} -> {format_timestamp(new)}  "
+                      f"{(new - old) * 1000:+6.0f} ms")
+    print(f"{report['moved']} of {report['total']} times moved, median {report['median_shift'] * 1000:+.0f} ms, "
+          f"max {report['max_shift'] * 1000:.0f} ms ({report['seconds']:.1f} s)")
+    if report["moved"] and not args.dry_run:
+        print(f"Written: {TIMESTAMPS_FILENAME}")
+    return 0
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Estimate or correct timestamps.txt of a project from its audio.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    media_help = "audio or video file (default: <title>.mp3, audio.mp3 or <title>.mp4)"
+
+    p_estimate = sub.add_parser("estimate", help="estimate timestamps.txt from the speech in the audio")
+    p_estimate.add_argument("folder", help="project folder with groups.json")
+    p_estimate.add_argument("--media", help=media_help)
+    p_estimate.add_argument("--force", action="store_true", help="replace an existing timestamps.txt")
+    p_estimate.add_argument("--threshold", type=float, default=VAD_THRESHOLD,
+                            help="speech threshold between noise floor (0) and speech level (1)")
+    p_estimate.set_defaults(func=cmd_estimate)
+
+    p_snap = sub.add_parser("snap", help="snap tapped times to the nearest speech onset")
+    p_snap.add_argument("folder", help="project folder with timestamps.txt")
+    p_snap.add_argument("--media", help=media_help)
+    p_snap.add_argument("--before", type=float, default=SNAP_BEFORE,
+                        help="seconds a time may move earlier (default: %(default)s)")
+    p_snap.add_argument("--after", type=float, default=SNAP_AFTER,
+                        help="seconds a time may move later (default: %(default)s)")
+    p_snap.add_argument("--dry-run", action="store_true", help="only report the shifts")
+    p_snap.add_argument("--list", action="store_true", help="list every moved time")
+    p_snap.set_defaults(func=cmd_snap)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Batch Module for Interlinear Text Creator
+
+Builds the Android app packages of a whole library without the GUI.
+
+Every project folder below a root (source.txt plus a *.project.json, as
+written by "Save Project") is packaged exactly like "Create App Package"
+does, in parallel worker processes. Projects whose package is up to date
+are skipped, and a catalog.json listing all packages is written to the root.
+
+Command line:
+    python -m interlinear.batch <library_root> [--workers N] [--force] [--mobile-format compact]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .project_io import load_project, find_audio, discover_projects, text_lines, atomic_write
+from .languages import LANG_DISPLAY_NAMES, language_code
+from .timing import load_sync
+from .exporter.html_export import (
+    generate_app_package,
+    app_package_path,
+    app_package_digest,
+    MOBILE_FORMATS
+)
+from .exporter.manifest import ExportManifest
+
+CATALOG_FILENAME = "catalog.json"
+
+
+def package_settings(folder):
+    """
+    Read the generate_app_package() arguments of a project from its folder.
+    """
+    data, source_text, target_text = load_project(folder)
+    title = data.get("title") or "Project"
+    src = data.get("source_language", "")
+    tgt = data.get("target_language", "")
+    orig = text_lines(source_text)
+    return {
+        "folder": folder,
+        "title": title,
+        "orig": orig,
+        "trans": text_lines(target_text),
+        "source_lang": LANG_DISPLAY_NAMES.get(src, src),
+        "target_lang": language_code(src),
+        "native_lang": LANG_DISPLAY_NAMES.get(tgt, tgt),
+        "audio_path": find_audio(folder, title),
+        "author": data.get("author") or None,
+        "source": data.get("source") or None,
+        "description": data.get("description") or None,
+        "sync": load_sync(folder, orig),
+    }
+
+
+def build_project(folder, force=False, mobile_mode="standard"):
+    """
+    Build the app package of one project (runs in a worker process).
+
+    Returns:
+        dict with folder, title, package path, status ("built", "unchanged"
+        or "failed"), seconds, error and the catalog metadata
+    """
+    start = time.perf_counter()
+    result = {"folder": folder, "title": os.path.basename(folder), "package": None,
+              "status": "failed", "error": None}
+    try:
+        settings = package_settings(folder)
+        result["title"] = settings["title"]
+        digest = app_package_digest(settings["title"], settings["orig"], settings["trans"],
+                                    settings["source_lang"], settings["target_lang"],
+                                    settings["native_lang"], settings["audio_path"],
+                                    settings["author"], settings["source"],
+                                    settings["description"], mobile_mode, settings["sync"])
+        zip_path = app_package_path(folder, settings["title"])
+        unchanged = not force and ExportManifest(folder).is_current(zip_path, digest)
+        if not unchanged:
+            generate_app_package(force=True, mobile_mode=mobile_mode, **settings)
+        result.update(
+            package=zip_path,
+            status="unchanged" if unchanged else "built",
+            source_lang=settings["source_lang"],
+            native_lang=settings["native_lang"],
+            author=settings["author"],
+            description=settings["description"],
+            audio=settings["audio_path"] is not None,
+            words=sum(1 for w in settings["orig"] if w.strip()),
+            size=os.path.getsize(zip_path),
+        )
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def build_library(root, workers=None, force=False, mobile_mode="standard", progress=None):
+    """
+    Build the app packages of every project below root.
+
+    Args:
+        root: Library folder
+        workers: Worker processes (default: CPU count, 1 = no subprocesses)
+        force: Rebuild packages that are up to date
+        mobile_mode: Format of interlinear.html (see MOBILE_FORMATS)
+        progress: Called as progress(done, total, result) after each project
+
+    Returns:
+        List of build_project() results, in project order
+    """
+    folders = list(discover_projects(root))
+    workers = workers or os.cpu_count() or 1
+    results = {}
+
+    if workers == 1 or len(folders) < 2:
+        for folder in folders:
+            results[folder] = build_project(folder, force, mobile_mode)
+            if progress:
+                progress(len(results), len(folders), results[folder])
+    else:
+        with ProcessPoolExecutor(min(workers, len(folders))) as pool:
+            jobs = [pool.submit(build_project, folder, force, mobile_mode) for folder in folders]
+            for job in as_completed(jobs):
+                result = job.result()
+                results[result["folder"]] = result
+                if progress:
+                    progress(len(results), len(folders), result)
+
+    return [results[folder] for folder in folders]
+
+
+def write_catalog(root, results):
+    """
+    Write catalog.json (all packages of the library) into root.
+
+    Paths in the catalog are relative to root.
+    """
+    entries = []
+    for r in results:
+        if r["package"] is None:
+            continue
+        entries.append({
+            "title": r["title"],
+            "folder": os.path.relpath(r["folder"], root),
+            "package": os.path.relpath(r["package"], root),
+            "size": r["size"],
+            "target_language": r["source_lang"],
+            "native_language": r["native_lang"],
+            "author": r["author"],
+            "description": r["description"],
+            "audio": r["audio"],
+            "words": r["words"],
+        })
+    return atomic_write(os.path.join(root, CATALOG_FILENAME),
+                        json.dumps({"packages": entries}, ensure_ascii=False, indent=2))
+
+
+def format_summary(results, elapsed):
+    """
+    Return the per-project timing summary as text (slowest first).
+    """
+    lines = [f"{'seconds':>8}  {'status':<9}  project"]
+    for r in sorted(results, key=lambda r: -r["seconds"]):
+        lines.append(f"{r['seconds']:8.2f}  {r['status']:<9}  {r['title']}"
+                     + (f"  ({r['error']})" if r["error"] else ""))
+    counts = {s: sum(1 for r in results if r["status"] == s) for s in ("built", "unchanged", "failed")}
+    lines.append(f"{len(results)} projects in {elapsed:.2f} s: {counts['built']} built, "
+                 f"{counts['unchanged']} unchanged, {counts['failed']} failed")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Build the app packages of all projects below a folder.")
+    parser.add_argument("root", help="library folder containing project folders")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--force", action="store_true", help="rebuild packages that are up to date")
+    parser.add_argument("--mobile-format", choices=MOBILE_FORMATS, default="standard",
+                        help="format of interlinear.html")
+    args = parser.parse_args(argv)
+
+    def progress(done, total, result):
+        print(f"[{done}/{total}] {result['status']:<9} {result['title']} ({result['seconds']:.2f} s)",
+              flush=True)
+
+    start = time.perf_counter()
+    results = build_library(args.root, args.workers, args.force, args.mobile_format, progress)
+    catalog = write_catalog(args.root, results)
+    print()
+    print(format_summary(results, time.perf_counter() - start))
+    print(f"Catalog: {catalog}")
+    return 1 if any(r["status"] == "failed" for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
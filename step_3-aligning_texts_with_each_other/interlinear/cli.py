@@ -0,0 +1,252 @@
+"""
+Command Line Module for Interlinear Text Creator
+
+Works on a project folder without the GUI (and without tkinter):
+
+    python -m interlinear.cli info <folder>
+    python -m interlinear.cli save <folder> [--source-file source.txt] [--target-file target.txt] [--title ...]
+    python -m interlinear.cli export <folder> [--variant basic --variant mobile ...] [--force]
+    python -m interlinear.cli package <folder> [--mobile-format compact] [--force]
+    python -m interlinear.cli bind <folder> [--end <seconds>]
+    python -m interlinear.cli pack <folder>
+    python -m interlinear.cli unpack <folder> [--to <dest>]
+
+Exporter dependencies (qrcode, yaml, ...) are only imported by the
+command that needs them.
+"""
+
+import argparse
+import os
+import sys
+
+from . import project_io
+from .project_io import find_container, find_audio, save_project, text_lines
+from .languages import language_code
+from .exporter.html_export import MOBILE_FORMATS
+
+# Project metadata keys, as saved by the GUI
+METADATA_KEYS = ("title", "source_language", "target_language", "youtube_url", "audio",
+                 "author", "source", "description")
+
+
+def load_project_lines(folder):
+    """
+    Load a project folder split into lines (project_io.load_project()
+    returns the texts whole).
+
+    Returns:
+        (metadata dict, source lines, target lines)
+    """
+    data, source_text, target_text = project_io.load_project(folder)
+    data.setdefault("title", "Project")
+    return data, text_lines(source_text), text_lines(target_text)
+
+
+def cmd_info(args):
+    """Print a summary of the project."""
+    from .alignment import count_words, count_sentences, AlignmentTracker
+    from .journal import EditJournal
+    from .timing import load_sync, timed_groups
+
+    data, source_text, target_text = project_io.load_project(args.folder)
+    data.setdefault("title", "Project")
+    orig, tran = text_lines(source_text), text_lines(target_text)
+    tracker = AlignmentTracker()
+    tracker.reset("orig", orig)
+    tracker.reset("tran", tran)
+    mismatch = tracker.first_mismatch()
+
+    print(f"Title:       {data['title']}")
+    print(f"Languages:   {data.get('source_language', '-')} -> {data.get('target_language', '-')}")
+    print(f"Words:       {count_words(orig)} / {count_words(tran)}")
+    print(f"Sentences:   {count_sentences(orig)} / {count_sentences(tran)}")
+    if mismatch is not None:
+        print(f"Alignment:   first mismatch in sentence {tracker.sentence_of('orig', mismatch)} "
+              f"(line {mismatch + 1})")
+    else:
+        print("Alignment:   OK")
+    audio = find_audio(args.folder, data["title"])
+    print(f"Audio:       {os.path.basename(audio) if audio else '-'}")
+    print(f"Timing:      {'yes' if load_sync(args.folder, orig) else '-'}")
+    for problem in timed_groups(args.folder)[1]:
+        print(f"             {problem}")
+    print(f"Storage:     {'container' if find_container(args.folder) else 'loose files'}")
+    # Only edits recorded against the saved texts are unsaved edits
+    edits, recorded = EditJournal(args.folder).unsaved_edits(source_text, target_text)
+    if edits:
+        print(f"Journal:     {edits} unsaved edits (run 'save' to apply them)")
+    elif edits is None and recorded:
+        print(f"Journal:     stale, {recorded} edits of other texts (ignored, replaced by the next save)")
+    return 0
+
+
+def cmd_save(args):
+    """Save the project, replaying unsaved journal edits and applying the options."""
+    from .journal import EditJournal, text_digest
+
+    data, source_text, target_text = project_io.load_project(args.folder)
+    data.setdefault("title", "Project")
+    journal = EditJournal(args.folder)
+    orig, tran, recovered = journal.replay(source_text, target_text)
+    if args.source_file:
+        with open(args.source_file, "r", encoding="utf-8") as f:
+            orig = text_lines(f.read())
+    if args.target_file:
+        with open(args.target_file, "r", encoding="utf-8") as f:
+            tran = text_lines(f.read())
+    for key in METADATA_KEYS:
+        value = getattr(args, key, None)
+        if value is not None:
+            data[key] = value
+    data.setdefault("source_language", "Swissgerman-CHDE")
+    data.setdefault("target_language", "English-EN")
+
+    save_project(args.folder, data, orig, tran)
+    journal.reset(text_digest("\n".join(orig), "\n".join(tran)))
+    journal.close()
+    print(f"Project saved to: {args.folder}" + (f" ({recovered} journaled edits recovered)" if recovered else ""))
+    return 0
+
+
+def cmd_export(args):
+    """Export the desktop and/or mobile HTML files."""
+    from .exporter.html_export import export_variants
+    from .timing import load_sync
+
+    data, orig, tran = load_project_lines(args.folder)
+    title = data["title"]
+    url = data.get("youtube_url", "").strip()
+    audio = find_audio(args.folder, title)
+
+    variants = args.variant
+    if not variants:
+        # Same choice as "Export HTML (Desktop)" in the GUI
+        variants = ["basic"]
+        if data.get("audio"):
+            variants.append("audio")
+        if url:
+            variants.append("youtube")
+
+    paths, skipped = export_variants(args.folder, title, orig, tran, variants,
+                                     audio=audio or os.path.join(args.folder, f"{title}.mp3"),
+                                     url=url, source_lang=language_code(data.get("source_language")),
+                                     force=args.force, mobile_mode=args.mobile_format,
+                                     sync=load_sync(args.folder, orig))
+    for variant, path in paths.items():
+        print(f"{'unchanged' if variant in skipped else 'written':<9}  {path}")
+    return 0
+
+
+def cmd_package(args):
+    """Build the app package ZIP."""
+    from .batch import build_project
+
+    result = build_project(args.folder, args.force, args.mobile_format)
+    if result["error"]:
+        print(f"Error: {result['error']}", file=sys.stderr)
+        return 1
+    print(f"{result['status']:<9}  {result['package']} ({result['seconds']:.2f} s)")
+    return 0
+
+
+def cmd_bind(args):
+    """Check timestamps.txt and write its times into groups.json."""
+    from .timing import bind_project, format_timestamp
+
+    try:
+        groups, problems = bind_project(args.folder, args.end, strict=not args.ignore_problems)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    for problem in problems:
+        print(f"Warning: {problem}", file=sys.stderr)
+    starts = [g["start"] for g in groups if g["start"] is not None]
+    if starts:
+        print(f"{len(starts)} of {len(groups)} groups timed, {format_timestamp(starts[0])} - "
+              f"{format_timestamp(starts[-1])}")
+    else:
+        print(f"None of {len(groups)} groups timed")
+    return 0
+
+
+def cmd_pack(args):
+    """Move the project files into a single project container."""
+    path = project_io.import_folder(args.folder)
+    print(f"Project container: {path}")
+    return 0
+
+
+def cmd_unpack(args):
+    """Write the files of a project container as loose files."""
+    for path in project_io.export_folder(args.folder, args.to):
+        print(path)
+    return 0
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Work on an interlinear project folder without the GUI.")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write a Chrome trace of the command to FILE and print a timing summary")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_info = sub.add_parser("info", help="show title, languages, counts and alignment status")
+    p_info.add_argument("folder")
+    p_info.set_defaults(func=cmd_info)
+
+    p_save = sub.add_parser("save", help="save the project (recovers journaled edits)")
+    p_save.add_argument("folder")
+    p_save.add_argument("--source-file", help="replace the source text with this file")
+    p_save.add_argument("--target-file", help="replace the target text with this file")
+    for key in METADATA_KEYS:
+        if key != "audio":
+            p_save.add_argument("--" + key.replace("_", "-"), dest=key)
+    p_save.add_argument("--audio", dest="audio", action="store_true", default=None,
+                        help="mark the project as having audio")
+    p_save.set_defaults(func=cmd_save)
+
+    p_export = sub.add_parser("export", help="export HTML files")
+    p_export.add_argument("folder")
+    p_export.add_argument("--variant", action="append", choices=("basic", "audio", "youtube", "mobile"),
+                          help="variant to export (repeatable, default: as the GUI desktop export)")
+    p_export.add_argument("--mobile-format", choices=MOBILE_FORMATS, default="standard")
+    p_export.add_argument("--force", action="store_true", help="rebuild unchanged files")
+    p_export.set_defaults(func=cmd_export)
+
+    p_package = sub.add_parser("package", help="create the app package ZIP")
+    p_package.add_argument("folder")
+    p_package.add_argument("--mobile-format", choices=MOBILE_FORMATS, default="standard")
+    p_package.add_argument("--force", action="store_true", help="rebuild an unchanged package")
+    p_package.set_defaults(func=cmd_package)
+
+    p_bind = sub.add_parser("bind", help="check timestamps.txt and write its times into groups.json")
+    p_bind.add_argument("folder")
+    p_bind.add_argument("--end", type=float, help="end of the last group in seconds (length of the media)")
+    p_bind.add_argument("--ignore-problems", action="store_true",
+                        help="bind the valid times even if the check finds problems")
+    p_bind.set_defaults(func=cmd_bind)
+
+    p_pack = sub.add_parser("pack", help="store the project files in a single project container")
+    p_pack.add_argument("folder")
+    p_pack.set_defaults(func=cmd_pack)
+
+    p_unpack = sub.add_parser("unpack", help="write the project container as loose files")
+    p_unpack.add_argument("folder")
+    p_unpack.add_argument("--to", help="folder to write to (default: the project folder)")
+    p_unpack.set_defaults(func=cmd_unpack)
+
+    args = parser.parse_args(argv)
+    if not args.trace:
+        return args.func(args)
+    
+    from . import trace
+    trace.enable()
+    with trace.span(args.command):
+        result = args.func(args)
+    trace.write_chrome_trace(args.trace)
+    print(trace.summary(), file=sys.stderr)
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main())
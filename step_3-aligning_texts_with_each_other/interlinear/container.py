@@ -0,0 +1,166 @@
+"""
+Container Module for Interlinear Text Creator
+
+Stores all artifacts of a project in one SQLite file (project.ilproj).
+
+Every artifact (source.txt, target.txt, project.json, the dictionary,
+groups.json, timestamps.txt) is kept under its file name with a version
+history: writing an artifact adds a new version, writing unchanged content
+adds nothing. The newest version of every artifact is read with a single
+query, and a save only touches the artifacts it writes, in one transaction.
+"""
+
+import time
+import sqlite3
+import hashlib
+
+CONTAINER_FILENAME = "project.ilproj"
+
+# Format version, stored as PRAGMA user_version
+CONTAINER_VERSION = 1
+
+# Versions kept per artifact (older ones are deleted when a new one is written)
+KEEP_VERSIONS = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifact (
+    name    TEXT    NOT NULL,
+    version INTEGER NOT NULL,
+    saved   REAL    NOT NULL,
+    digest  TEXT    NOT NULL,
+    data    BLOB    NOT NULL,
+    PRIMARY KEY (name, version)
+);
+CREATE TABLE IF NOT EXISTS head (
+    name    TEXT    PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+
+def content_digest(data):
+    """Return the hash stored with an artifact version."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ProjectContainer:
+    """
+    A project container file.
+
+    Artifacts are bytes; use read_text()/write_texts() for UTF-8 text.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version > CONTAINER_VERSION:
+            self._db.close()
+            raise ValueError(f"{path} was written by a newer version (format {version})")
+        if version < CONTAINER_VERSION:
+            # New (or older format) file: create the tables once; opening
+            # an existing container afterwards only reads
+            with self._db:
+                self._db.executescript(SCHEMA)
+                self._db.execute(f"PRAGMA user_version = {CONTAINER_VERSION}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    # -------------------------------------------------------------------------
+    # Reading
+    # -------------------------------------------------------------------------
+
+    def names(self):
+        """Return the names of all current artifacts."""
+        return [row[0] for row in self._db.execute("SELECT name FROM head ORDER BY name")]
+
+    def read_all(self):
+        """Return {name: bytes} with the newest version of every artifact."""
+        return dict(self._db.execute(
+            "SELECT a.name, a.data FROM head h JOIN artifact a USING (name, version)"))
+
+    def read(self, name, version=None):
+        """
+        Return one artifact (the newest or the given version), or None.
+        """
+        if version is None:
+            row = self._db.execute(
+                "SELECT a.data FROM head h JOIN artifact a USING (name, version) WHERE h.name = ?",
+                (name,)).fetchone()
+        else:
+            row = self._db.execute("SELECT data FROM artifact WHERE name = ? AND version = ?",
+                                   (name, version)).fetchone()
+        return None if row is None else row[0]
+
+    def read_text(self, name, version=None):
+        """Return an artifact as text, or None."""
+        data = self.read(name, version)
+        return None if data is None else bytes(data).decode("utf-8")
+
+    def history(self, name):
+        """
+        Return the stored versions of an artifact as (version, saved, size)
+        tuples, newest first.
+        """
+        return self._db.execute(
+            "SELECT version, saved, length(data) FROM artifact WHERE name = ? ORDER BY version DESC",
+            (name,)).fetchall()
+
+    # -------------------------------------------------------------------------
+    # Writing
+    # -------------------------------------------------------------------------
+
+    def write(self, artifacts):
+        """
+        Write artifacts in one transaction.
+
+        Args:
+            artifacts: {name: bytes}; None removes the artifact (its history
+                is kept until it is written again)
+
+        Returns:
+            Names of the artifacts that changed
+        """
+        changed = []
+        now = time.time()
+        with self._db:
+            for name, data in artifacts.items():
+                row = self._db.execute(
+                    "SELECT h.version, a.digest FROM head h JOIN artifact a USING (name, version) "
+                    "WHERE h.name = ?", (name,)).fetchone()
+                if data is None:
+                    if row is not None:
+                        self._db.execute("DELETE FROM head WHERE name = ?", (name,))
+                        changed.append(name)
+                    continue
+                digest = content_digest(data)
+                if row is not None and row[1] == digest:
+                    continue
+                last = self._db.execute("SELECT max(version) FROM artifact WHERE name = ?",
+                                        (name,)).fetchone()[0] or 0
+                self._db.execute("INSERT INTO artifact VALUES (?, ?, ?, ?, ?)",
+                                 (name, last + 1, now, digest, sqlite3.Binary(data)))
+                self._db.execute("INSERT OR REPLACE INTO head VALUES (?, ?)", (name, last + 1))
+                self._db.execute("DELETE FROM artifact WHERE name = ? AND version <= ?",
+                                 (name, last + 1 - KEEP_VERSIONS))
+                changed.append(name)
+        return changed
+
+    def write_texts(self, texts):
+        """Write text artifacts ({name: str or None}) in one transaction."""
+        return self.write({name: None if text is None else text.encode("utf-8")
+                           for name, text in texts.items()})
+
+    def restore(self, name, version):
+        """Make an older version of an artifact the current one again."""
+        data = self.read(name, version)
+        if data is None:
+            raise KeyError(f"{name} has no version {version}")
+        return self.write({name: bytes(data)})
@@ -0,0 +1,177 @@
+"""
+Diagnostics Module for Interlinear Text Creator
+
+Reports sentences whose word counts differ between source and target.
+
+Both files are streamed line by line, so corpora of any size are checked
+in constant memory.
+
+Command line:
+    python -m interlinear.diagnostics source.txt target.txt [--text report.txt] [--json report.json] [--all]
+    python -m interlinear.diagnostics <project folder> [--text report.txt] [--json report.json] [--all]
+"""
+
+import argparse
+import json
+import os
+import sys
+from itertools import zip_longest
+
+from .alignment import iter_sentence_counts
+
+REPORT_TEXT = "alignment_report.txt"
+REPORT_JSON = "alignment_report.json"
+
+
+def iter_sentence_report(source_lines, target_lines, include_all=False):
+    """
+    Compare sentence word counts of two line streams.
+    
+    Yields one dict per sentence (only mismatches unless include_all):
+    {'index': 1-based sentence number, 'source_words': n, 'target_words': n,
+     'source_line': 1-based first line or None, 'target_line': ... or None}
+    """
+    pairs = zip_longest(iter_sentence_counts(source_lines), iter_sentence_counts(target_lines))
+    for index, (src, tgt) in enumerate(pairs, start=1):
+        src_words = src[1] if src else 0
+        tgt_words = tgt[1] if tgt else 0
+        if include_all or src_words != tgt_words:
+            yield {
+                'index': index,
+                'source_words': src_words,
+                'target_words': tgt_words,
+                'source_line': src[0] + 1 if src else None,
+                'target_line': tgt[0] + 1 if tgt else None,
+            }
+
+
+def write_report(source_path, target_path, text_out=None, json_out=None, include_all=False):
+    """
+    Stream a sentence report for two files to text and/or JSON streams.
+    
+    Args:
+        source_path, target_path: Files to compare
+        text_out: Optional writable text stream for the human-readable report
+        json_out: Optional writable text stream for the JSON report
+        include_all: List every sentence, not only mismatches
+    
+    Returns:
+        Summary dict with the number of sentences and mismatches
+    """
+    with open(source_path, "r", encoding="utf-8") as src, \
+         open(target_path, "r", encoding="utf-8") as tgt:
+        return write_lines_report(src, tgt, text_out, json_out, include_all, source_path, target_path)
+
+
+def write_lines_report(source_lines, target_lines, text_out=None, json_out=None, include_all=False,
+                       source_name="source.txt", target_name="target.txt"):
+    """
+    Stream a sentence report for two line streams (see write_report()).
+    
+    source_name and target_name are the names shown in the report.
+    """
+    summary = {'sentences': 0, 'mismatches': 0}
+    rows = 0
+    
+    if text_out:
+        text_out.write(f"Source: {source_name}\nTarget: {target_name}\n\n")
+        text_out.write(f"{'Sentence':>8}  {'Source':>6}  {'Target':>6}  {'Src line':>8}  {'Tgt line':>8}\n")
+    if json_out:
+        json_out.write('{"source": %s, "target": %s, "sentences": [' %
+                       (json.dumps(source_name), json.dumps(target_name)))
+    
+    for row in iter_sentence_report(source_lines, target_lines, include_all=True):
+        summary['sentences'] += 1
+        mismatch = row['source_words'] != row['target_words']
+        if mismatch:
+            summary['mismatches'] += 1
+        if not (include_all or mismatch):
+            continue
+        if text_out:
+            text_out.write(
+                f"{row['index']:>8}  {row['source_words']:>6}  {row['target_words']:>6}  "
+                f"{row['source_line'] or '-':>8}  {row['target_line'] or '-':>8}"
+                f"{'  <-- mismatch' if mismatch else ''}\n")
+        if json_out:
+            json_out.write(("\n  " if not rows else ",\n  ") + json.dumps(row))
+        rows += 1
+    
+    if text_out:
+        text_out.write(f"\n{summary['mismatches']} of {summary['sentences']} sentences "
+                       f"have mismatched word counts.\n")
+    if json_out:
+        json_out.write('\n], "summary": %s}\n' % json.dumps(summary))
+    
+    return summary
+
+
+def write_project_report(folder, text_out=None, json_out=None, include_all=False):
+    """
+    Stream a sentence report for the texts of a project folder.
+    
+    The texts are read like the project is opened: the loose source.txt and
+    target.txt are streamed in constant memory (see write_report()); only a
+    project container is read into memory, as its texts are stored whole.
+    
+    Returns:
+        The summary dict of write_report()
+    """
+    from .project_io import find_container, load_project, text_lines
+    
+    if not find_container(folder):
+        return write_report(os.path.join(folder, "source.txt"), os.path.join(folder, "target.txt"),
+                            text_out, json_out, include_all)
+    _, source_text, target_text = load_project(folder)
+    return write_lines_report(text_lines(source_text), text_lines(target_text),
+                              text_out, json_out, include_all)
+
+
+def report_project(folder, include_all=False):
+    """
+    Write alignment_report.txt and alignment_report.json for a project folder
+    (see write_project_report()).
+    
+    Returns:
+        (summary, text_report_path, json_report_path)
+    """
+    text_path = os.path.join(folder, REPORT_TEXT)
+    json_path = os.path.join(folder, REPORT_JSON)
+    with open(text_path, "w", encoding="utf-8") as text_out, \
+         open(json_path, "w", encoding="utf-8") as json_out:
+        summary = write_project_report(folder, text_out, json_out, include_all)
+    return summary, text_path, json_path
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(
+        description="Report sentences with mismatched word counts between source and target.")
+    parser.add_argument("source", help="source text (one word per line, empty line = sentence break), "
+                                       "or a project folder")
+    parser.add_argument("target", nargs="?", help="target text with matching lines")
+    parser.add_argument("--text", help="write the text report to this file (default: stdout)")
+    parser.add_argument("--json", help="write the JSON report to this file")
+    parser.add_argument("--all", action="store_true", help="list every sentence, not only mismatches")
+    args = parser.parse_args(argv)
+    project = os.path.isdir(args.source)
+    if not project and not args.target:
+        parser.error("the target text is required unless source is a project folder")
+    
+    text_out = open(args.text, "w", encoding="utf-8") if args.text else None
+    json_out = open(args.json, "w", encoding="utf-8") if args.json else None
+    if text_out is None and json_out is None:
+        text_out = sys.stdout
+    try:
+        if project:
+            summary = write_project_report(args.source, text_out, json_out, args.all)
+        else:
+            summary = write_report(args.source, args.target, text_out, json_out, args.all)
+    finally:
+        for out in (text_out, json_out):
+            if out not in (None, sys.stdout):
+                out.close()
+    return 1 if summary['mismatches'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,34 +5,45 @@ Handles loading, saving, and merging word translation dictionaries.
 """
 
 import os
+from .project_io import atomic_write
 
-def load_dictionary(path):
+def parse_dictionary(lines):
     """
-    Load a dictionary file into a dict.
+    Parse dictionary lines into a dict.
     
     Format: one entry per line, "original_word\ttranslation"
     """
     d = {}
+    for line in lines:
+        line = line.strip()
+        if not line or "\t" not in line:
+            continue
+        parts = line.split("\t", 1)
+        if len(parts) == 2:
+            d[parts[0]] = parts[1]
+    return d
+
+def format_dictionary(d):
+    """
+    Return a dictionary as the text of a dictionary file.
+    """
+    return "".join(f"{k}\t{v}\n" for k, v in sorted(d.items()))
+
+def load_dictionary(path):
+    """
+    Load a dictionary file into a dict.
+    """
     if not os.path.exists(path):
-        return d
+        return {}
     with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or "\t" not in line:
-                continue
-            parts = line.split("\t", 1)
-            if len(parts) == 2:
-                d[parts[0]] = parts[1]
-    return d
+        return parse_dictionary(f)
 
 def save_dictionary(path, d):
     """
     Save a dictionary to file.
     """
     os.makedirs(os.path.dirname(path) if os.path.dirname(path) else ".", exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        for k, v in sorted(d.items()):
-            f.write(f"{k}\t{v}\n")
+    atomic_write(path, format_dictionary(d))
 
 def merge_from_lines(existing_dict, orig_lines, trans_lines):
     """
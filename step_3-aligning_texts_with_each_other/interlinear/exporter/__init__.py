@@ -4,5 +4,6 @@ from .html_export import (
     generate_with_audio,
     generate_with_youtube,
     generate_mobile_app_html,
-    generate_app_package
+    generate_app_package,
+    export_variants
 )
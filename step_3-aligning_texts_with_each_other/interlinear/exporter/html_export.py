@@ -9,12 +9,16 @@ This module exports interlinear texts to various HTML formats:
 - Complete App Package (ZIP with all files ready for import)
 """
 
+import io
 import os
-import qrcode
-import yaml
-import zipfile
-import shutil
+import re
+import json
 from datetime import datetime
+# qrcode, yaml, zipfile, shutil and concurrent.futures are imported by the
+# functions that need them, so importing the exporter stays fast
+from .manifest import ExportManifest, inputs_digest, lines_digest, file_stamp
+from ..project_io import atomic_file
+from .. import trace
 
 # =============================================================================
 # DESKTOP HTML TEMPLATES (Original functionality preserved)
@@ -176,16 +180,30 @@ def esc(s):
 
 def render_words(orig, trans, vd):
     """Render word pairs for desktop HTML (original function preserved)."""
-    rows = []
+    return "".join(iter_words(orig, trans))
+
+def iter_words(orig, trans):
+    """Yield the desktop HTML of the word pairs fragment by fragment."""
+    sep = ""
     for o, t in zip(orig, trans):
         if not o.strip():
-            rows.append("<br>")
-            continue
-        rows.append(
-            f"<div class='word'><div class='orig'>{esc(o)}</div>"
-            f"<div class='trans'>{esc(t)}</div></div>"
-        )
-    return "\n".join(rows)
+            yield sep + "<br>"
+        else:
+            yield (
+                f"{sep}<div class='word'><div class='orig'>{esc(o)}</div>"
+                f"<div class='trans'>{esc(t)}</div></div>"
+            )
+        sep = "\n"
+
+# Markup of the standard mobile content (iter_mobile_content())
+MOBILE_SENTENCE_OPEN = ('{sep}        <div class="sentence-block">\n'
+                        '            <span class="paragraph-number">§{number}</span>\n')
+MOBILE_WORD_GROUP = '''
+            <div class="word-group">
+                <div class="original-word">{orig}</div>
+                <div class="translation-word">{trans}</div>
+            </div>'''
+MOBILE_SENTENCE_CLOSE = '\n        </div>'
 
 def render_mobile_content(orig_lines, trans_lines):
     """
@@ -198,42 +216,444 @@ def render_mobile_content(orig_lines, trans_lines):
     Returns:
         HTML string with mobile-optimized interlinear layout
     """
-    html_parts = []
+    return "".join(iter_mobile_content(orig_lines, trans_lines))
+
+def iter_mobile_content(orig_lines, trans_lines):
+    """
+    Yield the mobile interlinear content fragment by fragment.
+    
+    Produces exactly the same text as render_mobile_content() without
+    holding more than one word group in memory.
+    """
+    sep = ""
     sentence_num = 1
-    current_sentence = []
+    in_sentence = False
     
-    for i, (orig, trans) in enumerate(zip(orig_lines, trans_lines)):
+    for orig, trans in zip(orig_lines, trans_lines):
         orig = orig.strip() if orig else ""
         trans = trans.strip() if trans else ""
         
         # Empty line indicates sentence/paragraph break
         if not orig:
-            if current_sentence:
-                # Output the accumulated sentence
-                html_parts.append(f'        <div class="sentence-block">')
-                html_parts.append(f'            <span class="paragraph-number">§{sentence_num}</span>')
-                html_parts.append(''.join(current_sentence))
-                html_parts.append('        </div>')
+            if in_sentence:
+                yield MOBILE_SENTENCE_CLOSE
                 sentence_num += 1
-                current_sentence = []
+                in_sentence = False
             continue
         
+        if not in_sentence:
+            yield MOBILE_SENTENCE_OPEN.format(sep=sep, number=sentence_num)
+            sep = '\n'
+            in_sentence = True
+        
         # Build word group
-        word_html = f'''
-            <div class="word-group">
-                <div class="original-word">{esc(orig)}</div>
-                <div class="translation-word">{esc(trans)}</div>
-            </div>'''
-        current_sentence.append(word_html)
+        yield MOBILE_WORD_GROUP.format(orig=esc(orig), trans=esc(trans))
     
     # Don't forget the last sentence
-    if current_sentence:
-        html_parts.append(f'        <div class="sentence-block">')
-        html_parts.append(f'            <span class="paragraph-number">§{sentence_num}</span>')
-        html_parts.append(''.join(current_sentence))
-        html_parts.append('        </div>')
+    if in_sentence:
+        yield MOBILE_SENTENCE_CLOSE
+
+def write_html(path, fragments):
+    """
+    Stream HTML fragments into a file.
+    
+    Fragments are written as they are produced, so peak memory does not
+    depend on the length of the text.
+    """
+    with trace.span("write_html", file=os.path.basename(path)):
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(fragments)
+    if trace.enabled():
+        trace.count("bytes_written", os.path.getsize(path))
+    return path
+
+def iter_desktop_html(title, orig, trans, fs=12, vd=10, extra="", body=None):
+    """
+    Yield a complete desktop HTML document; extra goes before the words.
+    
+    body can be an already rendered render_words() string to reuse.
+    """
+    yield HTML_HEADER.format(title=esc(title), fs=fs, vd=vd)
+    yield extra
+    if body is None:
+        yield from iter_words(orig, trans)
+    else:
+        yield body
+    yield HTML_FOOTER
+
+def iter_mobile_html(title, orig, trans, lang, body=None):
+    """
+    Yield a complete mobile HTML document (MOBILE_HTML_TEMPLATE).
     
-    return '\n'.join(html_parts)
+    body can be an already rendered render_mobile_content() string to reuse.
+    """
+    head, tail = MOBILE_HTML_TEMPLATE.split("{content}")
+    yield head.format(title=esc(title), lang=lang)
+    if body is None:
+        yield from iter_mobile_content(orig, trans)
+    else:
+        yield body
+    yield tail.format()
+
+# =============================================================================
+# LAZY MOBILE FORMAT - Word pairs as data, sentence blocks rendered on demand
+# =============================================================================
+
+# Sentence blocks rendered per step by the lazy renderer
+LAZY_CHUNK_SENTENCES = 30
+
+# Renders S (sentences as flat [orig, trans, orig, trans, ...] lists) into the
+# container in chunks, building exactly the markup of render_mobile_content().
+# More chunks are added when the sentinel below the text comes near the
+# viewport. The time to the first rendered chunk is logged to the console.
+LAZY_RENDERER_JS = r"""
+(function () {
+    var CHUNK = %(chunk)d, MARGIN = 1500;
+    var box = document.querySelector('.interlinear-container');
+    var sentinel = document.getElementById('il-more');
+    var next = 0, observer = null;
+    function esc(s) {
+        return s.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+    }
+    function block(i) {
+        var w = S[i];
+        var h = (i ? '\n' : '') + '        <div class="sentence-block">\n' +
+                '            <span class="paragraph-number">§' + (i + 1) + '</span>\n';
+        for (var k = 0; k < w.length; k += 2) {
+            h += '\n            <div class="word-group">\n' +
+                 '                <div class="original-word">' + esc(w[k]) + '</div>\n' +
+                 '                <div class="translation-word">' + esc(w[k + 1]) + '</div>\n' +
+                 '            </div>';
+        }
+        return h + '\n        </div>';
+    }
+    function more() {
+        var end = Math.min(next + CHUNK, S.length), h = '';
+        for (; next < end; next++) h += block(next);
+        box.insertAdjacentHTML('beforeend', h);
+        if (next >= S.length) {
+            if (observer) observer.disconnect();
+        } else if (sentinel.getBoundingClientRect().top < window.innerHeight + MARGIN) {
+            requestAnimationFrame(more);
+        }
+    }
+    more();
+    requestAnimationFrame(function () {
+        window.interlinearFirstChunkMs = performance.now();
+        console.log('interlinear: first chunk painted after ' + Math.round(performance.now()) + ' ms');
+    });
+    if (next < S.length) {
+        if ('IntersectionObserver' in window) {
+            observer = new IntersectionObserver(function (entries) {
+                if (entries[0].isIntersecting) more();
+            }, {rootMargin: '0px 0px ' + MARGIN + 'px 0px'});
+            observer.observe(sentinel);
+        } else {
+            while (next < S.length) more();
+        }
+    }
+})();
+"""
+
+def iter_mobile_sentences(orig_lines, trans_lines):
+    """
+    Yield each sentence as a flat [orig, trans, orig, trans, ...] list,
+    with the same stripping and sentence breaks as render_mobile_content().
+    """
+    sentence = []
+    for orig, trans in zip(orig_lines, trans_lines):
+        orig = orig.strip() if orig else ""
+        trans = trans.strip() if trans else ""
+        if not orig:
+            if sentence:
+                yield sentence
+                sentence = []
+            continue
+        sentence.append(orig)
+        sentence.append(trans)
+    if sentence:
+        yield sentence
+
+def iter_mobile_lazy_html(title, orig, trans, lang, chunk=LAZY_CHUNK_SENTENCES):
+    """
+    Yield a mobile HTML document that carries the word pairs as a compact
+    JavaScript array and renders sentence blocks on demand.
+    
+    The page uses MOBILE_HTML_TEMPLATE unchanged and the renderer produces the
+    same markup as the standard format, so it looks identical once rendered.
+    """
+    head, tail = MOBILE_HTML_TEMPLATE.split("{content}")
+    tail_container, tail_rest = tail.split("</body>")
+    yield head.format(title=esc(title), lang=lang)
+    yield tail_container
+    yield '<div id="il-more"></div>\n<script>\nvar S = ['
+    sep = "\n"
+    for sentence in iter_mobile_sentences(orig, trans):
+        yield sep + json.dumps(sentence, ensure_ascii=False).replace("</", "<\\/")
+        sep = ",\n"
+    yield "\n];"
+    yield LAZY_RENDERER_JS % {"chunk": chunk}
+    yield "</script>\n</body>" + tail_rest
+
+# =============================================================================
+# COMPACT MOBILE FORMAT - Minified markup with short class names
+# =============================================================================
+
+# Class names of MOBILE_HTML_TEMPLATE mapped to the selectors of the compact
+# format. The word pair lives in <b>/<i> children of the word group instead
+# of two classed divs.
+COMPACT_SELECTORS = {
+    "interlinear-container": ".c",
+    "sentence-block": ".s",
+    "paragraph-number": ".n",
+    "word-group": ".w",
+    "original-word": ".w>b",
+    "translation-word": ".w>i",
+    "line-break": ".l",
+}
+
+# <b> and <i> are inline elements, the divs they replace are blocks
+COMPACT_EXTRA_CSS = ".w>b,.w>i{display:block}"
+
+def minify_css(css):
+    """
+    Remove comments and insignificant whitespace from a style sheet.
+    """
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+def compact_css():
+    """
+    Return the style sheet of MOBILE_HTML_TEMPLATE, minified and renamed
+    to the compact selectors.
+    """
+    css = MOBILE_HTML_TEMPLATE.split("<style>")[1].split("</style>")[0]
+    css = minify_css(css.replace("{{", "{").replace("}}", "}"))
+    css = re.sub(r"\.([a-z][a-z-]*)", lambda m: COMPACT_SELECTORS.get(m.group(1), m.group(0)), css)
+    return css + COMPACT_EXTRA_CSS
+
+def iter_mobile_compact_html(title, orig, trans, lang):
+    """
+    Yield a minified mobile HTML document that renders like the standard one.
+    
+    Whitespace is only kept where it is significant (the single space that
+    separates two inline-block word groups).
+    """
+    yield (f'<!DOCTYPE html><html lang="{lang}"><head><meta charset="UTF-8">'
+           f'<meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=5.0, '
+           f'user-scalable=yes"><title>{esc(title)}</title><style>{compact_css()}</style></head>'
+           f'<body><div class=c>')
+    for number, sentence in enumerate(iter_mobile_sentences(orig, trans), 1):
+        words = " ".join(f"<div class=w><b>{esc(o)}</b><i>{esc(t)}</i></div>"
+                         for o, t in zip(sentence[::2], sentence[1::2]))
+        yield f"<div class=s><span class=n>§{number}</span>{words}</div>"
+    yield "</div></body></html>\n"
+
+# =============================================================================
+# MOBILE FORMAT SELECTION
+# =============================================================================
+
+# Formats of the mobile HTML: "standard" holds the rendered text, "lazy"
+# renders it on demand and "compact" is the standard page minified
+MOBILE_FORMATS = ("standard", "lazy", "compact")
+
+def iter_mobile_format(title, orig, trans, lang, mode="standard", body=None):
+    """
+    Yield the mobile HTML document in the given format (see MOBILE_FORMATS).
+    """
+    if mode == "standard":
+        return iter_mobile_html(title, orig, trans, lang, body=body)
+    if mode == "lazy":
+        return iter_mobile_lazy_html(title, orig, trans, lang)
+    if mode == "compact":
+        return iter_mobile_compact_html(title, orig, trans, lang)
+    raise ValueError(f"Unknown mobile format: {mode}")
+
+def standard_mobile_size(title, orig, trans, lang="en"):
+    """
+    Return the size in bytes of the standard mobile HTML document
+    (iter_mobile_html()) without rendering it.
+    
+    Only the words are escaped and measured; the markup around them has a
+    fixed size per word group and sentence block.
+    """
+    head, tail = MOBILE_HTML_TEMPLATE.split("{content}")
+    size = len(head.format(title=esc(title), lang=lang).encode("utf-8")) + len(tail.format().encode("utf-8"))
+    group = len(MOBILE_WORD_GROUP.format(orig="", trans="").encode("utf-8"))
+    block = len((MOBILE_SENTENCE_OPEN.format(sep="", number="") + MOBILE_SENTENCE_CLOSE).encode("utf-8"))
+    for number, sentence in enumerate(iter_mobile_sentences(orig, trans), 1):
+        # Blocks after the first are preceded by a newline
+        size += block + len(str(number)) + (number > 1) + len(sentence) // 2 * group
+        size += sum(len(esc(word).encode("utf-8")) for word in sentence)
+    return size
+
+def mobile_size_report(path, title, orig, trans, lang="en"):
+    """
+    Return the size of an exported mobile HTML file in bytes and the
+    percentage it saves compared to the standard format (computed with
+    standard_mobile_size(), so the standard page is not rendered).
+    """
+    size = os.path.getsize(path)
+    standard = standard_mobile_size(title, orig, trans, lang)
+    return size, round(100 * (1 - size / standard), 1)
+
+def mobile_format_stats(orig, trans, title="", lang="en", chunk=LAZY_CHUNK_SENTENCES):
+    """
+    Compare the mobile formats of a text.
+    
+    Returns a dict with the file size of every format, the percentage each
+    saves compared to the standard format, and the number of word groups
+    in the DOM before the first paint (the whole text, except for the lazy
+    format which starts with one chunk).
+    """
+    stats = {}
+    for mode in MOBILE_FORMATS:
+        fragments = iter_mobile_format(title, orig, trans, lang, mode)
+        stats[f"{mode}_bytes"] = sum(len(s.encode("utf-8")) for s in fragments)
+    for mode in MOBILE_FORMATS[1:]:
+        saved = 1 - stats[f"{mode}_bytes"] / stats["standard_bytes"]
+        stats[f"{mode}_saved_percent"] = round(100 * saved, 1)
+    
+    groups = [len(s) // 2 for s in iter_mobile_sentences(orig, trans)]
+    stats["initial_word_groups"] = sum(groups)
+    stats["lazy_initial_word_groups"] = sum(groups[:chunk])
+    stats["sentences"] = len(groups)
+    return stats
+
+def benchmark_mobile_formats(folder, title, orig, trans, lang="en", chunk=LAZY_CHUNK_SENTENCES):
+    """
+    Write every mobile format plus a size report into folder/mobile_benchmark.
+    
+    Open the <format>.html files in the WebView or a browser: each logs its
+    first-contentful-paint time to the console for comparison.
+    
+    Returns:
+        The mobile_format_stats() dict, also saved as report.json
+    """
+    out = os.path.join(folder, "mobile_benchmark")
+    os.makedirs(out, exist_ok=True)
+    paint_probe = (
+        "<script>new PerformanceObserver(function (l) { l.getEntries().forEach(function (e) {"
+        " console.log('interlinear: ' + e.name + ' after ' + Math.round(e.startTime) + ' ms'); });"
+        " }).observe({type: 'paint', buffered: true});</script>\n"
+    )
+    
+    def with_probe(fragments):
+        for fragment in fragments:
+            if fragment.startswith("<!DOCTYPE"):
+                fragment = fragment.replace("</head>", paint_probe + "</head>", 1)
+            yield fragment
+    
+    for mode in MOBILE_FORMATS:
+        if mode == "lazy":
+            fragments = iter_mobile_lazy_html(title, orig, trans, lang, chunk)
+        else:
+            fragments = iter_mobile_format(title, orig, trans, lang, mode)
+        write_html(os.path.join(out, f"{mode}.html"), with_probe(fragments))
+    
+    stats = mobile_format_stats(orig, trans, title, lang, chunk)
+    with open(os.path.join(out, "report.json"), "w", encoding="utf-8") as f:
+        json.dump(stats, f, indent=2)
+    return stats
+
+# =============================================================================
+# AUDIO SYNC - Highlight the group being spoken, click a word to seek
+# =============================================================================
+
+# Class of the word elements in each format
+SYNC_WORD_CLASS = {"desktop": "word", "standard": "word-group", "lazy": "word-group", "compact": "w"}
+
+SYNC_CSS = {
+    "desktop": ".word.il-active {{ background:#fff3a0; }}\n.word {{ cursor:pointer; }}",
+    "mobile": (".{word}.il-active {{ background: rgba(108, 92, 231, 0.35); border-radius: 6px; }}\n"
+               "audio.il-player {{ position: fixed; left: 0; right: 0; bottom: 0; width: 100%; }}\n"
+               "body {{ padding-bottom: 72px; }}"),
+}
+
+# T holds the start time of each group, which covers the word elements
+# F[g] <= i < E[g]. The group is found by binary search on every timeupdate,
+# and only the words of the previous and the new group are touched.
+SYNC_JS = r"""
+(function () {
+    var T = %(starts)s, F = %(first)s, E = %(end)s;
+    var audio = document.querySelector('audio');
+    var words = document.getElementsByClassName('%(word)s');
+    var current = -1;
+    if (!audio || !T.length) return;
+    function groupAt(t) {
+        var lo = 0, hi = T.length - 1, g = -1;
+        while (lo <= hi) {
+            var mid = (lo + hi) >> 1;
+            if (T[mid] <= t) { g = mid; lo = mid + 1; } else { hi = mid - 1; }
+        }
+        return g;
+    }
+    function groupOfWord(i) {
+        var lo = 0, hi = E.length - 1, g = -1;
+        while (lo <= hi) {
+            var mid = (lo + hi) >> 1;
+            if (E[mid] > i) { g = mid; hi = mid - 1; } else { lo = mid + 1; }
+        }
+        return g >= 0 && F[g] <= i ? g : -1;
+    }
+    function mark(g, on) {
+        for (var i = F[g]; i < E[g] && i < words.length; i++) words[i].classList.toggle('il-active', on);
+    }
+    function show(g) {
+        if (g === current) return;
+        if (current >= 0) mark(current, false);
+        current = g;
+        if (g >= 0) {
+            mark(g, true);
+            if (!audio.paused && F[g] < words.length) words[F[g]].scrollIntoView({block: 'nearest'});
+        }
+    }
+    audio.addEventListener('timeupdate', function () { show(groupAt(audio.currentTime)); });
+    document.addEventListener('click', function (e) {
+        var el = e.target.closest ? e.target.closest('.%(word)s') : null;
+        var g = el ? groupOfWord(Array.prototype.indexOf.call(words, el)) : -1;
+        if (g >= 0) {
+            audio.currentTime = T[g];
+            show(g);
+        }
+    });
+})();
+"""
+
+def sync_html(sync, mode="desktop", audio=None):
+    """
+    Return the style and script that synchronize a page with its audio.
+    
+    Args:
+        sync: timing.build_sync() data
+        mode: "desktop" or a mobile format (see MOBILE_FORMATS)
+        audio: File name for an audio player to add (mobile pages have none)
+    """
+    word = SYNC_WORD_CLASS[mode]
+    css = SYNC_CSS["desktop" if mode == "desktop" else "mobile"].format(word=word)
+    player = f'<audio class="il-player" controls preload="metadata" src="{esc(audio)}"></audio>\n' if audio else ""
+    script = SYNC_JS % {"starts": json.dumps(sync["starts"]), "first": json.dumps(sync["first"]),
+                        "end": json.dumps(sync["end"]), "word": word}
+    return f"{player}<style>\n{css}\n</style>\n<script>{script}</script>\n"
+
+def with_sync(fragments, sync, mode="desktop", audio=None):
+    """
+    Insert the sync_html() block before </body> of a streamed document.
+    
+    Text fragments are escaped and never contain "</body>", so only the
+    document tail matches.
+    """
+    if not sync:
+        yield from fragments
+        return
+    block = sync_html(sync, mode, audio)
+    for fragment in fragments:
+        if "</body>" in fragment:
+            fragment = fragment.replace("</body>", block + "</body>", 1)
+        yield fragment
 
 # =============================================================================
 # EXPORT FUNCTIONS - Original (preserved)
@@ -244,27 +664,20 @@ def generate_basic(folder, title, orig, trans, fs=12, vd=10):
     Generate basic interlinear HTML for desktop viewing.
     (Original function preserved)
     """
-    html = HTML_HEADER.format(title=esc(title), fs=fs, vd=vd)
-    html += render_words(orig, trans, vd)
-    html += HTML_FOOTER
     path = os.path.join(folder, f"{title}_interlinear.html")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(html)
-    return path
+    return write_html(path, iter_desktop_html(title, orig, trans, fs, vd))
 
-def generate_with_audio(folder, title, orig, trans, audio, fs=12, vd=10):
+def generate_with_audio(folder, title, orig, trans, audio, fs=12, vd=10, sync=None):
     """
     Generate interlinear HTML with embedded audio player.
     (Original function preserved)
+    
+    With sync (timing.load_sync() data) the group being spoken is
+    highlighted during playback and clicking a word seeks to its group.
     """
-    html = HTML_HEADER.format(title=esc(title), fs=fs, vd=vd)
-    html += f"<div class='audio'><audio controls src='{os.path.basename(audio)}'></audio></div>"
-    html += render_words(orig, trans, vd)
-    html += HTML_FOOTER
+    player = f"<div class='audio'><audio controls src='{os.path.basename(audio)}'></audio></div>"
     path = os.path.join(folder, f"{title}_interlinear_audio.html")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(html)
-    return path
+    return write_html(path, with_sync(iter_desktop_html(title, orig, trans, fs, vd, player), sync))
 
 def generate_with_youtube(folder, title, orig, trans, url, fs=12, vd=10):
     """
@@ -272,23 +685,148 @@ def generate_with_youtube(folder, title, orig, trans, url, fs=12, vd=10):
     (Original function preserved)
     """
     qr_path = os.path.join(folder, f"{title}_youtube_qr.png")
-    qrcode.make(url).save(qr_path)
-
-    html = HTML_HEADER.format(title=esc(title), fs=fs, vd=vd)
-    html += f"<div class='qr'><p>{esc(url)}</p><img src='{os.path.basename(qr_path)}'></div>"
-    html += render_words(orig, trans, vd)
-    html += HTML_FOOTER
+    _save_qr(url, qr_path)
 
+    qr = f"<div class='qr'><p>{esc(url)}</p><img src='{os.path.basename(qr_path)}'></div>"
     path = os.path.join(folder, f"{title}_interlinear_youtube.html")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(html)
+    return write_html(path, iter_desktop_html(title, orig, trans, fs, vd, qr))
+
+# =============================================================================
+# MULTI-FORMAT EXPORT - Render once, write all variants
+# =============================================================================
+
+DESKTOP_VARIANTS = ("basic", "audio", "youtube")
+
+# Bump when the generated markup changes, so manifests treat old exports as stale
+EXPORT_FORMAT_VERSION = 1
+
+# Digest of everything besides the inputs that shapes the output files
+TEMPLATE_DIGEST = inputs_digest(version=EXPORT_FORMAT_VERSION, header=HTML_HEADER,
+                                footer=HTML_FOOTER, mobile=MOBILE_HTML_TEMPLATE)
+
+def export_variants(folder, title, orig, trans, variants, audio=None, url=None,
+                    source_lang="en", fs=12, vd=10, max_workers=4, force=False,
+                    mobile_mode="standard", sync=None):
+    """
+    Export several HTML variants from a single rendering of the text.
+    
+    The desktop body (shared by basic, audio and youtube) and the mobile body
+    are each rendered once; the files and the YouTube QR code are then
+    written concurrently in a thread pool. Output is identical to calling
+    generate_basic/generate_with_audio/generate_with_youtube/
+    generate_mobile_app_html one by one.
+    
+    Artifacts whose inputs are unchanged since the last export (according to
+    the manifest in the folder) are skipped unless force is set.
+    
+    Args:
+        folder: Output directory
+        title: Project title
+        orig, trans: Word lines
+        variants: Iterable of "basic", "audio", "youtube", "mobile"
+        audio: Audio file path (required for "audio")
+        url: YouTube URL (for "youtube")
+        source_lang: Language code for the mobile HTML
+        fs, vd: Desktop font size and vertical distance
+        force: Rebuild every artifact
+        mobile_mode: Format of the mobile HTML (see MOBILE_FORMATS)
+        sync: timing.load_sync() data; "audio" and "mobile" (which gets its
+              own player for audio) then highlight the group being spoken
+    
+    Returns:
+        (dict mapping each variant to the path of its file,
+         list of variants that were unchanged and skipped)
+    
+    Raises:
+        ValueError: For an unknown variant, or "audio" without an audio file
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    variants = list(variants)
+    if "audio" in variants and not audio:
+        raise ValueError("The audio variant needs an audio file")
+    
+    manifest = ExportManifest(folder)
+    text = lines_digest(orig, trans)
+    desktop = dict(text=text, title=title, fs=fs, vd=vd, templates=TEMPLATE_DIGEST)
+    
+    # (artifact, path, input digest, header extra) for every requested file
+    plan = []
+    for variant in variants:
+        if variant == "basic":
+            path = os.path.join(folder, f"{title}_interlinear.html")
+            plan.append((variant, path, inputs_digest(kind=variant, **desktop), ""))
+        elif variant == "audio":
+            player = f"<div class='audio'><audio controls src='{os.path.basename(audio)}'></audio></div>"
+            path = os.path.join(folder, f"{title}_interlinear_audio.html")
+            digest = inputs_digest(kind=variant, audio=os.path.basename(audio),
+                                   audio_stamp=file_stamp(audio), sync=sync, **desktop)
+            plan.append((variant, path, digest, player))
+        elif variant == "youtube":
+            qr_path = os.path.join(folder, f"{title}_youtube_qr.png")
+            plan.append(("qr", qr_path, inputs_digest(kind="qr", url=url), None))
+            qr = f"<div class='qr'><p>{esc(url)}</p><img src='{os.path.basename(qr_path)}'></div>"
+            path = os.path.join(folder, f"{title}_interlinear_youtube.html")
+            plan.append((variant, path, inputs_digest(kind=variant, url=url, **desktop), qr))
+        elif variant == "mobile":
+            path = os.path.join(folder, "interlinear.html")
+            digest = inputs_digest(kind=variant, text=text, title=title, lang=source_lang,
+                                   mode=mobile_mode, sync=sync, audio=audio and os.path.basename(audio),
+                                   templates=TEMPLATE_DIGEST)
+            plan.append((variant, path, digest, None))
+        else:
+            raise ValueError(f"Unknown export variant: {variant}")
+    
+    todo = [p for p in plan if force or not manifest.is_current(p[1], p[2])]
+    skipped = [p[0] for p in plan if p not in todo and p[0] != "qr"]
+    
+    desktop_body = None
+    mobile_body = None
+    if any(p[0] in DESKTOP_VARIANTS for p in todo):
+        with trace.span("render_desktop", words=len(orig)):
+            desktop_body = render_words(orig, trans, vd)
+        trace.count("words_rendered", len(orig))
+    if mobile_mode == "standard" and any(p[0] == "mobile" for p in todo):
+        with trace.span("render_mobile", words=len(orig)):
+            mobile_body = render_mobile_content(orig, trans)
+        trace.count("words_rendered", len(orig))
+    
+    jobs = []
+    with trace.span("export_variants", files=len(todo)), ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for artifact, path, digest, extra in todo:
+            if artifact == "qr":
+                job = pool.submit(_save_qr, url, path)
+            elif artifact == "mobile":
+                page = iter_mobile_format(title, orig, trans, source_lang, mobile_mode, body=mobile_body)
+                player = audio and os.path.basename(audio)
+                job = pool.submit(write_html, path, with_sync(page, player and sync, mobile_mode, player))
+            else:
+                page = iter_desktop_html(title, orig, trans, fs, vd, extra, body=desktop_body)
+                job = pool.submit(write_html, path, with_sync(page, sync) if artifact == "audio" else page)
+            jobs.append((job, path, digest))
+    
+    for job, path, digest in jobs:
+        job.result()
+        manifest.update(path, digest)
+    if jobs:
+        manifest.save()
+    
+    paths = {artifact: path for artifact, path, _, _ in plan if artifact != "qr"}
+    return paths, skipped
+
+def _save_qr(url, path):
+    """Render a QR code PNG for url."""
+    import qrcode
+    with trace.span("qr_code"):
+        qrcode.make(url).save(path)
     return path
 
 # =============================================================================
 # NEW EXPORT FUNCTIONS - For Android Interlinear Language Learning App
 # =============================================================================
 
-def generate_mobile_app_html(folder, title, orig, trans, source_lang="en", target_lang="de"):
+def generate_mobile_app_html(folder, title, orig, trans, source_lang="en", target_lang="de",
+                             mode="standard", sync=None, audio=None):
     """
     Generate mobile-optimized interlinear HTML for the Android app.
     
@@ -306,28 +844,65 @@ def generate_mobile_app_html(folder, title, orig, trans, source_lang="en", targe
         trans: List of translations (matching orig)
         source_lang: Source language code (e.g., 'de' for German)
         target_lang: Target language code (e.g., 'en' for English)
+        mode: "standard", or "lazy" for long texts: the word pairs are
+              embedded as data and rendered chunk by chunk while scrolling
+        sync: timing.load_sync() data to highlight the group being spoken
+        audio: Audio file name for the player (required for sync)
     
     Returns:
         Path to the created HTML file
     """
-    content = render_mobile_content(orig, trans)
-    
-    html = MOBILE_HTML_TEMPLATE.format(
-        title=esc(title),
-        lang=source_lang,
-        content=content
-    )
-    
     # Save as interlinear.html (the filename expected by the app)
     path = os.path.join(folder, "interlinear.html")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(html)
-    
-    return path
+    return write_html(path, with_sync(iter_mobile_format(title, orig, trans, source_lang, mode),
+                                      audio and sync, mode, audio))
+
+# Timestamp of every package entry (the earliest date a ZIP file can hold)
+PACKAGE_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Media formats that are compressed already and are stored without deflate
+STORED_EXTENSIONS = (".mp3", ".mp4", ".m4a", ".ogg", ".png", ".jpg", ".jpeg")
+
+# Bytes per read when copying audio into a package
+PACKAGE_COPY_CHUNK = 1024 * 1024
+
+def _package_entry(name):
+    """
+    Return the ZipInfo for a package entry: fixed timestamp and permissions,
+    deflated unless the format is compressed already.
+    """
+    import zipfile
+    info = zipfile.ZipInfo(name, date_time=PACKAGE_DATE_TIME)
+    info.external_attr = 0o644 << 16
+    if name.lower().endswith(STORED_EXTENSIONS):
+        info.compress_type = zipfile.ZIP_STORED
+    else:
+        info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+def app_package_path(folder, title):
+    """
+    Return the path of the app package ZIP of a project.
+    """
+    safe_title = "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in title)
+    return os.path.join(folder, f"{safe_title}_for_app.zip")
+
+def app_package_digest(title, orig, trans, source_lang, target_lang, native_lang="English",
+                       audio_path=None, author=None, source=None, description=None,
+                       mobile_mode="standard", sync=None):
+    """
+    Return the manifest digest of everything that goes into an app package.
+    """
+    return inputs_digest(kind="app_package", text=lines_digest(orig, trans), title=title,
+                         source_lang=source_lang, target_lang=target_lang, native_lang=native_lang,
+                         author=author, source=source, description=description,
+                         audio_stamp=file_stamp(audio_path), mobile_mode=mobile_mode,
+                         sync=sync, templates=TEMPLATE_DIGEST)
 
 def generate_app_package(folder, title, orig, trans, source_lang, target_lang, 
                          native_lang="English", audio_path=None, author=None, 
-                         source=None, description=None):
+                         source=None, description=None, force=False, mobile_mode="standard",
+                         sync=None):
     """
     Generate a complete package ready for import into the Android app.
     
@@ -348,19 +923,27 @@ def generate_app_package(folder, title, orig, trans, source_lang, target_lang,
         author: Optional author name
         source: Optional source attribution
         description: Optional project description
+        force: Rebuild even if the inputs are unchanged since the last package
+        mobile_mode: Format of interlinear.html (see MOBILE_FORMATS)
+        sync: timing.load_sync() data; with audio, interlinear.html then
+              highlights the group being spoken
     
     Returns:
         Path to the created ZIP file
     """
-    # Create a temporary folder for the package contents
-    safe_title = "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in title)
-    package_folder = os.path.join(folder, f"{safe_title}_app_package")
-    os.makedirs(package_folder, exist_ok=True)
+    zip_path = app_package_path(folder, title)
+    
+    # Skip the rebuild if nothing that goes into the package has changed
+    manifest = ExportManifest(folder)
+    digest = app_package_digest(title, orig, trans, source_lang, target_lang, native_lang,
+                                audio_path, author, source, description, mobile_mode, sync)
+    if not force and manifest.is_current(zip_path, digest):
+        return zip_path
     
-    # 1. Generate mobile-optimized HTML
-    generate_mobile_app_html(package_folder, title, orig, trans, target_lang, target_lang)
+    import shutil
+    import zipfile
+    import yaml
     
-    # 2. Create project.yaml
     project_data = {
         'project_name': title,
         'target_language': source_lang,
@@ -373,25 +956,32 @@ def generate_app_package(folder, title, orig, trans, source_lang, target_lang,
     if description:
         project_data['description'] = description
     
-    yaml_path = os.path.join(package_folder, "project.yaml")
-    with open(yaml_path, "w", encoding="utf-8") as f:
-        yaml.dump(project_data, f, allow_unicode=True, default_flow_style=False)
-    
-    # 3. Copy audio file if provided
-    if audio_path and os.path.exists(audio_path):
-        audio_dest = os.path.join(package_folder, "audio.mp3")
-        shutil.copy2(audio_path, audio_dest)
-    
-    # 4. Create ZIP file
-    zip_path = os.path.join(folder, f"{safe_title}_for_app.zip")
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(package_folder):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, package_folder)
-                zipf.write(file_path, arcname)
-    
-    # 5. Clean up temporary folder (optional - keep for inspection)
-    # shutil.rmtree(package_folder)
+    # Entries are written straight into the ZIP in a fixed order and with
+    # fixed timestamps, so the same inputs always give the same file. The
+    # ZIP is built in a temporary file of its own (see atomic_file()).
+    with atomic_file(zip_path, "wb") as out, trace.span("app_package", title=title), \
+         zipfile.ZipFile(out, "w") as zipf:
+        # 1. Mobile-optimized HTML, streamed as it is rendered
+        with trace.span("package_html", words=len(orig)), \
+             io.TextIOWrapper(zipf.open(_package_entry("interlinear.html"), "w"), encoding="utf-8") as f:
+            has_audio = bool(audio_path and os.path.exists(audio_path))
+            page = iter_mobile_format(title, orig, trans, target_lang, mobile_mode)
+            f.writelines(with_sync(page, sync if has_audio else None, mobile_mode, "audio.mp3"))
+        trace.count("words_rendered", len(orig))
+        
+        # 2. project.yaml
+        zipf.writestr(_package_entry("project.yaml"),
+                      yaml.dump(project_data, allow_unicode=True, default_flow_style=False))
+        
+        # 3. Audio file, copied in chunks (already compressed, so stored as is)
+        if audio_path and os.path.exists(audio_path):
+            large = os.path.getsize(audio_path) >= zipfile.ZIP64_LIMIT
+            with trace.span("package_audio"), open(audio_path, "rb") as src, \
+                 zipf.open(_package_entry("audio.mp3"), "w", force_zip64=large) as dst:
+                shutil.copyfileobj(src, dst, PACKAGE_COPY_CHUNK)
+    if trace.enabled():
+        trace.count("bytes_written", os.path.getsize(zip_path))
     
+    manifest.update(zip_path, digest)
+    manifest.save()
     return zip_path
@@ -0,0 +1,99 @@
+"""
+Export Manifest for Interlinear Text Creator
+
+Remembers a hash of the inputs of every exported artifact, so that
+unchanged artifacts can be skipped on the next export.
+
+The manifest is a small JSON file in the project folder:
+    {"Title_interlinear.html": "<input digest>", ...}
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+MANIFEST_FILENAME = ".export_manifest.json"
+
+# Serializes save() of manifests used from several threads (pipeline stages)
+_save_lock = threading.Lock()
+
+
+def lines_digest(orig, trans):
+    """
+    Return a digest of the word lines of both texts.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update("\n".join(orig).encode("utf-8"))
+    h.update(b"\0")
+    h.update("\n".join(trans).encode("utf-8"))
+    return h.hexdigest()
+
+
+def file_stamp(path):
+    """
+    Return (mtime, size) of a file, or None if it does not exist.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return [st.st_mtime, st.st_size]
+
+
+def inputs_digest(**inputs):
+    """
+    Return a digest of all inputs of an artifact (JSON-serializable values).
+    """
+    data = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ExportManifest:
+    """
+    Input digests of the artifacts exported into one folder.
+    """
+
+    def __init__(self, folder, filename=MANIFEST_FILENAME):
+        self.folder = folder
+        self.path = os.path.join(folder, filename)
+        self.entries = self._load()
+        self._updated = {}
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def is_current(self, artifact_path, digest):
+        """
+        True if the artifact exists and was built from inputs with this digest.
+        """
+        name = os.path.basename(artifact_path)
+        return self.entries.get(name) == digest and os.path.exists(artifact_path)
+
+    def update(self, artifact_path, digest):
+        """
+        Record the input digest of a freshly built artifact.
+        """
+        self.entries[os.path.basename(artifact_path)] = digest
+        self._updated[os.path.basename(artifact_path)] = digest
+
+    def save(self):
+        """
+        Write the manifest (atomically, via a temporary file).
+
+        Entries recorded by other manifests of the same folder since this
+        one was loaded are kept; only this manifest's updates are applied.
+        """
+        with _save_lock:
+            self.entries = self._load()
+            self.entries.update(self._updated)
+            tmp = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+        return self.path
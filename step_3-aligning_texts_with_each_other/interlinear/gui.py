@@ -6,46 +6,37 @@ Works on Linux Mint Debian Edition and other Linux distributions.
 """
 
 import os
+import time
+import threading
+from functools import partial
+from queue import Queue, Empty
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from .dictionary import load_dictionary, save_dictionary, merge_from_lines
-from .project_io import save_text_file, save_project_json, load_text_file, load_project_json
+from .project_io import load_project, load_project_dictionary, find_audio, dictionary_path, text_lines, SAVE_PARTS
+from .languages import LANG_SOURCE, LANG_TARGET, LANG_DISPLAY_NAMES
+from .timing import load_sync, GROUPS_FILENAME, TIMESTAMPS_FILENAME
+from .journal import EditJournal, text_digest
+from .saver import SaveWorker, artifact_hash
+from .alignment import AlignmentTracker, align_sentences, apply_alignment
+from .diagnostics import report_project
 from .exporter.html_export import (
-    generate_basic, 
-    generate_with_audio, 
-    generate_with_youtube,
-    generate_mobile_app_html,
-    generate_app_package
+    generate_app_package,
+    export_variants,
+    mobile_size_report,
+    MOBILE_FORMATS
 )
 
-# Available languages
-LANG_SOURCE = [
-    "German-DE", "Swissgerman-CHDE", "English-EN", "Spanish-ES",
-    "French-FR", "Italian-IT", "Portuguese-PT", "Russian-RU",
-    "Ukrainian-UA", "Turkish-TR", "Kurdish-KU", "Persian-FA"
-]
+# How often buffered journal records are flushed to disk (milliseconds)
+JOURNAL_FLUSH_MS = 1000
 
-LANG_TARGET = [
-    "English-EN", "German-DE", "French-FR", "Spanish-ES",
-    "Italian-IT", "Portuguese-PT", "Russian-RU", "Ukrainian-UA",
-    "Turkish-TR", "Kurdish-KU", "Persian-FA"
-]
+# How often the background save worker is checked for finished saves (milliseconds)
+SAVE_POLL_MS = 200
 
-# Language display names for the app
-LANG_DISPLAY_NAMES = {
-    "German-DE": "German",
-    "Swissgerman-CHDE": "Swiss German",
-    "English-EN": "English",
-    "Spanish-ES": "Spanish",
-    "French-FR": "French",
-    "Italian-IT": "Italian",
-    "Portuguese-PT": "Portuguese",
-    "Russian-RU": "Russian",
-    "Ukrainian-UA": "Ukrainian",
-    "Turkish-TR": "Turkish",
-    "Kurdish-KU": "Kurdish",
-    "Persian-FA": "Persian"
-}
+# Default autosave interval in seconds (0 = autosave off)
+AUTOSAVE_SECONDS = 0
+
+# Auto-aligned sentences below this confidence are reported for review
+LOW_CONFIDENCE = 0.5
 
 
 class InterlinearApp(tk.Tk):
@@ -58,7 +49,24 @@ class InterlinearApp(tk.Tk):
         self.title("Interlinear Text Creator v5 (with Android App Export)")
         self.geometry("1200x800")
         self.project_folder = ""
+        self.journal = None
+        self.tracker = AlignmentTracker()
+        self._suspend_edits = False
+        self._align_refresh = None
+        self.translation_table = None
+        self.library_root = None
+        self.saver = SaveWorker()
+        # Hashes of the artifacts as last saved (see save())
+        self._saved = {}
+        self._save_failed = False
         self._build()
+        self._watch_edits(self.orig, "orig")
+        self._watch_edits(self.tran, "tran")
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.after(JOURNAL_FLUSH_MS, self._flush_journal)
+        self.after(SAVE_POLL_MS, self._poll_saves)
+        self.after(1000, self._autosave)
+        self._schedule_align_refresh()
     
     def _build(self):
         """Build the GUI components."""
@@ -89,6 +97,12 @@ class InterlinearApp(tk.Tk):
         self.tgt.pack(side="left", padx=5)
         self.tgt.set(LANG_TARGET[0])  # Default: English
         
+        # "lazy" renders long texts chunk by chunk in the app
+        tk.Label(lang, text="Mobile format:").pack(side="left")
+        self.mobile_mode = ttk.Combobox(lang, values=MOBILE_FORMATS, state="readonly", width=10)
+        self.mobile_mode.pack(side="left", padx=5)
+        self.mobile_mode.set(MOBILE_FORMATS[0])
+        
         # Metadata frame
         meta = tk.Frame(self)
         meta.pack(fill="x", pady=5, padx=10)
@@ -110,7 +124,12 @@ class InterlinearApp(tk.Tk):
         btn.pack(fill="x", pady=5, padx=10)
         
         tk.Button(btn, text="📂 Open Project", command=self.open_project).pack(side="left", padx=2)
+        tk.Button(btn, text="📚 Library", command=self.open_library).pack(side="left", padx=2)
+        tk.Button(btn, text="🔎 Search Corpus", command=self.open_search).pack(side="left", padx=2)
         tk.Button(btn, text="💾 Save Project", command=self.save).pack(side="left", padx=2)
+        tk.Button(btn, text="⚖ Auto-Align", command=self.auto_align).pack(side="left", padx=2)
+        tk.Button(btn, text="🔍 Check Alignment", command=self.check_alignment).pack(side="left", padx=2)
+        tk.Button(btn, text="💡 Suggest", command=self.suggest_translations).pack(side="left", padx=2)
         
         ttk.Separator(btn, orient="vertical").pack(side="left", padx=10, fill="y")
         
@@ -124,6 +143,16 @@ class InterlinearApp(tk.Tk):
         self.audio = tk.BooleanVar()
         tk.Checkbutton(btn, text="Audio available", variable=self.audio).pack(side="left", padx=10)
         
+        # Exports skip files whose inputs are unchanged unless this is set
+        self.force_export = tk.BooleanVar()
+        tk.Checkbutton(btn, text="Rebuild all", variable=self.force_export).pack(side="left")
+        
+        # Autosave interval in seconds, 0 = off
+        self.autosave_seconds = tk.IntVar(value=AUTOSAVE_SECONDS)
+        tk.Label(btn, text="Autosave (s):").pack(side="left", padx=(10, 0))
+        tk.Spinbox(btn, from_=0, to=3600, increment=30, width=5,
+                   textvariable=self.autosave_seconds).pack(side="left")
+        
         # Text editing area with labels
         text_frame = tk.Frame(self)
         text_frame.pack(expand=True, fill="both", padx=10, pady=5)
@@ -144,77 +173,295 @@ class InterlinearApp(tk.Tk):
         self.tran = tk.Text(right_frame, wrap="none", font=("Consolas", 11))
         self.tran.pack(expand=True, fill="both")
         
+        # Marker for the first line where both panes disagree
+        for widget in (self.orig, self.tran):
+            widget.tag_configure("mismatch", background="#ffd6d6")
+        
         # Status bar
-        self.status = tk.Label(self, text="Ready - Select a project folder to begin", 
+        status_bar = tk.Frame(self)
+        status_bar.pack(fill="x", side="bottom")
+        self.align_status = tk.Label(status_bar, text="", bd=1, relief="sunken", anchor="e")
+        self.align_status.pack(side="right")
+        self.status = tk.Label(status_bar, text="Ready - Select a project folder to begin", 
                                 bd=1, relief="sunken", anchor="w")
-        self.status.pack(fill="x", side="bottom")
+        self.status.pack(fill="x", side="left", expand=True)
     
     def set_status(self, msg):
         """Update status bar message."""
         self.status.config(text=msg)
         self.update_idletasks()
     
-    def open_project(self):
-        """Open an existing project folder."""
-        folder = filedialog.askdirectory(title="Select Project Folder")
+    # -------------------------------------------------------------------------
+    # Edit tracking
+    # -------------------------------------------------------------------------
+    
+    def _watch_edits(self, widget, pane):
+        """
+        Route insert/delete/replace on a Text widget through _on_text_edit.
+        
+        The widget's Tcl command is renamed and replaced by a proxy, so every
+        modification (typing, paste, cut, programmatic changes) is seen here.
+        """
+        real = widget._w + "_real"
+        self.tk.call("rename", widget._w, real)
+        self.tk.createcommand(widget._w, lambda *args: self._text_proxy(pane, real, *args))
+    
+    def _text_proxy(self, pane, real, *args):
+        """Forward a Text widget command and report which lines it changed."""
+        if self._suspend_edits or not args or args[0] not in ("insert", "delete", "replace"):
+            return self.tk.call((real,) + args)
+        
+        def line_of(index):
+            return int(str(self.tk.call(real, "index", index)).split(".")[0])
+        
+        op = args[0]
+        if op == "insert":
+            indices = [args[1]]
+        elif op == "replace":
+            indices = [args[1], args[2]]
+        else:
+            indices = list(args[1:])
+            if len(indices) % 2:
+                # A single index deletes one character, possibly a newline
+                indices.append(f"{indices[-1]} +1c")
+        
+        last = line_of("end-1c")
+        touched = [min(line_of(i), last) for i in indices]
+        start, end = min(touched), max(touched)
+        
+        result = self.tk.call((real,) + args)
+        
+        new_end = end + line_of("end-1c") - last
+        text = str(self.tk.call(real, "get", f"{start}.0", f"{new_end}.end"))
+        self._on_text_edit(pane, start - 1, end, text.split("\n"))
+        return result
+    
+    def _on_text_edit(self, pane, start, end, lines):
+        """Called after lines[start:end] of a pane were replaced by lines."""
+        if self.journal is not None:
+            self.journal.record(pane, start, end, lines)
+        self.tracker.replace_lines(pane, start, end, lines)
+        self._schedule_align_refresh()
+    
+    def _set_pane_text(self, widget, text):
+        """Replace a pane's content without journaling the change."""
+        self._suspend_edits = True
+        try:
+            widget.delete("1.0", tk.END)
+            widget.insert("1.0", text)
+            widget.edit_modified(False)
+        finally:
+            self._suspend_edits = False
+        self.tracker.reset("orig" if widget is self.orig else "tran", text.split("\n"))
+        self._schedule_align_refresh()
+    
+    def _pane_lines(self, widget):
+        """Return a pane's content as a list of lines."""
+        return text_lines(widget.get("1.0", "end-1c"))
+    
+    # -------------------------------------------------------------------------
+    # Alignment status
+    # -------------------------------------------------------------------------
+    
+    def _schedule_align_refresh(self):
+        """Refresh the alignment status once the current burst of edits is done."""
+        if self._align_refresh is None:
+            self._align_refresh = self.after_idle(self._refresh_alignment)
+    
+    def _refresh_alignment(self):
+        """Show counts and mark the first mismatching line in both panes."""
+        self._align_refresh = None
+        t = self.tracker
+        text = (f"Words: {t.words['orig']} / {t.words['tran']}   "
+                f"Sentences: {t.sentences['orig']} / {t.sentences['tran']}   ")
+        
+        for widget in (self.orig, self.tran):
+            widget.tag_remove("mismatch", "1.0", tk.END)
+        line = t.first_mismatch()
+        if line is None:
+            text += "✓ Aligned"
+        else:
+            text += f"⚠ First mismatch: sentence {t.sentence_of('orig', line)} (line {line + 1})"
+            for widget in (self.orig, self.tran):
+                widget.tag_add("mismatch", f"{line + 1}.0", f"{line + 2}.0")
+        self.align_status.config(text=text)
+    
+    # -------------------------------------------------------------------------
+    # Edit journal
+    # -------------------------------------------------------------------------
+    
+    def _start_journal(self, source_text, target_text):
+        """
+        Open the project's edit journal and replay unsaved edits.
+        
+        Returns the number of recovered edits.
+        """
+        self.journal = EditJournal(self.project_folder)
+        source_lines, target_lines, recovered = self.journal.replay(source_text, target_text)
+        
+        for pane, lines in (("orig", source_lines), ("tran", target_lines)):
+            widget = getattr(self, pane)
+            current = self._pane_lines(widget)
+            if recovered:
+                self._set_pane_text(widget, "\n".join(lines))
+                widget.edit_modified(True)
+            elif current != lines:
+                # Pane keeps text that is not on disk yet - journal it as a whole
+                self.journal.record(pane, 0, len(lines), current)
+                widget.edit_modified(True)
+        self.journal.flush()
+        return recovered
+    
+    def _flush_journal(self):
+        """Periodically hand buffered journal records to the journal's writer thread."""
+        if self.journal is not None:
+            self.journal.flush()
+        self.after(JOURNAL_FLUSH_MS, self._flush_journal)
+    
+    def _poll_saves(self):
+        """Report saves finished by the background worker."""
+        for result in self.saver.poll():
+            if result["error"] is not None:
+                # Write everything on the next save
+                self._save_failed = True
+                self.set_status(f"Saving failed: {result['error']}")
+                messagebox.showerror("Save Error",
+                    f"The project could not be saved to {result['folder']}:\n{result['error']}")
+                continue
+            tokens = result["tokens"]
+            if result["folder"] == self.project_folder:
+                for token in tokens:
+                    self._saved.update(token["hashes"], folder=result["folder"])
+                    if token["full"]:
+                        self._save_failed = False
+            merged = f", {len(tokens)} save requests merged" if len(tokens) > 1 else ""
+            prefix = "Autosaved" if all(t["autosave"] for t in tokens) else "Project saved"
+            self.set_status(f"{prefix} to: {result['folder']} - {', '.join(sorted(result['parts']))} "
+                            f"({result['seconds']:.2f} s{merged})")
+        self.after(SAVE_POLL_MS, self._poll_saves)
+    
+    def _on_close(self):
+        """Finish a running save and flush the journal before the window is closed."""
+        if self.saver.busy:
+            self.set_status("Finishing save...")
+        # Also compacts the journal after the last save
+        self.saver.close()
+        if self.journal is not None:
+            self.journal.close()
+        self.destroy()
+    
+    # -------------------------------------------------------------------------
+    # Project actions
+    # -------------------------------------------------------------------------
+    
+    def open_project(self, folder=None):
+        """Open an existing project folder (asks for one if not given)."""
+        if folder is None:
+            folder = filedialog.askdirectory(title="Select Project Folder")
         if not folder:
             return
         
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
         self.project_folder = folder
         
-        # Try to load existing files
-        source_text = load_text_file(folder, "source.txt")
-        target_text = load_text_file(folder, "target.txt")
+        # Load the texts and metadata (project container or loose files)
+        try:
+            data, source_text, target_text = load_project(folder)
+        except Exception as e:
+            messagebox.showwarning("Open Project", f"The project files could not be read:\n{e}")
+            data, source_text, target_text = {}, "", ""
         
         if source_text:
-            self.orig.delete("1.0", tk.END)
-            self.orig.insert("1.0", source_text)
+            self._set_pane_text(self.orig, "\n".join(text_lines(source_text)))
         
         if target_text:
-            self.tran.delete("1.0", tk.END)
-            self.tran.insert("1.0", target_text)
-        
-        # Try to load project metadata
-        for f in os.listdir(folder):
-            if f.endswith(".project.json"):
-                try:
-                    data = load_project_json(os.path.join(folder, f))
-                    if "title" in data:
-                        self.title_entry.delete(0, tk.END)
-                        self.title_entry.insert(0, data["title"])
-                    if "youtube_url" in data:
-                        self.yt_entry.delete(0, tk.END)
-                        self.yt_entry.insert(0, data.get("youtube_url", ""))
-                    if "source_language" in data:
-                        self.src.set(data["source_language"])
-                    if "target_language" in data:
-                        self.tgt.set(data["target_language"])
-                    if "audio" in data:
-                        self.audio.set(data["audio"])
-                except:
-                    pass
-                break
-        
-        self.set_status(f"Opened project: {folder}")
-    
-    def save(self):
-        """Save the current project."""
-        if not self.project_folder:
-            self.project_folder = filedialog.askdirectory(title="Select Project Folder")
-            if not self.project_folder:
-                return
-        
-        title = self.title_entry.get().strip() or "Project"
-        orig = self.orig.get("1.0", tk.END).splitlines()
-        tran = self.tran.get("1.0", tk.END).splitlines()
+            self._set_pane_text(self.tran, "\n".join(text_lines(target_text)))
+        
+        if "title" in data:
+            self.title_entry.delete(0, tk.END)
+            self.title_entry.insert(0, data["title"])
+        if "youtube_url" in data:
+            self.yt_entry.delete(0, tk.END)
+            self.yt_entry.insert(0, data.get("youtube_url", ""))
+        if "source_language" in data:
+            self.src.set(data["source_language"])
+        if "target_language" in data:
+            self.tgt.set(data["target_language"])
+        if "audio" in data:
+            self.audio.set(data["audio"])
+        
+        # What is on disk now - save() only writes artifacts that differ
+        self._saved = {
+            "folder": folder,
+            "source": artifact_hash(text_lines(source_text)),
+            "target": artifact_hash(text_lines(target_text)),
+            "metadata": artifact_hash(data),
+            "dictionary": dictionary_path(folder, self._project_metadata())
+        }
+        self._save_failed = False
+        
+        recovered = self._start_journal(source_text, target_text)
+        if recovered:
+            self.set_status(f"Opened project: {folder} (recovered {recovered} unsaved edits)")
+        else:
+            self.set_status(f"Opened project: {folder}")
+    
+    def _ask_library_root(self, ask=True):
+        """Return the library folder, asking for it if not known yet (or if ask)."""
+        if self.library_root and not ask:
+            return self.library_root
+        initial = self.library_root or (os.path.dirname(self.project_folder) if self.project_folder else None)
+        root = filedialog.askdirectory(title="Select Library Folder", initialdir=initial)
+        if root:
+            self.library_root = root
+        return root
+    
+    def open_library(self):
+        """Browse the projects of a library folder."""
+        from .library import ProjectLibrary
         
-        # Save text files
-        save_text_file(self.project_folder, "source.txt", "\n".join(orig))
-        save_text_file(self.project_folder, "target.txt", "\n".join(tran))
+        root = self._ask_library_root()
+        if not root:
+            return
+        try:
+            library = ProjectLibrary(root)
+        except Exception as e:
+            messagebox.showerror("Library", f"The library catalog could not be opened:\n{e}")
+            return
+        LibraryBrowser(self, library)
+    
+    def open_search(self):
+        """Search the aligned texts of all projects in the library."""
+        from .search import CorpusIndex
         
-        # Save project metadata
-        save_project_json(self.project_folder, title, {
-            "title": title,
+        root = self._ask_library_root(ask=False)
+        if not root:
+            return
+        try:
+            index = CorpusIndex(root)
+        except Exception as e:
+            messagebox.showerror("Search", f"The search index could not be opened:\n{e}")
+            return
+        try:
+            query = self.orig.get("sel.first", "sel.last")
+        except tk.TclError:
+            query = self.orig.get("insert linestart", "insert lineend")
+        CorpusSearch(self, index, query.strip())
+    
+    def show_line(self, line):
+        """Scroll both panes to a line (0-based) and select it."""
+        for widget in (self.orig, self.tran):
+            widget.tag_remove("sel", "1.0", tk.END)
+            widget.tag_add("sel", f"{line + 1}.0", f"{line + 1}.end")
+            widget.see(f"{line + 1}.0")
+        self.orig.mark_set("insert", f"{line + 1}.0")
+    
+    def _project_metadata(self):
+        """Return the project metadata as saved in the project JSON."""
+        return {
+            "title": self.title_entry.get().strip() or "Project",
             "source_language": self.src.get(),
             "target_language": self.tgt.get(),
             "youtube_url": self.yt_entry.get(),
@@ -222,15 +469,181 @@ class InterlinearApp(tk.Tk):
             "author": self.author_entry.get(),
             "source": self.source_entry.get(),
             "description": self.desc_entry.get()
-        })
+        }
+    
+    def save(self, autosave=False):
+        """
+        Save the current project.
+        
+        Only artifacts that changed since the last save are written: the
+        panes are only read if their modified flag is set, and each artifact
+        is compared with the hash of its saved version. The dictionary is
+        only merged again if a text changed or the languages did.
+        """
+        if not self.project_folder:
+            if autosave:
+                return
+            self.project_folder = filedialog.askdirectory(title="Select Project Folder")
+            if not self.project_folder:
+                return
         
-        # Save/update dictionary
-        dict_path = os.path.join(self.project_folder, 
-                                  f"{self.src.get()}_{self.tgt.get()}.dict.txt")
-        save_dictionary(dict_path, merge_from_lines(load_dictionary(dict_path), orig, tran))
+        folder = self.project_folder
+        data = self._project_metadata()
+        full = self._save_failed or self._saved.get("folder") != folder
+        hashes = {"metadata": artifact_hash(data), "dictionary": dictionary_path(folder, data)}
+        
+        orig = tran = None
+        texts_touched = self.orig.edit_modified() or self.tran.edit_modified()
+        if full or texts_touched or hashes["dictionary"] != self._saved.get("dictionary"):
+            orig = self._pane_lines(self.orig)
+            tran = self._pane_lines(self.tran)
+            self.orig.edit_modified(False)
+            self.tran.edit_modified(False)
+            hashes["source"] = artifact_hash(orig)
+            hashes["target"] = artifact_hash(tran)
+        
+        parts = {part for part in SAVE_PARTS
+                 if part in hashes and (full or hashes[part] != self._saved.get(part))}
+        if "source" in parts or "target" in parts:
+            parts.add("dictionary")
+        if not parts:
+            if not autosave:
+                self.set_status("Nothing to save - no changes since the last save")
+            return
         
-        self.set_status(f"Project saved to: {self.project_folder}")
-        messagebox.showinfo("Saved", "Project saved successfully!")
+        # Edits journaled from now on apply to this snapshot; once it is on
+        # disk the worker compacts the journal, so older records are dropped
+        # off the GUI thread
+        digest = after = None
+        if "source" in parts or "target" in parts:
+            digest = text_digest("\n".join(orig), "\n".join(tran))
+            if self.journal is None:
+                self.journal = EditJournal(folder)
+                self.journal.reset(digest)
+            else:
+                self.journal.mark(digest)
+            after = partial(self.journal.compact, digest)
+        
+        # The changed artifacts are written by the background worker
+        token = {"digest": digest, "hashes": hashes, "full": full, "autosave": autosave}
+        self.saver.request(folder, data, orig, tran, parts, token=token, after=after)
+        self.set_status(f"Saving to: {folder} ...")
+    
+    def _autosave(self):
+        """Save changed artifacts every autosave interval."""
+        try:
+            seconds = int(self.autosave_seconds.get())
+        except (tk.TclError, ValueError):
+            seconds = 0
+        if seconds > 0 and self.project_folder and not self.saver.busy:
+            self.save(autosave=True)
+        self.after(max(seconds, 1) * 1000, self._autosave)
+    
+    def auto_align(self):
+        """Re-align both panes sentence by sentence (Gale-Church)."""
+        orig = self._pane_lines(self.orig)
+        tran = self._pane_lines(self.tran)
+        
+        beads = align_sentences(orig, tran)
+        new_orig, new_tran = apply_alignment(orig, tran, beads)
+        if new_orig == orig and new_tran == tran:
+            self.set_status("Auto-align: texts are already aligned")
+            return
+        
+        unsure = [b for b in beads if b['confidence'] < LOW_CONFIDENCE]
+        if not messagebox.askyesno("Auto-Align",
+            f"Proposed alignment: {len(beads)} sentence blocks, "
+            f"{len(unsure)} with low confidence.\n\n"
+            f"Replace the text in both panes?"):
+            return
+        
+        # Not suppressed, so the change is journaled like any other edit
+        for widget, lines in ((self.orig, new_orig), (self.tran, new_tran)):
+            widget.delete("1.0", tk.END)
+            widget.insert("1.0", "\n".join(lines))
+        
+        if unsure:
+            where = ", ".join(f"source {b['source'][0] + 1}" if b['source'] else f"target {b['target'][0] + 1}"
+                              for b in unsure[:10])
+            self.set_status(f"Auto-aligned {len(beads)} blocks - please check sentences: {where}")
+        else:
+            self.set_status(f"Auto-aligned {len(beads)} blocks")
+    
+    def check_alignment(self):
+        """Write a per-sentence word count report for the saved texts of the project."""
+        if not self.project_folder:
+            messagebox.showwarning("Warning", "Please save the project first!")
+            return
+        
+        try:
+            summary, text_path, json_path = report_project(self.project_folder)
+        except Exception as e:
+            # e.g. source.txt missing because the project was never saved
+            messagebox.showerror("Alignment Check", f"The alignment report could not be written:\n{e}")
+            return
+        
+        self.set_status(f"Alignment report written: {text_path}")
+        messagebox.showinfo("Alignment Check",
+            f"{summary['mismatches']} of {summary['sentences']} sentences "
+            f"have mismatched word counts.\n\n"
+            f"Report: {os.path.basename(text_path)}\n"
+            f"JSON: {os.path.basename(json_path)}")
+    
+    def suggest_translations(self):
+        """
+        Fill empty translation lines from the dictionary, or from the
+        statistical translation model for words the dictionary does not know.
+        """
+        if self.translation_table is None:
+            path = filedialog.askopenfilename(title="Select Translation Model",
+                                              filetypes=[("Translation model", "*.npz"), ("All files", "*.*")])
+            if not path:
+                return
+            try:
+                from .suggest import TranslationTable
+                self.translation_table = TranslationTable.load(path)
+            except ImportError:
+                messagebox.showerror("Error", "Suggestions need numpy and scipy:\npip install numpy scipy")
+                return
+        
+        dictionary = {}
+        if self.project_folder:
+            dictionary = load_project_dictionary(self.project_folder, self._project_metadata())
+        
+        orig = self._pane_lines(self.orig)
+        tran = self._pane_lines(self.tran)
+        tran += [""] * (len(orig) - len(tran))
+        filled = 0
+        for i, word in enumerate(orig):
+            word = word.strip()
+            if not word or tran[i].strip():
+                continue
+            suggestion = dictionary.get(word)
+            if suggestion is None:
+                candidates = self.translation_table.candidates(word, 1)
+                suggestion = candidates[0][0] if candidates else None
+            if suggestion:
+                tran[i] = suggestion
+                filled += 1
+        
+        if filled:
+            self.tran.delete("1.0", tk.END)
+            self.tran.insert("1.0", "\n".join(tran))
+        self.set_status(f"Suggested translations for {filled} empty lines")
+    
+    def _load_sync(self, orig):
+        """
+        Load groups.json + timestamps.txt of the project for audio sync.
+        
+        Returns None (no highlighting) if they are missing or unreadable.
+        """
+        try:
+            return load_sync(self.project_folder, orig)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            messagebox.showwarning("Audio Sync",
+                f"{GROUPS_FILENAME} / {TIMESTAMPS_FILENAME} could not be read, "
+                f"exporting without highlighting:\n{e}")
+            return None
     
     def export_desktop(self):
         """Export HTML files for desktop viewing (original functionality)."""
@@ -239,23 +652,24 @@ class InterlinearApp(tk.Tk):
             return
         
         title = self.title_entry.get().strip() or "Project"
-        orig = self.orig.get("1.0", tk.END).splitlines()
-        tran = self.tran.get("1.0", tk.END).splitlines()
+        orig = self._pane_lines(self.orig)
+        tran = self._pane_lines(self.tran)
         
-        # Generate basic HTML
-        generate_basic(self.project_folder, title, orig, tran, 12, 10)
-        
-        # Generate with audio if available
+        # Basic HTML, plus audio / YouTube QR variants if available -
+        # the text is rendered once and shared by all of them
+        variants = ["basic"]
         if self.audio.get():
-            audio_path = os.path.join(self.project_folder, f"{title}.mp3")
-            generate_with_audio(self.project_folder, title, orig, tran, audio_path, 12, 10)
-        
-        # Generate with YouTube QR if URL provided
+            variants.append("audio")
         if self.yt_entry.get().strip():
-            generate_with_youtube(self.project_folder, title, orig, tran,
-                                   self.yt_entry.get().strip(), 12, 10)
+            variants.append("youtube")
+        
+        paths, skipped = export_variants(self.project_folder, title, orig, tran, variants,
+                                         audio=os.path.join(self.project_folder, f"{title}.mp3"),
+                                         url=self.yt_entry.get().strip(), fs=12, vd=10,
+                                         force=self.force_export.get(), sync=self._load_sync(orig))
         
-        self.set_status(f"Desktop HTML exported to: {self.project_folder}")
+        self.set_status(f"Desktop HTML exported to: {self.project_folder} "
+                        f"({len(paths) - len(skipped)} written, {len(skipped)} unchanged)")
         messagebox.showinfo("Export", "Desktop HTML files created!")
     
     def export_mobile(self):
@@ -265,18 +679,25 @@ class InterlinearApp(tk.Tk):
             return
         
         title = self.title_entry.get().strip() or "Project"
-        orig = self.orig.get("1.0", tk.END).splitlines()
-        tran = self.tran.get("1.0", tk.END).splitlines()
+        orig = self._pane_lines(self.orig)
+        tran = self._pane_lines(self.tran)
         
         # Get language code for HTML
         src_lang = self.src.get().split("-")[-1].lower() if self.src.get() else "de"
         
-        path = generate_mobile_app_html(self.project_folder, title, orig, tran, src_lang)
+        paths, skipped = export_variants(self.project_folder, title, orig, tran, ["mobile"],
+                                         audio=find_audio(self.project_folder, title),
+                                         source_lang=src_lang, force=self.force_export.get(),
+                                         mobile_mode=self.mobile_mode.get(),
+                                         sync=self._load_sync(orig))
+        path = paths["mobile"]
+        size, saved = mobile_size_report(path, title, orig, tran, src_lang)
         
-        self.set_status(f"Mobile HTML exported: {path}")
+        self.set_status(f"Mobile HTML {'unchanged' if skipped else 'exported'}: {path} "
+                        f"({size:,} bytes, {saved}% smaller than standard)")
         messagebox.showinfo("Export", 
             f"Mobile-optimized HTML created!\n\n"
-            f"File: interlinear.html\n\n"
+            f"File: interlinear.html ({size:,} bytes)\n\n"
             f"This file can be imported into the\n"
             f"Interlinear Language Learning App.")
     
@@ -287,8 +708,8 @@ class InterlinearApp(tk.Tk):
             return
         
         title = self.title_entry.get().strip() or "Project"
-        orig = self.orig.get("1.0", tk.END).splitlines()
-        tran = self.tran.get("1.0", tk.END).splitlines()
+        orig = self._pane_lines(self.orig)
+        tran = self._pane_lines(self.tran)
         
         # Get language names for app
         src_lang_code = self.src.get()
@@ -298,18 +719,7 @@ class InterlinearApp(tk.Tk):
         lang_code = src_lang_code.split("-")[-1].lower() if src_lang_code else "de"
         
         # Check for audio file
-        audio_path = None
-        for ext in [".mp3", ".MP3"]:
-            potential_path = os.path.join(self.project_folder, f"{title}{ext}")
-            if os.path.exists(potential_path):
-                audio_path = potential_path
-                break
-        
-        # Also check for audio.mp3
-        if not audio_path:
-            potential_path = os.path.join(self.project_folder, "audio.mp3")
-            if os.path.exists(potential_path):
-                audio_path = potential_path
+        audio_path = find_audio(self.project_folder, title)
         
         zip_path = generate_app_package(
             folder=self.project_folder,
@@ -322,7 +732,10 @@ class InterlinearApp(tk.Tk):
             audio_path=audio_path,
             author=self.author_entry.get().strip() or None,
             source=self.source_entry.get().strip() or None,
-            description=self.desc_entry.get().strip() or None
+            description=self.desc_entry.get().strip() or None,
+            force=self.force_export.get(),
+            mobile_mode=self.mobile_mode.get(),
+            sync=self._load_sync(orig)
         )
         
         self.set_status(f"App package created: {zip_path}")
@@ -334,6 +747,272 @@ class InterlinearApp(tk.Tk):
             f"on your Android device.")
 
 
+class LibraryBrowser(tk.Toplevel):
+    """
+    Window listing the projects of a library from its catalog.
+    
+    The list comes from the catalog database, so it appears at once; a
+    rescan runs in the background and refreshes the list when it is done.
+    Double-click a project to open it.
+    """
+    
+    COLUMNS = (
+        ("title", "Title", 280),
+        ("source_language", "Language", 160),
+        ("author", "Author", 120),
+        ("words", "Words", 70),
+        ("translated", "Translated", 80),
+        ("modified", "Modified", 130),
+    )
+    
+    # Delay between typing in the filter and updating the list (milliseconds)
+    FILTER_DELAY_MS = 150
+    
+    def __init__(self, app, library):
+        super().__init__(app)
+        self.app = app
+        self.library = library
+        self.sort = "title"
+        self.descending = False
+        self._filter_after = None
+        self._scan_results = Queue()
+        self.title(f"Project Library - {library.root}")
+        self.geometry("900x600")
+        
+        top = tk.Frame(self)
+        top.pack(fill="x", padx=10, pady=5)
+        tk.Label(top, text="Filter:").pack(side="left")
+        self.filter_text = tk.StringVar()
+        self.filter_text.trace_add("write", lambda *_: self._schedule_refresh())
+        entry = tk.Entry(top, textvariable=self.filter_text, width=40)
+        entry.pack(side="left", padx=5)
+        tk.Button(top, text="⟳ Rescan", command=self.rescan).pack(side="left", padx=2)
+        self.info = tk.Label(top, anchor="w")
+        self.info.pack(side="left", padx=10, fill="x", expand=True)
+        
+        frame = tk.Frame(self)
+        frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.tree = ttk.Treeview(frame, columns=[c[0] for c in self.COLUMNS], show="headings")
+        for key, label, width in self.COLUMNS:
+            self.tree.heading(key, text=label, command=lambda k=key: self.sort_by(k))
+            self.tree.column(key, width=width, anchor="e" if key in ("words", "translated") else "w")
+        scroll = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scroll.pack(side="right", fill="y")
+        self.tree.bind("<Double-1>", self._open_selected)
+        self.tree.bind("<Return>", self._open_selected)
+        
+        self.protocol("WM_DELETE_WINDOW", self._close)
+        entry.focus_set()
+        self.refresh()
+        self.rescan()
+    
+    def refresh(self):
+        """Reload the list from the catalog."""
+        self._filter_after = None
+        projects = self.library.projects(self.filter_text.get().strip(), self.sort, self.descending)
+        self.tree.delete(*self.tree.get_children())
+        for p in projects:
+            self.tree.insert("", "end", iid=p["folder"], values=(
+                p["title"],
+                f"{p['source_language']} → {p['target_language']}",
+                p["author"],
+                p["words"],
+                p["translated"],
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(p["modified"])),
+            ))
+        self.info.config(text=f"{len(projects)} of {len(self.library)} projects")
+    
+    def _schedule_refresh(self):
+        if self._filter_after is not None:
+            self.after_cancel(self._filter_after)
+        self._filter_after = self.after(self.FILTER_DELAY_MS, self.refresh)
+    
+    def sort_by(self, key):
+        """Sort by a column; clicking the sorted column again reverses the order."""
+        if key == self.sort:
+            self.descending = not self.descending
+        else:
+            self.sort = key
+            # Newest and largest first is the useful order for numbers and dates
+            self.descending = key in ("words", "translated", "modified")
+        self.refresh()
+    
+    def rescan(self):
+        """Update the catalog from the library folder in the background."""
+        from .library import ProjectLibrary
+        
+        root = self.library.root
+        self.info.config(text="Scanning library...")
+        
+        def scan():
+            try:
+                # SQLite connections belong to one thread - the scan uses its own
+                with ProjectLibrary(root) as library:
+                    self._scan_results.put(library.scan())
+            except Exception as e:
+                self._scan_results.put(e)
+        
+        threading.Thread(target=scan, daemon=True).start()
+        self.after(100, self._poll_scan)
+    
+    def _poll_scan(self):
+        if not self.winfo_exists():
+            return
+        try:
+            result = self._scan_results.get_nowait()
+        except Empty:
+            self.after(100, self._poll_scan)
+            return
+        if isinstance(result, Exception):
+            self.info.config(text=f"Scan failed: {result}")
+            return
+        self.refresh()
+        self.info.config(text=self.info.cget("text") +
+                         f" (scanned in {result['seconds']:.2f} s: {result['added']} added, "
+                         f"{result['updated']} updated, {result['removed']} removed)")
+    
+    def _open_selected(self, event=None):
+        folder = self.tree.focus()
+        if folder:
+            self.app.open_project(folder)
+    
+    def _close(self):
+        self.library.close()
+        self.destroy()
+
+
+class CorpusSearch(tk.Toplevel):
+    """
+    Window searching the aligned texts of all projects in a library.
+    
+    Hits are listed as concordance lines (the word with its neighbours and
+    the translation), with a summary of how the word was translated.
+    The index is brought up to date in the background when the window
+    opens. Double-click a hit to open the project at that line.
+    """
+    
+    COLUMNS = (
+        ("left", "", 220, "e"),
+        ("word", "Word", 120, "center"),
+        ("right", "", 220, "w"),
+        ("translation", "Translation", 160, "w"),
+        ("project", "Project", 160, "w"),
+    )
+    
+    def __init__(self, app, index, query=""):
+        super().__init__(app)
+        self.app = app
+        self.index = index
+        self._hits = []
+        self._update_results = Queue()
+        self.title(f"Search Corpus - {index.root}")
+        self.geometry("950x600")
+        
+        top = tk.Frame(self)
+        top.pack(fill="x", padx=10, pady=5)
+        tk.Label(top, text="Search:").pack(side="left")
+        self.query = tk.StringVar(value=query)
+        entry = tk.Entry(top, textvariable=self.query, width=30)
+        entry.pack(side="left", padx=5)
+        entry.bind("<Return>", lambda e: self.search())
+        tk.Label(top, text="in").pack(side="left")
+        self.side = ttk.Combobox(top, values=("source", "target"), state="readonly", width=8)
+        self.side.set("source")
+        self.side.pack(side="left", padx=5)
+        tk.Button(top, text="🔎 Search", command=self.search).pack(side="left", padx=2)
+        self.info = tk.Label(top, anchor="w")
+        self.info.pack(side="left", padx=10, fill="x", expand=True)
+        
+        self.summary = tk.Label(self, anchor="w", justify="left", fg="#555")
+        self.summary.pack(fill="x", padx=10)
+        
+        frame = tk.Frame(self)
+        frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.tree = ttk.Treeview(frame, columns=[c[0] for c in self.COLUMNS], show="headings")
+        for key, label, width, anchor in self.COLUMNS:
+            self.tree.heading(key, text=label)
+            self.tree.column(key, width=width, anchor=anchor)
+        scroll = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scroll.pack(side="right", fill="y")
+        self.tree.bind("<Double-1>", self._open_selected)
+        
+        self.protocol("WM_DELETE_WINDOW", self._close)
+        entry.focus_set()
+        self.update_index()
+        if query:
+            self.search()
+    
+    def search(self):
+        """Run the query and list the hits."""
+        from .search import translation_counts
+        
+        side = self.side.get()
+        start = time.perf_counter()
+        self._hits = self.index.search(self.query.get(), side)
+        elapsed = time.perf_counter() - start
+        
+        other = "target" if side == "source" else "source"
+        self.tree.delete(*self.tree.get_children())
+        for i, h in enumerate(self._hits):
+            self.tree.insert("", "end", iid=str(i), values=(
+                h[f"{side}_left"], h[side], h[f"{side}_right"], h[other], f"{h['title']}:{h['line'] + 1}"))
+        
+        counts = translation_counts(self._hits, side)
+        self.summary.config(text="Translations: " + ", ".join(f"{t} ({n})" for t, n in counts[:10])
+                            if counts else "")
+        self.info.config(text=f"{len(self._hits)} hits in {elapsed * 1000:.0f} ms")
+    
+    def update_index(self):
+        """Update the index from the library folder in the background."""
+        from .search import CorpusIndex
+        
+        root = self.index.root
+        self.info.config(text="Updating index...")
+        
+        def update():
+            try:
+                # SQLite connections belong to one thread - the update uses its own
+                with CorpusIndex(root) as index:
+                    self._update_results.put(index.update())
+            except Exception as e:
+                self._update_results.put(e)
+        
+        threading.Thread(target=update, daemon=True).start()
+        self.after(100, self._poll_update)
+    
+    def _poll_update(self):
+        if not self.winfo_exists():
+            return
+        try:
+            result = self._update_results.get_nowait()
+        except Empty:
+            self.after(100, self._poll_update)
+            return
+        if isinstance(result, Exception):
+            self.info.config(text=f"Index update failed: {result}")
+            return
+        self.info.config(text=f"Index of {len(self.index)} projects updated in {result['seconds']:.2f} s")
+        if self.query.get().strip() and (result["added"] or result["updated"] or result["removed"]):
+            self.search()
+    
+    def _open_selected(self, event=None):
+        sel = self.tree.focus()
+        if not sel:
+            return
+        hit = self._hits[int(sel)]
+        if os.path.normpath(hit["folder"]) != os.path.normpath(self.app.project_folder or ""):
+            self.app.open_project(hit["folder"])
+        self.app.show_line(hit["line"])
+    
+    def _close(self):
+        self.index.close()
+        self.destroy()
+
+
 def main():
     """Main entry point."""
     app = InterlinearApp()
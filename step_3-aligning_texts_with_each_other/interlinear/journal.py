@@ -0,0 +1,286 @@
+"""
+Journal Module for Interlinear Text Creator
+
+Write-ahead edit journal that keeps unsaved edits safe across crashes.
+
+The journal lives next to source.txt/target.txt as one JSON record per line.
+It starts with a base marker holding the digest of the saved texts the edits
+apply to, followed by small line-replace records:
+
+    {"base": "<digest>"}
+    ["orig", 12, 13, ["Wort"]]
+
+Each edit record means "replace lines[start:end] of this pane with lines".
+"""
+
+import os
+import json
+import hashlib
+import threading
+from queue import Queue, Empty
+
+from .project_io import text_lines, atomic_file
+
+JOURNAL_FILENAME = "edits.journal"
+
+
+def text_digest(source_text, target_text):
+    """
+    Return a digest identifying a pair of saved source/target texts.
+    """
+    h = hashlib.sha1()
+    h.update(source_text.encode("utf-8"))
+    h.update(b"\0")
+    h.update(target_text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class EditJournal:
+    """
+    Append-only edit journal for one project folder.
+
+    Records are buffered in memory and handed to a writer thread in
+    batches, either when batch_size records are pending or when flush() is
+    called; the writer appends and fsyncs them, so recording an edit never
+    waits for the disk. The methods may be called from different threads
+    (the GUI records edits while the save worker compacts).
+    """
+
+    def __init__(self, folder, batch_size=64):
+        self.path = os.path.join(folder, JOURNAL_FILENAME)
+        self.batch_size = batch_size
+        self._pending = []
+        self._file = None
+        self._error = None
+        # _lock guards the pending records, _file_lock the journal file
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._queue = Queue()
+        self._writer = None
+
+    def replay(self, source_text, target_text):
+        """
+        Apply journaled edits on top of the saved texts.
+
+        Only edits recorded after the last base marker matching the saved
+        texts are applied; a journal written against other texts is ignored.
+        Replay stops at the first record that is torn, malformed or does
+        not fit the lines, and the journal is cut there. Afterwards it is
+        open for appending.
+
+        Returns:
+            (source_lines, target_lines, number_of_applied_edits)
+        """
+        lines = {"orig": text_lines(source_text), "tran": text_lines(target_text)}
+        digest = text_digest(source_text, target_text)
+        records, _, good_end, applied_end = self._read(digest)
+
+        if records is None:
+            self.reset(digest)
+            return lines["orig"], lines["tran"], 0
+
+        applied = 0
+        for (pane, start, end, new_lines), record_end in records:
+            if end > len(lines[pane]):
+                # Written against other lines - cut after the last applied edit
+                good_end = applied_end
+                break
+            lines[pane][start:end] = new_lines
+            applied += 1
+            applied_end = record_end
+
+        with self._file_lock:
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._file.truncate(good_end)
+        return lines["orig"], lines["tran"], applied
+
+    def unsaved_edits(self, source_text, target_text):
+        """
+        Count the journaled edits without opening the journal for writing.
+
+        Returns:
+            (number of edits replay() would apply to the saved texts, or
+            None if the journal was written against other texts and is
+            stale; number of edit records in the journal)
+        """
+        records, total, _, _ = self._read(text_digest(source_text, target_text))
+        return (None if records is None else len(records)), total
+
+    def _read(self, digest):
+        """
+        Read the journal file.
+
+        Reading stops at the first torn or malformed record, as nothing
+        after it can be applied.
+
+        Returns:
+            (list of (edit record, its end in bytes) after the last base
+            marker for digest, or None without one; number of edit records;
+            end of the last complete record; end of that marker)
+        """
+        records = None
+        total = good_end = base_end = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for raw in f:
+                    try:
+                        if not raw.endswith(b"\n"):
+                            raise ValueError("incomplete record")
+                        rec = json.loads(raw)
+                        if not (_is_marker(rec) or _is_edit(rec)):
+                            raise ValueError("malformed record")
+                    except ValueError:
+                        # Torn write at the end of the file - ignore the rest
+                        break
+                    good_end += len(raw)
+                    if isinstance(rec, dict):
+                        if rec["base"] == digest:
+                            records = []
+                            base_end = good_end
+                    else:
+                        total += 1
+                        if records is not None:
+                            records.append((rec, good_end))
+        return records, total, good_end, base_end
+
+    def reset(self, base_digest):
+        """
+        Start a fresh journal for saved texts with the given digest.
+
+        Pending records are dropped, as they are contained in the save.
+        """
+        self._queue.join()
+        with self._lock:
+            self._pending = []
+        with self._file_lock:
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._file.write(json.dumps({"base": base_digest}) + "\n")
+            self._sync()
+
+    def mark(self, base_digest):
+        """
+        Note that the texts with the given digest are being saved.
+        
+        Unlike reset(), earlier records are kept: until the save has
+        finished they are still needed to recover the previous saved texts.
+        Edits recorded after the marker apply to the new texts.
+        """
+        with self._lock:
+            self._pending.append(json.dumps({"base": base_digest}))
+    
+    def compact(self, base_digest):
+        """
+        Drop everything before the last marker for base_digest, once the
+        texts with this digest are safely on disk.
+        
+        Reads and rewrites the journal file, so it is meant to run on the
+        save worker thread rather than the GUI thread.
+        """
+        self.flush(wait=True)
+        with self._file_lock:
+            if self._file is None:
+                return
+            marker = ("\n" + json.dumps({"base": base_digest}) + "\n").encode("utf-8")
+            with open(self.path, "rb") as f:
+                data = f.read()
+            pos = data.rfind(marker)
+            if pos < 0:
+                return
+            self._file.close()
+            try:
+                with atomic_file(self.path, "wb") as f:
+                    f.write(data[pos + 1:])
+            finally:
+                self._file = open(self.path, "a", encoding="utf-8")
+    
+    def record(self, pane, start, end, lines):
+        """
+        Record that lines[start:end] of pane were replaced by lines.
+        """
+        with self._lock:
+            self._pending.append(json.dumps([pane, start, end, lines], ensure_ascii=False))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self, wait=False):
+        """
+        Hand all pending records to the writer thread.
+
+        Args:
+            wait: Return only once they are written and fsynced
+
+        Raises:
+            OSError: If writing an earlier batch failed
+        """
+        with self._lock:
+            if self._pending and self._file is not None:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_batches,
+                                                    name="interlinear-journal", daemon=True)
+                    self._writer.start()
+                self._queue.put(self._pending)
+                self._pending = []
+        if wait:
+            self._queue.join()
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        """
+        Flush pending records and close the journal file.
+        """
+        try:
+            self.flush(wait=True)
+        finally:
+            if self._writer is not None:
+                self._queue.put(None)
+                self._writer.join()
+                self._writer = None
+            with self._file_lock:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+
+    def _write_batches(self):
+        while True:
+            batches = [self._queue.get()]
+            # Batches queued meanwhile share one fsync
+            while batches[-1] is not None:
+                try:
+                    batches.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            try:
+                records = [rec for batch in batches if batch is not None for rec in batch]
+                with self._file_lock:
+                    if records and self._file is not None:
+                        self._file.write("\n".join(records) + "\n")
+                        self._sync()
+            except OSError as e:
+                self._error = e
+            finally:
+                for _ in batches:
+                    self._queue.task_done()
+            if batches[-1] is None:
+                return
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+def _is_marker(rec):
+    return isinstance(rec, dict) and isinstance(rec.get("base"), str)
+
+
+def _is_edit(rec):
+    """True for a ["orig"|"tran", start, end, [lines]] record."""
+    if not (isinstance(rec, list) and len(rec) == 4):
+        return False
+    pane, start, end, lines = rec
+    return (pane in ("orig", "tran") and type(start) is int and type(end) is int and 0 <= start <= end
+            and isinstance(lines, list) and all(isinstance(line, str) for line in lines))
@@ -0,0 +1,40 @@
+"""
+Languages Module for Interlinear Text Creator
+
+Language lists offered in the GUI and their names in the Android app.
+"""
+
+# Available languages
+LANG_SOURCE = [
+    "German-DE", "Swissgerman-CHDE", "English-EN", "Spanish-ES",
+    "French-FR", "Italian-IT", "Portuguese-PT", "Russian-RU",
+    "Ukrainian-UA", "Turkish-TR", "Kurdish-KU", "Persian-FA"
+]
+
+LANG_TARGET = [
+    "English-EN", "German-DE", "French-FR", "Spanish-ES",
+    "Italian-IT", "Portuguese-PT", "Russian-RU", "Ukrainian-UA",
+    "Turkish-TR", "Kurdish-KU", "Persian-FA"
+]
+
+# Language display names for the app
+LANG_DISPLAY_NAMES = {
+    "German-DE": "German",
+    "Swissgerman-CHDE": "Swiss German",
+    "English-EN": "English",
+    "Spanish-ES": "Spanish",
+    "French-FR": "French",
+    "Italian-IT": "Italian",
+    "Portuguese-PT": "Portuguese",
+    "Russian-RU": "Russian",
+    "Ukrainian-UA": "Ukrainian",
+    "Turkish-TR": "Turkish",
+    "Kurdish-KU": "Kurdish",
+    "Persian-FA": "Persian"
+}
+
+def language_code(lang, default="de"):
+    """
+    Return the HTML lang code of a language such as "German-DE" ("de").
+    """
+    return lang.split("-")[-1].lower() if lang else default
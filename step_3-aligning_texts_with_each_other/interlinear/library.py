@@ -0,0 +1,209 @@
+"""
+Library Module for Interlinear Text Creator
+
+Keeps a catalog of all projects below a library folder in a small SQLite
+database (library.db in the library folder), so thousands of projects can
+be listed, sorted and filtered without reading them.
+
+A scan walks the library and only re-reads projects whose files changed
+since the last scan (by modification time and size); projects that
+disappeared are dropped from the catalog.
+
+Command line:
+    python -m interlinear.library <library_root> [--filter text] [--sort words]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from .project_io import load_project, discover_projects, find_audio, text_lines
+from .container import CONTAINER_FILENAME
+from .alignment import count_words, count_sentences
+
+LIBRARY_FILENAME = "library.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS project (
+    folder          TEXT PRIMARY KEY,
+    signature       TEXT NOT NULL,
+    title           TEXT NOT NULL,
+    source_language TEXT NOT NULL,
+    target_language TEXT NOT NULL,
+    author          TEXT NOT NULL,
+    description     TEXT NOT NULL,
+    words           INTEGER NOT NULL,
+    sentences       INTEGER NOT NULL,
+    translated      INTEGER NOT NULL,
+    audio           INTEGER NOT NULL,
+    modified        REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS project_title ON project (title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS project_modified ON project (modified);
+"""
+
+# Columns projects() can sort by
+SORT_COLUMNS = ("title", "source_language", "target_language", "author", "words",
+                "sentences", "translated", "modified")
+
+# Columns matched by the projects() filter
+FILTER_COLUMNS = ("title", "source_language", "target_language", "author", "description", "folder")
+
+
+def project_signature(folder):
+    """
+    Return (signature, newest mtime) of the files that make up a project.
+
+    The signature changes whenever one of them is written, added or removed.
+    """
+    parts = []
+    newest = 0.0
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            name = entry.name
+            if name in ("source.txt", "target.txt", CONTAINER_FILENAME) or name.endswith(".project.json"):
+                st = entry.stat()
+                parts.append(f"{name}:{st.st_mtime_ns}:{st.st_size}")
+                newest = max(newest, st.st_mtime)
+    return "|".join(sorted(parts)), newest
+
+
+def read_project(folder):
+    """
+    Read the catalog entry of one project folder.
+    """
+    data, source_text, target_text = load_project(folder)
+    orig = text_lines(source_text)
+    tran = text_lines(target_text)
+    title = data.get("title") or os.path.basename(folder)
+    return {
+        "title": title,
+        "source_language": data.get("source_language", ""),
+        "target_language": data.get("target_language", ""),
+        "author": data.get("author") or "",
+        "description": data.get("description") or "",
+        "words": count_words(orig),
+        "sentences": count_sentences(orig),
+        "translated": sum(1 for o, t in zip(orig, tran) if o.strip() and t.strip()),
+        "audio": find_audio(folder, title) is not None,
+    }
+
+
+class ProjectLibrary:
+    """
+    The project catalog of one library folder.
+    """
+
+    def __init__(self, root, path=None):
+        self.root = os.path.abspath(root)
+        self.path = path or os.path.join(self.root, LIBRARY_FILENAME)
+        self._db = sqlite3.connect(self.path)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def scan(self, progress=None):
+        """
+        Bring the catalog up to date with the library folder.
+
+        Args:
+            progress: Called as progress(folders_seen) every 100 folders
+
+        Returns:
+            dict with the number of added, updated, removed, unchanged and
+            failed projects, and the seconds taken
+        """
+        start = time.perf_counter()
+        known = dict(self._db.execute("SELECT folder, signature FROM project"))
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "failed": 0}
+        seen = set()
+
+        with self._db:
+            for n, folder in enumerate(discover_projects(self.root), 1):
+                if progress and n % 100 == 0:
+                    progress(n)
+                rel = os.path.relpath(folder, self.root)
+                seen.add(rel)
+                try:
+                    signature, modified = project_signature(folder)
+                    if known.get(rel) == signature:
+                        counts["unchanged"] += 1
+                        continue
+                    entry = read_project(folder)
+                except (OSError, ValueError, KeyError, sqlite3.Error):
+                    counts["failed"] += 1
+                    continue
+                self._db.execute(
+                    "INSERT OR REPLACE INTO project VALUES "
+                    "(:folder, :signature, :title, :source_language, :target_language, :author, "
+                    ":description, :words, :sentences, :translated, :audio, :modified)",
+                    dict(entry, folder=rel, signature=signature, modified=modified))
+                counts["updated" if rel in known else "added"] += 1
+
+            removed = [(rel,) for rel in known if rel not in seen]
+            self._db.executemany("DELETE FROM project WHERE folder = ?", removed)
+            counts["removed"] = len(removed)
+
+        counts["seconds"] = time.perf_counter() - start
+        return counts
+
+    def projects(self, text="", sort="title", descending=False, limit=None):
+        """
+        Return catalog entries as dicts (folder is an absolute path).
+
+        Args:
+            text: Only projects containing this text in one of FILTER_COLUMNS
+            sort: One of SORT_COLUMNS
+            descending: Reverse the sort order
+            limit: Maximum number of entries
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort!r}")
+        sql = "SELECT * FROM project"
+        args = []
+        if text:
+            sql += " WHERE " + " OR ".join(f"{c} LIKE ?" for c in FILTER_COLUMNS)
+            args = [f"%{text}%"] * len(FILTER_COLUMNS)
+        collate = " COLLATE NOCASE" if sort in ("title", "author") else ""
+        sql += f" ORDER BY {sort}{collate} {'DESC' if descending else 'ASC'}, folder"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(row, folder=os.path.join(self.root, row["folder"]), audio=bool(row["audio"]))
+                for row in self._db.execute(sql, args)]
+
+    def __len__(self):
+        return self._db.execute("SELECT count(*) FROM project").fetchone()[0]
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Update and list the project catalog of a library folder.")
+    parser.add_argument("root", help="library folder containing project folders")
+    parser.add_argument("--filter", default="", help="only list projects containing this text")
+    parser.add_argument("--sort", choices=SORT_COLUMNS, default="title")
+    parser.add_argument("--desc", action="store_true", help="sort descending")
+    args = parser.parse_args(argv)
+
+    with ProjectLibrary(args.root) as library:
+        counts = library.scan()
+        for p in library.projects(args.filter, args.sort, args.desc):
+            print(f"{p['title'][:40]:<40}  {p['source_language'][:18]:<18}  {p['words']:>7}  "
+                  f"{os.path.relpath(p['folder'], library.root)}")
+        print(f"\n{len(library)} projects - scanned in {counts['seconds']:.2f} s: {counts['added']} added, "
+              f"{counts['updated']} updated, {counts['removed']} removed, {counts['failed']} failed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,489 @@
+"""
+Pipeline Module for Interlinear Text Creator
+
+Rebuilds everything that is derived from a project, without the GUIs, and
+only what is out of date - like make.
+
+Stages and what they produce (in the project folder):
+- dictionary  <src>_<tgt>.dict.txt merged with the word pairs  (step 3)
+- groups      groups.json, groups_readable.txt                 (step 4)
+- html        desktop HTML files and interlinear.html          (step 3)
+- package     <title>_for_app.zip                              (step 3)
+- burn        <title>_subtitled.mp4 from <title>.mp4           (step 6)
+
+timestamps.txt (step 5) is made by hand in the browser and is an input.
+Before a burn, its times are snapped to the speech onsets of the video
+(audio.snap_timestamps()) to take out the tapping lag; the file itself is
+not changed.
+
+Every stage has a key: a digest of its own inputs (texts, settings, file
+stamps) and of the keys of the stages it depends on. A stage is rebuilt
+when its key differs from the one recorded when its outputs were built
+(.pipeline_manifest.json), so a change rebuilds exactly the stages that
+depend on it. Stages whose dependencies are done run in parallel.
+
+Command line:
+    python -m interlinear.pipeline <folder> [stage ...] [--force] [--dry-run] [--video clip.mp4]
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from . import trace
+from .project_io import (load_project, load_artifact, find_container, dictionary_path, dictionary_name,
+                         find_audio, save_project, text_lines)
+from .languages import language_code
+from .timing import TIMESTAMPS_FILENAME
+from .exporter.manifest import ExportManifest, inputs_digest, lines_digest, file_stamp
+
+PIPELINE_FILENAME = ".pipeline_manifest.json"
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+STEP4_SCRIPT = os.path.join(ROOT, "step_4-tool_to_group_words_for_subtitles", "group_words_gui-v4-(step_a).py")
+STEP6_SCRIPT = os.path.join(ROOT, "step_6-tool_to_merge_text_and_videos_(adding_subtitles_to_videos)",
+                            "burn_subtitles_gui-v4-(step_c).py")
+
+# Default settings (as in the step 4 and step 6 GUIs)
+DEFAULT_OPTIONS = {
+    "font": None,
+    "fontsize": 36,
+    "max_px": 1200,
+    "padding": 10,
+    "video": None,
+    "mobile_format": "standard",
+    "snap": True,
+}
+
+_scripts = {}
+_scripts_lock = threading.Lock()
+
+
+class Unavailable(Exception):
+    """A stage cannot run here (missing dependency or input)."""
+
+
+def load_script(path, name):
+    """Import a step script by path, once (the file names are not module names)."""
+    with _scripts_lock:
+        if name not in _scripts:
+            spec = importlib.util.spec_from_file_location(name, path)
+            module = importlib.util.module_from_spec(spec)
+            try:
+                spec.loader.exec_module(module)
+            except ImportError as e:
+                raise Unavailable(f"{os.path.basename(path)}: {e}")
+            _scripts[name] = module
+        return _scripts[name]
+
+
+def find_video(folder, title):
+    """Return the project's video (<title>.mp4 or video.mp4), or None."""
+    for name in [f"{title}.mp4", "video.mp4"]:
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_context(folder, options=None):
+    """
+    Load everything the stages read from a project folder.
+    """
+    data, source_text, target_text = load_project(folder)
+    title = data.get("title") or "Project"
+    data.setdefault("title", title)
+    data.setdefault("source_language", "Swissgerman-CHDE")
+    data.setdefault("target_language", "English-EN")
+    opts = dict(DEFAULT_OPTIONS, **{k: v for k, v in (options or {}).items() if v is not None})
+    orig = text_lines(source_text)
+    tran = text_lines(target_text)
+    return {
+        "folder": folder,
+        "data": data,
+        "title": title,
+        "orig": orig,
+        "tran": tran,
+        "lines": lines_digest(orig, tran),
+        "timestamps": load_artifact(folder, TIMESTAMPS_FILENAME),
+        "audio": find_audio(folder, title),
+        "video": opts["video"] or find_video(folder, title),
+        "options": opts,
+    }
+
+
+# -----------------------------------------------------------------------------
+# Stages
+#
+# Each stage has: needs (stages that must be done first), optionally
+# uses(ctx) (stages whose output is read if there), optionally check(ctx)
+# raising Unavailable, outputs(ctx), key(ctx) with the stage's own inputs,
+# and run(ctx) which builds the outputs (and may return a note to report).
+# -----------------------------------------------------------------------------
+
+def _dictionary_outputs(ctx):
+    # A container project keeps its dictionary inside the container
+    return [find_container(ctx["folder"]) or dictionary_path(ctx["folder"], ctx["data"])]
+
+
+def _dictionary_run(ctx):
+    save_project(ctx["folder"], ctx["data"], ctx["orig"], ctx["tran"], parts={"dictionary"})
+
+
+def _groups_check(ctx):
+    load_script(STEP4_SCRIPT, "group_words")
+
+
+def _groups_run(ctx):
+    step4 = load_script(STEP4_SCRIPT, "group_words")
+    opts = ctx["options"]
+    font = step4.default_font(opts["font"], opts["fontsize"])
+    groups, mapping = step4.group_pairs(ctx["orig"], ctx["tran"], font, opts["max_px"], opts["padding"])
+    step4.write_groups(ctx["folder"], groups, mapping, ctx["orig"])
+
+
+def _html_variants(ctx):
+    variants = ["basic", "mobile"]
+    if ctx["data"].get("audio"):
+        variants.append("audio")
+    if ctx["data"].get("youtube_url", "").strip():
+        variants.append("youtube")
+    return variants
+
+
+def _html_outputs(ctx):
+    folder, title = ctx["folder"], ctx["title"]
+    names = {"basic": f"{title}_interlinear.html", "mobile": "interlinear.html",
+             "audio": f"{title}_interlinear_audio.html", "youtube": f"{title}_interlinear_youtube.html"}
+    return [os.path.join(folder, names[v]) for v in _html_variants(ctx)]
+
+
+def _html_run(ctx):
+    from .exporter.html_export import export_variants
+    from .timing import load_sync
+
+    folder, data, title = ctx["folder"], ctx["data"], ctx["title"]
+    export_variants(folder, title, ctx["orig"], ctx["tran"], _html_variants(ctx),
+                    audio=ctx["audio"] or os.path.join(folder, f"{title}.mp3"),
+                    url=data.get("youtube_url", "").strip(),
+                    source_lang=language_code(data.get("source_language")),
+                    mobile_mode=ctx["options"]["mobile_format"], sync=load_sync(folder, ctx["orig"]),
+                    force=True)
+
+
+def _sync_uses(ctx):
+    # The groups only matter to the exports when there are timestamps to sync
+    return ("groups",) if ctx["timestamps"] else ()
+
+
+def _export_key(ctx):
+    from .exporter.html_export import TEMPLATE_DIGEST
+    return dict(lines=ctx["lines"], data=ctx["data"], audio=file_stamp(ctx["audio"]),
+                timestamps=ctx["timestamps"], mode=ctx["options"]["mobile_format"],
+                templates=TEMPLATE_DIGEST)
+
+
+def _package_outputs(ctx):
+    from .exporter.html_export import app_package_path
+    return [app_package_path(ctx["folder"], ctx["title"])]
+
+
+def _package_run(ctx):
+    from .batch import package_settings
+    from .exporter.html_export import generate_app_package
+
+    generate_app_package(force=True, mobile_mode=ctx["options"]["mobile_format"],
+                         **package_settings(ctx["folder"]))
+
+
+def _burn_check(ctx):
+    if not ctx["video"]:
+        raise Unavailable(f"no video ({ctx['title']}.mp4 or --video)")
+    if not os.path.exists(ctx["video"]):
+        raise Unavailable(f"video not found: {ctx['video']}")
+    load_script(STEP6_SCRIPT, "burn_subtitles")
+
+
+def _burn_outputs(ctx):
+    return [os.path.join(ctx["folder"], f"{ctx['title']}_subtitled.mp4")]
+
+
+def _snap_groups(groups, media):
+    """
+    Snap the start times of timed groups to the speech onsets of the media.
+
+    Returns:
+        (groups, note for the stage result)
+    """
+    from .timing import bind_timestamps, group_times
+
+    starts = group_times(groups)
+    if not starts:
+        return groups, None
+    timed = [i for i, t in enumerate(starts) if t is not None]
+    try:
+        from .audio import snap_timestamps
+        snapped, report = snap_timestamps([starts[i] for i in timed], media)
+    except (ImportError, RuntimeError) as e:
+        return groups, f"times not snapped: {e}"
+    for i, t in zip(timed, snapped):
+        starts[i] = t
+    return (bind_timestamps(groups, starts, groups[timed[-1]]["end"]),
+            f"{report['moved']} of {report['total']} times snapped, median "
+            f"{report['median_shift'] * 1000:+.0f} ms, max {report['max_shift'] * 1000:.0f} ms")
+
+
+def _burn_run(ctx):
+    from .timing import timed_groups
+
+    step6 = load_script(STEP6_SCRIPT, "burn_subtitles")
+    # timestamps.txt is bound to the fresh groups, so each is shown at its time
+    groups, problems = timed_groups(ctx["folder"])
+    if problems:
+        raise ValueError(f"{TIMESTAMPS_FILENAME}: {'; '.join(problems)}")
+    opts = ctx["options"]
+    note = None
+    if opts["snap"]:
+        groups, note = _snap_groups(groups, ctx["video"])
+    step6.burn_subtitles(ctx["video"], groups, [l.strip() for l in ctx["orig"]],
+                         [l.strip() for l in ctx["tran"]], _burn_outputs(ctx)[0],
+                         opts["font"], opts["fontsize"])
+    return note
+
+
+STAGES = {
+    "dictionary": {
+        "needs": (),
+        "outputs": _dictionary_outputs,
+        "key": lambda ctx: dict(lines=ctx["lines"], dictionary=dictionary_name(ctx["data"])),
+        "run": _dictionary_run,
+    },
+    "groups": {
+        "needs": (),
+        "check": _groups_check,
+        "outputs": lambda ctx: [os.path.join(ctx["folder"], "groups.json"),
+                                os.path.join(ctx["folder"], "groups_readable.txt")],
+        "key": lambda ctx: dict(lines=ctx["lines"], font=ctx["options"]["font"],
+                                font_stamp=file_stamp(ctx["options"]["font"]),
+                                **{k: ctx["options"][k] for k in ("fontsize", "max_px", "padding")}),
+        "run": _groups_run,
+    },
+    "html": {
+        "needs": (), "uses": _sync_uses,
+        "outputs": _html_outputs,
+        "key": _export_key,
+        "run": _html_run,
+    },
+    "package": {
+        "needs": (), "uses": _sync_uses,
+        "outputs": _package_outputs,
+        "key": _export_key,
+        "run": _package_run,
+    },
+    "burn": {
+        "needs": ("groups",),
+        "check": _burn_check,
+        "outputs": _burn_outputs,
+        "key": lambda ctx: dict(lines=ctx["lines"], video=ctx["video"], video_stamp=file_stamp(ctx["video"]),
+                                timestamps=ctx["timestamps"], snap=ctx["options"]["snap"],
+                                font=ctx["options"]["font"], fontsize=ctx["options"]["fontsize"]),
+        "run": _burn_run,
+    },
+}
+
+
+def _dependencies(name, ctx):
+    """Return the stages a stage needs or uses."""
+    stage = STAGES[name]
+    return tuple(stage["needs"]) + tuple(stage["uses"](ctx) if "uses" in stage else ())
+
+
+def _dependency_key(manifest, ctx, name, keys):
+    """
+    Return the key of a stage another one depends on: from this run if it is
+    in the plan, else the one recorded when its outputs were last built.
+    """
+    if name in keys:
+        return keys[name]
+    return [manifest.entries.get(os.path.basename(p)) for p in STAGES[name]["outputs"](ctx)]
+
+
+def plan_stages(targets=None):
+    """
+    Return the stages needed for targets (default: all), dependencies first.
+    """
+    targets = list(targets or STAGES)
+    for name in targets:
+        if name not in STAGES:
+            raise ValueError(f"Unknown stage: {name}")
+    order = []
+
+    def visit(name):
+        if name in order:
+            return
+        for dep in STAGES[name]["needs"]:
+            visit(dep)
+        order.append(name)
+
+    for name in targets:
+        visit(name)
+    # Stages only "used" are ordered before their users when they run too
+    return sorted(order, key=lambda n: list(STAGES).index(n))
+
+
+def run_pipeline(folder, targets=None, options=None, force=False, workers=None, dry_run=False, progress=None):
+    """
+    Bring the derived files of a project up to date.
+
+    Args:
+        folder: Project folder
+        targets: Stages to bring up to date (default: all); the stages they
+            need are included
+        options: Overrides of DEFAULT_OPTIONS
+        force: Rebuild even if up to date
+        workers: Stages run at the same time (default: all that are ready)
+        dry_run: Only report what would be rebuilt
+        progress: Called with each stage result as it finishes
+
+    Returns:
+        List of stage results (dicts): stage, status ("built", "current",
+        "outdated" for a dry run, "skipped" or "failed"), seconds, outputs,
+        error, note (what a stage reports besides its files)
+    """
+    ctx = load_context(folder, options)
+    order = plan_stages(targets)
+    manifest = ExportManifest(folder, PIPELINE_FILENAME)
+
+    results = {}
+    keys = {}
+    todo = []
+    for name in order:
+        stage = STAGES[name]
+        result = results[name] = {"stage": name, "status": None, "seconds": 0.0,
+                                  "outputs": stage["outputs"](ctx), "error": None, "note": None}
+        missing = [d for d in stage["needs"] if results[d]["status"] in ("skipped", "failed")]
+        try:
+            if missing:
+                raise Unavailable(f"needs {', '.join(missing)}")
+            if "check" in stage:
+                stage["check"](ctx)
+        except Unavailable as e:
+            result.update(status="skipped", error=str(e))
+            if progress:
+                progress(result)
+            continue
+        keys[name] = inputs_digest(stage=name, inputs=stage["key"](ctx),
+                                   deps=[_dependency_key(manifest, ctx, d, keys) for d in _dependencies(name, ctx)])
+        if not force and all(manifest.is_current(p, keys[name]) for p in result["outputs"]):
+            result["status"] = "current"
+        elif dry_run:
+            result["status"] = "outdated"
+        else:
+            todo.append(name)
+        if result["status"] and progress:
+            progress(result)
+
+    def run(name):
+        start = time.perf_counter()
+        with trace.span(f"stage:{name}", folder=os.path.basename(folder)):
+            note = STAGES[name]["run"](ctx)
+        return time.perf_counter() - start, note
+
+    # A stage starts once every stage it needs or uses (if in the plan) is done
+    waiting = {name: {d for d in _dependencies(name, ctx) if d in todo} for name in todo}
+    running = {}
+    # Stages that failed, or were built from the files of a failed stage
+    tainted = set()
+    with ThreadPoolExecutor(max_workers=workers or len(STAGES)) as pool:
+        while waiting or running:
+            for name in [n for n, deps in waiting.items() if not deps]:
+                del waiting[name]
+                running[pool.submit(run, name)] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for job in done:
+                name = running.pop(job)
+                result = results[name]
+                failed_deps = sorted(d for d in _dependencies(name, ctx) if d in tainted)
+                try:
+                    seconds, note = job.result()
+                    result.update(status="built", seconds=seconds, note=note)
+                    if failed_deps:
+                        # Its key assumes the used stages were rebuilt - build it again next time
+                        tainted.add(name)
+                        result["error"] = f"not marked current, {', '.join(failed_deps)} failed"
+                    else:
+                        for path in result["outputs"]:
+                            manifest.update(path, keys[name])
+                        manifest.save()
+                except Exception as e:
+                    tainted.add(name)
+                    result.update(status="failed", error=f"{type(e).__name__}: {e}")
+                if progress:
+                    progress(result)
+                for other, deps in list(waiting.items()):
+                    if name not in deps:
+                        continue
+                    if result["status"] == "failed" and name in STAGES[other]["needs"]:
+                        # Stages needing a failed one cannot run
+                        del waiting[other]
+                        results[other].update(status="skipped", error=f"needs {name}")
+                        if progress:
+                            progress(results[other])
+                        for deps2 in waiting.values():
+                            deps2.discard(other)
+                    else:
+                        deps.discard(name)
+
+    return [results[name] for name in order]
+
+
+def main(argv=None):
+    """Command line entry point."""
+    from .exporter.html_export import MOBILE_FORMATS
+
+    parser = argparse.ArgumentParser(description="Rebuild the out-of-date files derived from a project.")
+    parser.add_argument("folder", help="project folder")
+    parser.add_argument("stages", nargs="*",
+                        help=f"stages to bring up to date (default: all of {', '.join(STAGES)})")
+    parser.add_argument("--force", action="store_true", help="rebuild even if up to date")
+    parser.add_argument("--dry-run", action="store_true", help="only show what would be rebuilt")
+    parser.add_argument("--workers", type=int, help="stages run at the same time")
+    parser.add_argument("--video", help="video for the burn stage (default: <title>.mp4)")
+    parser.add_argument("--font", help="TTF font for groups and burn")
+    parser.add_argument("--fontsize", type=int)
+    parser.add_argument("--max-px", type=int, dest="max_px", help="maximum subtitle line width")
+    parser.add_argument("--padding", type=int, help="padding per word pair (px)")
+    parser.add_argument("--no-snap", action="store_true",
+                        help="burn the tapped times as they are (default: snap them to the speech onsets)")
+    parser.add_argument("--mobile-format", dest="mobile_format", choices=MOBILE_FORMATS,
+                        help="format of interlinear.html")
+    args = parser.parse_args(argv)
+
+    options = {k: getattr(args, k, None) for k in DEFAULT_OPTIONS}
+    options["snap"] = not args.no_snap
+
+    def progress(result):
+        line = f"{result['stage']:<11} {result['status']:<9}"
+        if result["status"] == "built":
+            line += f" {result['seconds']:.2f} s"
+        if result["error"]:
+            line += f" ({result['error']})"
+        if result["note"]:
+            line += f" - {result['note']}"
+        print(line, flush=True)
+
+    try:
+        results = run_pipeline(args.folder, args.stages, options, args.force, args.workers,
+                               args.dry_run, progress)
+    except (ValueError, OSError) as e:
+        # e.g. an unknown stage, or a folder that does not exist
+        parser.error(str(e))
+    return 1 if any(r["status"] == "failed" for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
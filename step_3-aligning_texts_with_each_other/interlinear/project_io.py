@@ -2,10 +2,69 @@
 Project I/O Module for Interlinear Text Creator
 
 Handles reading and writing project files.
+
+A project is either a folder of loose files (source.txt, target.txt,
+<title>.project.json, <src>_<tgt>.dict.txt, ...) or a folder holding a
+single project.ilproj container (see container.py). import_folder() and
+export_folder() convert between the two.
 """
 
 import os
 import json
+import tempfile
+import contextlib
+
+from .container import ProjectContainer, CONTAINER_FILENAME
+
+# Name of the project JSON inside a container
+CONTAINER_PROJECT_JSON = "project.json"
+
+# Loose files taken into a container by import_folder(), besides the
+# project JSON and the dictionaries
+CONTAINER_FILES = ("source.txt", "target.txt", "groups.json", "timestamps.txt")
+
+# Permissions of newly created files (the process umask, read once)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+@contextlib.contextmanager
+def atomic_file(path, mode="w", encoding="utf-8"):
+    """
+    Open a temporary file that replaces path once the block has finished.
+    
+    The temporary file has a unique name in the same folder, so two writers
+    never write to the same temporary file, and it is removed if the block
+    fails. The file keeps the permissions of the file it replaces (those of
+    a new file otherwise), not the owner-only mode of mkstemp().
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                               prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        try:
+            mode_bits = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            mode_bits = 0o666 & ~_UMASK
+        os.chmod(tmp, mode_bits)
+        with open(fd, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def atomic_write(path, text):
+    """
+    Write a text file through a temporary file and a rename.
+    
+    A crash while writing leaves either the old or the new file, never a
+    half-written one (see atomic_file()).
+    """
+    with atomic_file(path) as f:
+        f.write(text)
+    return path
 
 def save_text_file(folder, filename, text):
     """
@@ -13,9 +72,18 @@ def save_text_file(folder, filename, text):
     """
     os.makedirs(folder, exist_ok=True)
     path = os.path.join(folder, filename)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(text)
-    return path
+    return atomic_write(path, text)
+
+def text_lines(text):
+    """
+    Split the text of source.txt/target.txt into its lines.
+    
+    All tools split the texts with this, so a text has the same lines (and
+    digests) everywhere: "\r\n" and "\r" end a line like "\n", no other
+    character does, and a trailing newline leaves an empty last line, as in
+    the editor.
+    """
+    return text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
 
 def load_text_file(folder, filename):
     """
@@ -33,9 +101,7 @@ def save_project_json(folder, title, data):
     """
     os.makedirs(folder, exist_ok=True)
     path = os.path.join(folder, f"{title}.project.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    return path
+    return atomic_write(path, json.dumps(data, ensure_ascii=False, indent=2))
 
 def load_project_json(path):
     """
@@ -43,3 +109,225 @@ def load_project_json(path):
     """
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
+
+def find_project_json(folder):
+    """
+    Return the path of the *.project.json file in a folder, or None.
+    """
+    for f in sorted(os.listdir(folder)):
+        if f.endswith(".project.json"):
+            return os.path.join(folder, f)
+    return None
+
+def find_audio(folder, title):
+    """
+    Return the project's audio file (<title>.mp3 or audio.mp3), or None.
+    """
+    for name in [f"{title}.mp3", f"{title}.MP3", "audio.mp3"]:
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+def discover_projects(root):
+    """
+    Yield every project folder below root, in sorted order.
+    
+    A project folder holds a project container, or source.txt and a
+    *.project.json file.
+    """
+    for folder, dirs, files in os.walk(root):
+        dirs.sort()
+        if CONTAINER_FILENAME in files or (
+                "source.txt" in files and any(f.endswith(".project.json") for f in files)):
+            yield folder
+
+def find_container(folder):
+    """
+    Return the path of the project container in a folder, or None.
+    """
+    path = os.path.join(folder, CONTAINER_FILENAME)
+    return path if os.path.exists(path) else None
+
+def load_project(folder):
+    """
+    Load the metadata and both texts of a project folder.
+    
+    A container is read with a single query; without one, the loose files
+    are read.
+    
+    Returns:
+        (metadata dict, source text, target text); the metadata is empty if
+        the project has none yet
+    """
+    container = find_container(folder)
+    if container:
+        with ProjectContainer(container) as c:
+            artifacts = c.read_all()
+        
+        def text(name):
+            return bytes(artifacts[name]).decode("utf-8") if name in artifacts else ""
+        
+        data = json.loads(text(CONTAINER_PROJECT_JSON) or "{}")
+        return data, text("source.txt"), text("target.txt")
+    
+    project_json = find_project_json(folder)
+    data = load_project_json(project_json) if project_json else {}
+    return data, load_text_file(folder, "source.txt"), load_text_file(folder, "target.txt")
+
+def load_artifact(folder, name):
+    """
+    Return the text of a project file, or None if there is none.
+    
+    The loose file is preferred, so files written by other steps
+    (groups.json, timestamps.txt) take effect without a new import; the
+    container is used otherwise.
+    """
+    path = os.path.join(folder, name)
+    if os.path.exists(path):
+        return load_text_file(folder, name)
+    container = find_container(folder)
+    if container:
+        with ProjectContainer(container) as c:
+            return c.read_text(name)
+    return None
+
+def save_artifact(folder, name, text):
+    """
+    Write a project file where load_artifact() finds it: the loose file if
+    there is one or the project has no container, else the container.
+    """
+    container = find_container(folder)
+    if container and not os.path.exists(os.path.join(folder, name)):
+        with ProjectContainer(container) as c:
+            c.write_texts({name: text})
+        return container
+    return save_text_file(folder, name, text)
+
+# Artifacts written by save_project()
+SAVE_PARTS = ("source", "target", "metadata", "dictionary")
+
+def dictionary_name(data):
+    """
+    Return the file name of the project dictionary for the languages in data.
+    """
+    return f"{data['source_language']}_{data['target_language']}.dict.txt"
+
+def dictionary_path(folder, data):
+    """
+    Return the path of the project dictionary for the languages in data.
+    """
+    return os.path.join(folder, dictionary_name(data))
+
+def load_project_dictionary(folder, data):
+    """
+    Load the project dictionary for the languages in data (from the
+    container if the project has one).
+    """
+    from .dictionary import load_dictionary, parse_dictionary
+    
+    container = find_container(folder)
+    if container:
+        with ProjectContainer(container) as c:
+            return parse_dictionary((c.read_text(dictionary_name(data)) or "").splitlines())
+    return load_dictionary(dictionary_path(folder, data))
+
+def save_project(folder, data, orig, tran, parts=None):
+    """
+    Save a whole project: source.txt, target.txt, the project JSON and the
+    project dictionary merged with the current word pairs.
+    
+    Args:
+        folder: Project folder
+        data: Project metadata (title, source_language, target_language, ...)
+        orig, tran: Lines of both panes (only needed for the text parts)
+        parts: Artifacts to write (see SAVE_PARTS), default all
+    
+    A project with a container is saved into it, in one transaction.
+    """
+    from .dictionary import load_dictionary, save_dictionary, merge_from_lines, format_dictionary
+    
+    parts = SAVE_PARTS if parts is None else parts
+    container = find_container(folder)
+    if container:
+        texts = {}
+        if "source" in parts:
+            texts["source.txt"] = "\n".join(orig)
+        if "target" in parts:
+            texts["target.txt"] = "\n".join(tran)
+        if "metadata" in parts:
+            texts[CONTAINER_PROJECT_JSON] = json.dumps(data, ensure_ascii=False, indent=2)
+        if "dictionary" in parts:
+            existing = load_project_dictionary(folder, data)
+            texts[dictionary_name(data)] = format_dictionary(merge_from_lines(existing, orig, tran))
+        with ProjectContainer(container) as c:
+            c.write_texts(texts)
+        return
+    
+    if "source" in parts:
+        save_text_file(folder, "source.txt", "\n".join(orig))
+    if "target" in parts:
+        save_text_file(folder, "target.txt", "\n".join(tran))
+    if "metadata" in parts:
+        save_project_json(folder, data["title"], data)
+    if "dictionary" in parts:
+        dict_path = dictionary_path(folder, data)
+        save_dictionary(dict_path, merge_from_lines(load_dictionary(dict_path), orig, tran))
+
+def import_folder(folder):
+    """
+    Put the loose files of a project folder into a container in the folder.
+    
+    The loose copies are removed once the container is written: saves only
+    update the container, so copies left behind would go stale (and
+    groups.json/timestamps.txt next to a container override its versions).
+    Audio and exported files stay in the folder; export_folder() writes the
+    loose files again.
+    
+    Returns:
+        Path of the container
+    """
+    texts = {}
+    for f in sorted(os.listdir(folder)):
+        if f in CONTAINER_FILES or f.endswith(".dict.txt"):
+            texts[f] = load_text_file(folder, f)
+    loose = [os.path.join(folder, f) for f in texts]
+    project_json = find_project_json(folder)
+    if project_json:
+        with open(project_json, "r", encoding="utf-8") as f:
+            texts[CONTAINER_PROJECT_JSON] = f.read()
+        loose.append(project_json)
+    
+    path = os.path.join(folder, CONTAINER_FILENAME)
+    with ProjectContainer(path) as c:
+        c.write_texts(texts)
+    for f in loose:
+        os.remove(f)
+    return path
+
+def export_folder(folder, dest=None):
+    """
+    Write the artifacts of a project container as loose files.
+    
+    Args:
+        folder: Project folder holding the container
+        dest: Folder to write to (default: the project folder)
+    
+    Returns:
+        List of written paths
+    """
+    container = find_container(folder)
+    if not container:
+        raise FileNotFoundError(f"No {CONTAINER_FILENAME} in {folder}")
+    dest = dest or folder
+    with ProjectContainer(container) as c:
+        artifacts = c.read_all()
+    
+    paths = []
+    for name, data in sorted(artifacts.items()):
+        text = bytes(data).decode("utf-8")
+        if name == CONTAINER_PROJECT_JSON:
+            title = json.loads(text).get("title") or "Project"
+            name = f"{title}.project.json"
+        paths.append(save_text_file(dest, name, text))
+    return paths
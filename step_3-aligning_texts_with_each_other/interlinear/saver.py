@@ -0,0 +1,131 @@
+"""
+Saver Module for Interlinear Text Creator
+
+Saves projects on a background thread, so the GUI never waits for the disk.
+
+Save requests are coalesced: while a save is running, further requests for
+the same folder are merged into one pending request (the union of the
+artifacts to write, with the newest snapshot of each), which is written
+once the running save has finished. Results are collected with poll()
+from the GUI thread (e.g. from a tkinter after() callback). Follow-up work
+of a save (such as compacting the edit journal) is passed along with the
+request and runs on the worker thread right after the snapshot is written.
+"""
+
+import json
+import time
+import hashlib
+import threading
+from queue import Queue, Empty
+
+from .project_io import save_project, SAVE_PARTS
+
+
+def artifact_hash(value):
+    """
+    Return a content hash of an artifact: a list of lines or a JSON-able dict.
+    """
+    if isinstance(value, dict):
+        data = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    else:
+        data = "\n".join(value)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SaveWorker:
+    """
+    Background thread that writes project snapshots with save_project().
+    """
+
+    def __init__(self, save=save_project):
+        self._save = save
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._running = False
+        self._stopping = False
+        self._results = Queue()
+        self._thread = threading.Thread(target=self._run, name="interlinear-save", daemon=True)
+        self._thread.start()
+
+    def request(self, folder, data, orig, tran, parts=None, token=None, after=None):
+        """
+        Queue a save of the given snapshot; returns immediately.
+
+        Args:
+            folder, data, orig, tran: As for save_project(); orig/tran may be
+                None if no part needing them is requested
+            parts: Artifacts to write (see SAVE_PARTS), default all
+            token: Passed back with the result
+            after: Called without arguments on the worker thread once the
+                snapshot is saved (not if the save fails)
+        """
+        parts = set(SAVE_PARTS if parts is None else parts)
+        after = [after] if after is not None else []
+        with self._cond:
+            pending = self._pending.get(folder)
+            if pending is None:
+                self._pending[folder] = {"data": data, "orig": orig, "tran": tran,
+                                         "parts": parts, "tokens": [token], "after": after}
+            else:
+                pending["data"] = data
+                pending["orig"] = orig if orig is not None else pending["orig"]
+                pending["tran"] = tran if tran is not None else pending["tran"]
+                pending["parts"] |= parts
+                pending["tokens"].append(token)
+                pending["after"] += after
+            self._cond.notify()
+
+    @property
+    def busy(self):
+        """True while a save is pending or running."""
+        with self._cond:
+            return self._running or bool(self._pending)
+
+    def poll(self):
+        """
+        Return the results of all saves finished since the last call.
+
+        Each result is a dict: folder, parts (written), tokens (of all
+        requests merged into this save, oldest first), error (None on
+        success) and seconds.
+        """
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except Empty:
+                return results
+
+    def close(self, timeout=None):
+        """
+        Finish the pending saves (if any) and stop the thread.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                folder = next(iter(self._pending))
+                job = self._pending.pop(folder)
+                self._running = True
+
+            start = time.perf_counter()
+            error = None
+            try:
+                self._save(folder, job["data"], job["orig"], job["tran"], job["parts"])
+                for after in job["after"]:
+                    after()
+            except Exception as e:
+                error = e
+            self._results.put({"folder": folder, "parts": job["parts"], "tokens": job["tokens"],
+                               "error": error, "seconds": time.perf_counter() - start})
+
+            with self._cond:
+                self._running = False
@@ -0,0 +1,356 @@
+"""
+Search Module for Interlinear Text Creator
+
+Full-text search over the aligned texts of all projects in a library, to
+see how a word was translated before.
+
+The index (search.db in the library folder) is an inverted index: for each
+token of the source or target texts it stores, per project, the lines the
+token occurs on, delta-encoded as varints. The aligned lines of every
+project are stored zlib-compressed next to it, so a query never opens a
+project folder. Like the library catalog, an update only re-indexes
+projects whose files changed. As the texts hold one word per line, a query
+of several words is searched as a phrase over consecutive lines.
+
+Command line:
+    python -m interlinear.search <library_root> <query> [--side target] [--limit 50]
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import zlib
+from collections import Counter, OrderedDict
+
+from .project_io import load_project, discover_projects, text_lines
+from .library import project_signature
+
+SEARCH_FILENAME = "search.db"
+
+SCHEMA = """
+-- Project ids are never reused, so cached projects stay valid
+CREATE TABLE IF NOT EXISTS doc (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    folder          TEXT UNIQUE NOT NULL,
+    signature       TEXT NOT NULL,
+    title           TEXT NOT NULL,
+    source_language TEXT NOT NULL,
+    target_language TEXT NOT NULL,
+    lines           BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS posting (
+    side  INTEGER NOT NULL,
+    token TEXT NOT NULL,
+    doc   INTEGER NOT NULL,
+    lines BLOB NOT NULL,
+    PRIMARY KEY (side, token, doc)
+) WITHOUT ROWID;
+"""
+
+# Which text a posting belongs to
+SIDES = {"source": 0, "target": 1}
+
+# Words shown left and right of a hit in the concordance
+CONTEXT_WORDS = 5
+
+# Decompressed projects kept in memory between queries
+DOC_CACHE_SIZE = 64
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Return the lowercase word tokens of a text."""
+    return TOKEN_RE.findall(text.casefold())
+
+
+# -----------------------------------------------------------------------------
+# Postings
+# -----------------------------------------------------------------------------
+
+def encode_postings(lines):
+    """
+    Encode ascending line numbers as varint deltas.
+    """
+    out = bytearray()
+    last = 0
+    for n in lines:
+        delta = n - last
+        last = n
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def decode_postings(data):
+    """
+    Decode encode_postings() output into the list of line numbers.
+    """
+    lines = []
+    last = shift = value = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        last += value
+        lines.append(last)
+        value = shift = 0
+    return lines
+
+
+def build_postings(lines):
+    """
+    Return {token: [line numbers]} for a list of lines.
+    """
+    postings = {}
+    for i, line in enumerate(lines):
+        for token in set(tokenize(line)):
+            postings.setdefault(token, []).append(i)
+    return postings
+
+
+def match_phrase(lines, start, tokens):
+    """
+    Return the end (exclusive) of the lines from start on that hold tokens
+    in this order, or None.
+
+    The phrase starts at a token of lines[start] and continues on the
+    following lines; blank lines (sentence breaks) and lines without a
+    word are skipped.
+    """
+    first = tokenize(lines[start])
+    for p, token in enumerate(first):
+        if token != tokens[0]:
+            continue
+        rest, words, i = tokens[1:], first[p + 1:], start
+        while True:
+            n = min(len(words), len(rest))
+            if words[:n] != rest[:n]:
+                break
+            rest = rest[n:]
+            if not rest:
+                return i + 1
+            i += 1
+            if i >= len(lines):
+                break
+            words = tokenize(lines[i])
+    return None
+
+
+# -----------------------------------------------------------------------------
+# Index
+# -----------------------------------------------------------------------------
+
+class CorpusIndex:
+    """
+    The search index of one library folder.
+    """
+
+    def __init__(self, root, path=None):
+        self.root = os.path.abspath(root)
+        self.path = path or os.path.join(self.root, SEARCH_FILENAME)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA cache_size = -65536")
+        self._docs = OrderedDict()
+        with self._db:
+            self._db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def update(self, progress=None):
+        """
+        Bring the index up to date with the library folder.
+
+        Args:
+            progress: Called as progress(folders_seen) every 100 folders
+
+        Returns:
+            dict with the number of added, updated, removed, unchanged and
+            failed projects, and the seconds taken
+        """
+        start = time.perf_counter()
+        known = {folder: (doc, signature) for doc, folder, signature
+                 in self._db.execute("SELECT id, folder, signature FROM doc")}
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "failed": 0}
+        seen = set()
+
+        with self._db:
+            for n, folder in enumerate(discover_projects(self.root), 1):
+                if progress and n % 100 == 0:
+                    progress(n)
+                rel = os.path.relpath(folder, self.root)
+                seen.add(rel)
+                try:
+                    signature, _ = project_signature(folder)
+                    if rel in known and known[rel][1] == signature:
+                        counts["unchanged"] += 1
+                        continue
+                    data, source_text, target_text = load_project(folder)
+                except (OSError, ValueError, KeyError, sqlite3.Error):
+                    counts["failed"] += 1
+                    continue
+                if rel in known:
+                    self._remove(known[rel][0])
+                self._add(rel, signature, data, text_lines(source_text), text_lines(target_text))
+                counts["updated" if rel in known else "added"] += 1
+
+            for rel, (doc, _) in known.items():
+                if rel not in seen:
+                    self._remove(doc)
+                    counts["removed"] += 1
+
+        self._docs.clear()
+        counts["seconds"] = time.perf_counter() - start
+        return counts
+
+    def _add(self, folder, signature, data, orig, tran):
+        tran = tran + [""] * (len(orig) - len(tran))
+        lines = zlib.compress(json.dumps([orig, tran], ensure_ascii=False).encode("utf-8"))
+        doc = self._db.execute(
+            "INSERT INTO doc (folder, signature, title, source_language, target_language, lines) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (folder, signature, data.get("title") or os.path.basename(folder),
+             data.get("source_language", ""), data.get("target_language", ""), lines)).lastrowid
+        for side, text in ((SIDES["source"], orig), (SIDES["target"], tran)):
+            self._db.executemany(
+                "INSERT INTO posting VALUES (?, ?, ?, ?)",
+                ((side, token, doc, encode_postings(numbers))
+                 for token, numbers in build_postings(text).items()))
+
+    def _remove(self, doc):
+        # The tokens come from the stored lines, so no index on posting.doc
+        # is needed (it would slow down every insert)
+        _, _, orig, tran = self._doc(doc)
+        for side, text in ((SIDES["source"], orig), (SIDES["target"], tran)):
+            self._db.executemany("DELETE FROM posting WHERE side = ? AND token = ? AND doc = ?",
+                                 ((side, token, doc) for token in build_postings(text)))
+        self._db.execute("DELETE FROM doc WHERE id = ?", (doc,))
+        self._docs.pop(doc, None)
+
+    def _doc(self, doc):
+        """Return (title, folder, orig, tran) of an indexed project."""
+        if doc in self._docs:
+            self._docs.move_to_end(doc)
+            return self._docs[doc]
+        title, folder, lines = self._db.execute(
+            "SELECT title, folder, lines FROM doc WHERE id = ?", (doc,)).fetchone()
+        orig, tran = json.loads(zlib.decompress(lines).decode("utf-8"))
+        self._docs[doc] = entry = (title, os.path.join(self.root, folder), orig, tran)
+        if len(self._docs) > DOC_CACHE_SIZE:
+            self._docs.popitem(last=False)
+        return entry
+
+    def lookup(self, token, side="source"):
+        """
+        Return {doc id: [line numbers]} for one token.
+        """
+        return {doc: decode_postings(data) for doc, data in self._db.execute(
+            "SELECT doc, lines FROM posting WHERE side = ? AND token = ?", (SIDES[side], token))}
+
+    def search(self, query, side="source", limit=200):
+        """
+        Find the line pairs containing query.
+
+        A query of several words is a phrase: the words have to follow each
+        other on consecutive lines (see match_phrase()).
+
+        Args:
+            query: A word or a phrase
+            side: "source" or "target" - the text the words are searched in
+            limit: Maximum number of hits
+
+        Returns:
+            List of hits (dicts): title, folder, line (0-based, the first
+            line of a phrase), source, target (the lines of the phrase
+            joined by spaces), and the surrounding words left/right of the
+            hit in both texts
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Only projects holding every word can hold the phrase
+        postings = {token: self.lookup(token, side) for token in set(tokens)}
+        docs = set.intersection(*(set(p) for p in postings.values()))
+
+        hits = []
+        for doc in sorted(docs):
+            title, folder, orig, tran = self._doc(doc)
+            text = orig if side == "source" else tran
+            for i in postings[tokens[0]][doc]:
+                end = i + 1 if len(tokens) == 1 else match_phrase(text, i, tokens)
+                if end is None:
+                    continue
+                lo, hi = max(0, i - CONTEXT_WORDS), end + CONTEXT_WORDS
+                hits.append({
+                    "title": title,
+                    "folder": folder,
+                    "line": i,
+                    "source": " ".join(w for w in orig[i:end] if w.strip()) if end > i + 1 else orig[i],
+                    "target": " ".join(w for w in tran[i:end] if w.strip()) if end > i + 1 else tran[i],
+                    "source_left": " ".join(w for w in orig[lo:i] if w.strip()),
+                    "source_right": " ".join(w for w in orig[end:hi] if w.strip()),
+                    "target_left": " ".join(w for w in tran[lo:i] if w.strip()),
+                    "target_right": " ".join(w for w in tran[end:hi] if w.strip()),
+                })
+                if len(hits) >= limit:
+                    return hits
+        return hits
+
+    def __len__(self):
+        return self._db.execute("SELECT count(*) FROM doc").fetchone()[0]
+
+
+def translation_counts(hits, side="source"):
+    """
+    Return how often each translation occurs among the hits, most common
+    first, as (text, count) pairs.
+
+    For a search in the source texts this counts the target lines, and the
+    other way round.
+    """
+    other = "target" if side == "source" else "source"
+    return Counter(h[other].strip() for h in hits if h[other].strip()).most_common()
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Search the aligned texts of all projects below a folder.")
+    parser.add_argument("root", help="library folder containing project folders")
+    parser.add_argument("query", help="word or phrase to search for")
+    parser.add_argument("--side", choices=tuple(SIDES), default="source", help="text to search in")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with CorpusIndex(args.root) as index:
+        counts = index.update()
+        start = time.perf_counter()
+        hits = index.search(args.query, args.side, args.limit)
+        elapsed = time.perf_counter() - start
+        for h in hits:
+            print(f"{h['source_left'][-30:]:>30} [{h['source']}] {h['source_right'][:30]:<30}  "
+                  f"{h['target']:<20}  {h['title']}:{h['line'] + 1}")
+        print()
+        for text, n in translation_counts(hits, args.side)[:10]:
+            print(f"{n:6}  {text}")
+        print(f"\n{len(hits)} hits in {elapsed * 1000:.1f} ms ({len(index)} projects, index updated in "
+              f"{counts['seconds']:.2f} s: {counts['added']} added, {counts['updated']} updated, "
+              f"{counts['removed']} removed)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
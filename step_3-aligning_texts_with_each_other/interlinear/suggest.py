@@ -0,0 +1,292 @@
+"""
+Suggestion Module for Interlinear Text Creator
+
+Statistical word-translation suggestions trained offline on existing projects.
+
+A translation table t(translation | word) is estimated with IBM Model 1 EM
+over the aligned sentence pairs of all projects below a folder. The corpus is
+split into shards which are processed in parallel worker processes; every
+EM step is vectorized with NumPy, and the final table is a SciPy sparse
+matrix saved as an uncompressed .npz file that loads in milliseconds.
+
+Requires: numpy, scipy (pip install numpy scipy)
+
+Command line:
+    python -m interlinear.suggest train <projects_root> -o translation_model.npz
+    python -m interlinear.suggest query translation_model.npz <word> [<word> ...]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import sparse
+
+from .alignment import iter_sentences
+from .container import CONTAINER_FILENAME
+from .project_io import load_project, text_lines
+
+MODEL_FILENAME = "translation_model.npz"
+
+# Source id 0 is the empty word that explains translations without a source
+NULL_WORD = ""
+
+# Probabilities below this are dropped from the saved table
+MIN_PROBABILITY = 1e-3
+
+
+class TranslationTable:
+    """
+    Sparse table of t(translation | source word).
+
+    Rows are source words (case-folded), columns are translations as
+    written in target.txt.
+    """
+
+    def __init__(self, matrix, source_vocab, target_vocab):
+        self.matrix = matrix.tocsr()
+        self.source_vocab = list(source_vocab)
+        self.target_vocab = list(target_vocab)
+        self._rows = {w: i for i, w in enumerate(self.source_vocab)}
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a table saved with save().
+        """
+        with np.load(path, allow_pickle=False) as z:
+            matrix = sparse.csr_matrix((z["data"], z["indices"], z["indptr"]), shape=tuple(z["shape"]))
+            return cls(matrix, z["source_vocab"].tolist(), z["target_vocab"].tolist())
+
+    def save(self, path):
+        """
+        Save the table as an uncompressed .npz file.
+        """
+        m = self.matrix
+        with open(path, "wb") as f:
+            np.savez(f, data=m.data.astype(np.float32), indices=m.indices.astype(np.int32),
+                     indptr=m.indptr.astype(np.int64), shape=np.array(m.shape, dtype=np.int64),
+                     source_vocab=np.array(self.source_vocab, dtype=str),
+                     target_vocab=np.array(self.target_vocab, dtype=str))
+        return path
+
+    def candidates(self, word, n=5):
+        """
+        Return up to n (translation, probability) pairs for a word, best first.
+        """
+        row = self._rows.get(word.strip().casefold())
+        if row is None:
+            return []
+        m = self.matrix
+        lo, hi = m.indptr[row], m.indptr[row + 1]
+        probs = m.data[lo:hi]
+        best = np.argsort(-probs, kind="stable")[:n]
+        return [(self.target_vocab[m.indices[lo + k]], float(probs[k])) for k in best]
+
+    def __contains__(self, word):
+        return word.strip().casefold() in self._rows
+
+
+def iter_project_pairs(root):
+    """
+    Yield (source_words, target_words) sentence pairs of every project below root.
+
+    A project is any folder holding a project container, or both source.txt
+    and target.txt. Container texts are read from the container (its saves
+    do not update loose copies).
+    """
+    for folder, _dirs, files in os.walk(root):
+        if CONTAINER_FILENAME in files:
+            _, source_text, target_text = load_project(folder)
+            pairs = zip(iter_sentences(text_lines(source_text)), iter_sentences(text_lines(target_text)))
+            for (_, s_words), (_, t_words) in pairs:
+                yield s_words, t_words
+            continue
+        if "source.txt" not in files or "target.txt" not in files:
+            continue
+        with open(os.path.join(folder, "source.txt"), "r", encoding="utf-8") as src, \
+             open(os.path.join(folder, "target.txt"), "r", encoding="utf-8") as tgt:
+            for (_, s_words), (_, t_words) in zip(iter_sentences(src), iter_sentences(tgt)):
+                yield s_words, t_words
+
+
+def train(sentence_pairs, iterations=5, workers=None, shard_sentences=20000):
+    """
+    Train a TranslationTable with IBM Model 1.
+
+    Args:
+        sentence_pairs: Iterable of (source_words, target_words) lists
+        iterations: Number of EM iterations
+        workers: Worker processes (default: CPU count, 1 = no subprocesses)
+        shard_sentences: Sentence pairs per shard
+
+    Returns:
+        TranslationTable
+    """
+    workers = workers or os.cpu_count() or 1
+    tmp = tempfile.mkdtemp(prefix="interlinear_model1_")
+    try:
+        src_vocab, tgt_vocab, shards = _write_shards(sentence_pairs, tmp, shard_sentences)
+        keys = _index_pairs(shards, len(tgt_vocab))
+        pair_src = (keys // len(tgt_vocab)).astype(np.int64)
+        pair_tgt = (keys % len(tgt_vocab)).astype(np.int32)
+        del keys
+
+        t = np.ones(len(pair_src))
+        pool = ProcessPoolExecutor(workers) if workers > 1 and len(shards) > 1 else None
+        try:
+            for _ in range(iterations):
+                counts = np.zeros(len(t))
+                jobs = [(path, t[upids]) for path, upids in _shard_pairs(shards)]
+                results = pool.map(_expected_counts, *zip(*jobs)) if pool else \
+                          (_expected_counts(path, t_local) for path, t_local in jobs)
+                for (_, upids), partial in zip(_shard_pairs(shards), results):
+                    counts[upids] += partial
+                totals = np.bincount(pair_src, weights=counts, minlength=len(src_vocab))
+                t = counts / totals[pair_src]
+        finally:
+            if pool:
+                pool.shutdown()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    keep = (t >= MIN_PROBABILITY) & (pair_src != 0)
+    matrix = sparse.csr_matrix((t[keep].astype(np.float32), (pair_src[keep], pair_tgt[keep])),
+                               shape=(len(src_vocab), len(tgt_vocab)))
+    return TranslationTable(matrix, src_vocab, tgt_vocab)
+
+
+def _write_shards(sentence_pairs, tmp, shard_sentences):
+    """
+    Turn sentence pairs into id arrays and write them as shard files.
+
+    Each shard stores, for every (target token, source token) combination
+    within a sentence, the source id, the target id and the target token
+    occurrence it belongs to.
+    """
+    src_index = {NULL_WORD: 0}
+    tgt_index = {}
+    shards = []
+    src_ids, src_lens, tgt_ids, tgt_lens = [], [], [], []
+
+    def flush():
+        if not src_lens:
+            return
+        path = os.path.join(tmp, f"shard{len(shards):05d}.npz")
+        pe, pf, occ = _cartesian(np.array(src_ids, dtype=np.int32), np.array(src_lens, dtype=np.int64),
+                                 np.array(tgt_ids, dtype=np.int32), np.array(tgt_lens, dtype=np.int64))
+        np.savez(path, pe=pe, pf=pf, occ=occ)
+        shards.append(path)
+        for buf in (src_ids, src_lens, tgt_ids, tgt_lens):
+            buf.clear()
+
+    for s_words, t_words in sentence_pairs:
+        s_tokens = [w.strip().casefold() for w in s_words if w.strip()]
+        t_tokens = [w.strip() for w in t_words if w.strip()]
+        if not s_tokens or not t_tokens:
+            continue
+        src_ids.append(0)
+        src_ids.extend(src_index.setdefault(w, len(src_index)) for w in s_tokens)
+        src_lens.append(len(s_tokens) + 1)
+        tgt_ids.extend(tgt_index.setdefault(w, len(tgt_index)) for w in t_tokens)
+        tgt_lens.append(len(t_tokens))
+        if len(src_lens) >= shard_sentences:
+            flush()
+    flush()
+
+    return list(src_index), list(tgt_index), shards
+
+
+def _cartesian(src_ids, src_lens, tgt_ids, tgt_lens):
+    """
+    Pair every target token with every source token of its sentence.
+
+    Returns arrays (source id, target id, target occurrence) per pair.
+    """
+    src_start = np.concatenate(([0], np.cumsum(src_lens)[:-1]))
+    sentence_of_tgt = np.repeat(np.arange(len(tgt_lens)), tgt_lens)
+    width = src_lens[sentence_of_tgt]                      # source tokens per target token
+    occ = np.repeat(np.arange(len(tgt_ids), dtype=np.int32), width)
+    block_start = np.concatenate(([0], np.cumsum(width)[:-1]))
+    within = np.arange(int(width.sum())) - np.repeat(block_start, width)
+    pe = src_ids[np.repeat(src_start[sentence_of_tgt], width) + within]
+    pf = tgt_ids[occ]
+    return pe, pf, occ
+
+
+def _index_pairs(shards, n_tgt):
+    """
+    Give every distinct (source, target) pair a global id.
+
+    Each shard file is rewritten with local pair ids plus the global ids
+    they map to. Returns the sorted global pair keys (source * n_tgt + target).
+    """
+    local_keys = []
+    for path in shards:
+        with np.load(path) as z:
+            keys = z["pe"].astype(np.int64) * n_tgt + z["pf"]
+            ukeys, local = np.unique(keys, return_inverse=True)
+            occ = z["occ"]
+        np.savez(path, local=local.astype(np.int32), occ=occ)
+        local_keys.append(ukeys)
+
+    keys = np.unique(np.concatenate(local_keys)) if local_keys else np.zeros(0, dtype=np.int64)
+    for path, ukeys in zip(shards, local_keys):
+        np.save(path + ".upids.npy", np.searchsorted(keys, ukeys))
+    return keys
+
+
+def _shard_pairs(shards):
+    """Yield (shard path, global pair ids used by the shard)."""
+    for path in shards:
+        yield path, np.load(path + ".upids.npy")
+
+
+def _expected_counts(path, t_local):
+    """
+    E-step for one shard: expected pair counts given the current table.
+    """
+    with np.load(path) as z:
+        local, occ = z["local"], z["occ"]
+    p = t_local[local]
+    norm = np.bincount(occ, weights=p)
+    return np.bincount(local, weights=p / norm[occ], minlength=len(t_local))
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Train or query the word-translation suggester.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_train = sub.add_parser("train", help="train on all projects below a folder")
+    p_train.add_argument("root", help="folder containing project folders")
+    p_train.add_argument("-o", "--output", default=MODEL_FILENAME, help="model file to write")
+    p_train.add_argument("--iterations", type=int, default=5, help="EM iterations")
+    p_train.add_argument("--workers", type=int, default=None, help="worker processes")
+
+    p_query = sub.add_parser("query", help="show ranked translations for words")
+    p_query.add_argument("model", help="model file")
+    p_query.add_argument("words", nargs="+")
+    p_query.add_argument("-n", type=int, default=5, help="candidates per word")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        table = train(iter_project_pairs(args.root), args.iterations, args.workers)
+        table.save(args.output)
+        print(f"Model saved: {args.output} ({len(table.source_vocab)} words, "
+              f"{table.matrix.nnz} translation entries)")
+    else:
+        table = TranslationTable.load(args.model)
+        for word in args.words:
+            cands = table.candidates(word, args.n)
+            print(f"{word}: " + (", ".join(f"{t} ({p:.2f})" for t, p in cands) or "-"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""
+Timing Module for Interlinear Text Creator
+
+Reads the subtitle timing of a project for audio-synchronized exports.
+
+Two files from the subtitle workflow are combined:
+- groups.json (step 4): word groups as 1-based line ranges
+  {"groups": [{"start_line": 1, "end_line": 7, "width_px": ...}, ...]}
+- timestamps.txt (step 5): one start time per group, HH:MM:SS.mmm per line
+
+Both are looked up in the project folder, or in its project container.
+bind_project() checks the timestamps against the groups and writes them into
+groups.json as "start"/"end" seconds, so the groups file alone is enough for
+step 6. TimeIndex answers "which group is shown at t" by binary search.
+"""
+
+import json
+from bisect import bisect_left, bisect_right
+
+from .project_io import load_artifact, save_artifact
+
+GROUPS_FILENAME = "groups.json"
+TIMESTAMPS_FILENAME = "timestamps.txt"
+
+
+def parse_timestamp(text):
+    """
+    Parse "HH:MM:SS.mmm" (also "MM:SS.mmm" or plain seconds) into seconds.
+    """
+    seconds = 0.0
+    for part in text.strip().split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def format_timestamp(seconds):
+    """
+    Format seconds as "HH:MM:SS.mmm", like the step 5 tool writes them.
+    """
+    ms = int(round(seconds * 1000))
+    hh, ms = divmod(ms, 3_600_000)
+    mm, ms = divmod(ms, 60_000)
+    ss, ms = divmod(ms, 1000)
+    return f"{hh:02d}:{mm:02d}:{ss:02d}.{ms:03d}"
+
+
+def format_timestamps(timestamps):
+    """
+    Return the text of a timestamps.txt file for a list of seconds.
+    """
+    return "".join(format_timestamp(t) + "\n" for t in timestamps)
+
+
+def load_timestamps(path):
+    """
+    Load timestamps.txt as a list of seconds (blank lines are skipped).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_timestamps(f.read())
+
+
+def load_groups(path):
+    """
+    Load the word groups of a groups.json file.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["groups"]
+
+
+def parse_timestamps(text):
+    """
+    Parse the text of timestamps.txt into a list of seconds.
+    """
+    return [parse_timestamp(line) for line in text.splitlines() if line.strip()]
+
+
+def check_timestamps(text, groups=None):
+    """
+    Parse the text of timestamps.txt and check it against the groups.
+
+    Checks that every line is a time, that the times increase, and that
+    there is one time per group (if groups are given).
+
+    Returns:
+        (list with one entry per non-blank line - seconds, or None for a
+        line that is not a time or not after the previous time - and list
+        of problems as strings)
+    """
+    timestamps, problems = [], []
+    previous = None
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            t = parse_timestamp(line)
+        except ValueError:
+            problems.append(f"line {number}: {line.strip()!r} is not a time")
+            t = None
+        else:
+            if t < 0:
+                problems.append(f"line {number}: negative time {line.strip()}")
+                t = None
+            elif previous is not None and t <= previous:
+                problems.append(f"line {number}: {format_timestamp(t)} is not after {format_timestamp(previous)}")
+                t = None
+        # Invalid lines keep their place, so later times stay on their groups
+        timestamps.append(t)
+        if t is not None:
+            previous = t
+    if groups is not None and len(timestamps) != len(groups):
+        problems.append(f"{len(timestamps)} timestamps for {len(groups)} groups")
+    return timestamps, problems
+
+
+def bind_timestamps(groups, timestamps, end=None):
+    """
+    Return copies of all groups with "start" and "end" in seconds.
+
+    timestamps[i] is the start of groups[i]; the times must increase (None
+    entries are skipped, see check_timestamps()). A timed group is shown
+    until the next timed group starts; the last one until end (the length
+    of the media), or open-ended (None) if it is not known. Groups without a
+    time keep start and end None.
+    """
+    starts = [round(t, 3) if t is not None else None for t in timestamps[:len(groups)]]
+    starts += [None] * (len(groups) - len(starts))
+    bound = []
+    next_start = end
+    for g, start in reversed(list(zip(groups, starts))):
+        g = dict(g)
+        g["start"] = start
+        g["end"] = next_start if start is not None else None
+        if start is not None:
+            next_start = start
+        bound.append(g)
+    bound.reverse()
+    return bound
+
+
+def group_times(groups):
+    """
+    Return the start times of groups bound with bind_timestamps() (None for
+    untimed groups), or None if no group carries a time.
+    """
+    starts = [g.get("start") for g in groups]
+    if all(t is None for t in starts):
+        return None
+    return starts
+
+
+def timed_groups(folder, end=None):
+    """
+    Return the groups of a project with their start/end times.
+
+    timestamps.txt is bound to the groups if there is one; otherwise the
+    times already in groups.json are used.
+
+    Returns:
+        (groups, problems) - groups is None without groups.json, problems
+        lists what check_timestamps() found
+    """
+    groups = load_artifact(folder, GROUPS_FILENAME)
+    if groups is None:
+        return None, []
+    groups = json.loads(groups)["groups"]
+    text = load_artifact(folder, TIMESTAMPS_FILENAME)
+    if text is None:
+        return groups, []
+    timestamps, problems = check_timestamps(text, groups)
+    return bind_timestamps(groups, timestamps, end), problems
+
+
+def bind_project(folder, end=None, strict=True):
+    """
+    Write the times of timestamps.txt into groups.json of a project.
+
+    Args:
+        folder: Project folder
+        end: End of the last group (length of the media), if known
+        strict: Refuse to write if check_timestamps() finds a problem;
+            otherwise the groups whose line is invalid (or missing) are
+            written without a time - no group is ever removed
+
+    Returns:
+        (bound groups, problems)
+    """
+    groups, problems = timed_groups(folder, end)
+    if groups is None:
+        raise ValueError(f"{GROUPS_FILENAME} not found in {folder}")
+    if load_artifact(folder, TIMESTAMPS_FILENAME) is None:
+        raise ValueError(f"{TIMESTAMPS_FILENAME} not found in {folder}")
+    if problems and strict:
+        raise ValueError("; ".join(problems))
+    data = json.loads(load_artifact(folder, GROUPS_FILENAME))
+    data["groups"] = groups
+    save_artifact(folder, GROUPS_FILENAME, json.dumps(data, ensure_ascii=False, indent=2))
+    return groups, problems
+
+
+class TimeIndex:
+    """
+    Sorted start/end arrays of timed groups for lookups by time.
+
+    Untimed groups are left out (indices refer to self.groups). The timed
+    groups must start in increasing order and not overlap, as
+    bind_timestamps() makes them, so the ends are sorted as well and both
+    lookups are binary searches; anything else raises ValueError.
+    """
+
+    def __init__(self, groups):
+        self.groups = [g for g in groups if g.get("start") is not None]
+        self.starts = [g["start"] for g in self.groups]
+        self.ends = [float("inf") if g.get("end") is None else g["end"] for g in self.groups]
+        for i in range(len(self.groups)):
+            if self.ends[i] < self.starts[i] or (i and self.starts[i] < self.ends[i - 1]):
+                raise ValueError(f"group times out of order at {format_timestamp(self.starts[i])}")
+
+    def __len__(self):
+        return len(self.groups)
+
+    def index_at(self, t):
+        """Return the index of the group shown at time t, or None."""
+        i = bisect_right(self.starts, t) - 1
+        if i >= 0 and t < self.ends[i]:
+            return i
+        return None
+
+    def group_at(self, t):
+        """Return the group shown at time t, or None."""
+        i = self.index_at(t)
+        return None if i is None else self.groups[i]
+
+    def indices_between(self, a, b):
+        """Return the range of indices of the groups shown during [a, b)."""
+        return range(bisect_right(self.ends, a), bisect_left(self.starts, b))
+
+    def groups_between(self, a, b):
+        """Return the groups shown during [a, b)."""
+        r = self.indices_between(a, b)
+        return self.groups[r.start:r.stop]
+
+
+def group_word_ranges(groups, orig):
+    """
+    Map line-based groups to ranges of rendered words.
+
+    Exports render one word element per non-empty line of orig, so a group
+    covers the word elements first[g] <= i < end[g].
+
+    Returns:
+        (first, end) lists with one entry per group
+    """
+    # words_before[n] = number of word elements on lines 0..n-1
+    words_before = [0]
+    for line in orig:
+        words_before.append(words_before[-1] + (1 if line and line.strip() else 0))
+    last = len(orig)
+
+    first, end = [], []
+    for g in groups:
+        first.append(words_before[min(g["start_line"] - 1, last)])
+        end.append(words_before[min(g["end_line"], last)])
+    return first, end
+
+
+def build_sync(groups, timestamps, orig):
+    """
+    Combine groups and timestamps into the data of a synchronized export.
+
+    Groups without a timestamp (missing or None) are left out.
+
+    Returns:
+        {'starts': [seconds per group], 'first': [...], 'end': [...]}
+    """
+    timed = [(g, t) for g, t in zip(groups, timestamps) if t is not None]
+    first, end = group_word_ranges([g for g, _ in timed], orig)
+    return {"starts": [round(t, 3) for _, t in timed], "first": first, "end": end}
+
+
+def load_sync(folder, orig):
+    """
+    Load the synchronization data of a project folder.
+
+    The times come from timestamps.txt, or from groups.json if they were
+    bound into it.
+
+    Returns:
+        build_sync() dict, or None if there are no groups or no times
+    """
+    groups = load_artifact(folder, GROUPS_FILENAME)
+    if groups is None:
+        return None
+    groups = json.loads(groups)["groups"]
+    timestamps = load_artifact(folder, TIMESTAMPS_FILENAME)
+    if timestamps is not None:
+        # Lines that are not times are skipped (cli info reports them)
+        return build_sync(groups, check_timestamps(timestamps)[0], orig)
+    starts = group_times(groups)
+    if starts is None:
+        return None
+    return build_sync(groups, starts, orig)
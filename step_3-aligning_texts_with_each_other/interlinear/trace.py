@@ -0,0 +1,159 @@
+"""
+Trace Module for Interlinear Text Creator
+
+Lightweight timing spans and counters for finding the slow stage of a run
+(measuring, grouping, rendering, zipping, encoding).
+
+    from interlinear import trace
+
+    with trace.span("render", words=len(orig)):
+        ...
+    trace.count("bytes_written", size)
+
+Tracing is off by default; span() then returns a shared no-op object and
+count() returns at once, so instrumented code costs next to nothing.
+Set INTERLINEAR_TRACE to a file name to trace a whole process: on exit the
+events are written there as Chrome trace JSON (open it in Perfetto or
+chrome://tracing) and a summary table is printed to stderr. "%p" in the
+file name is replaced by the process id, for runs with worker processes.
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+_enabled = False
+_events = []
+_counters = {}
+_lock = threading.Lock()
+_start = time.perf_counter()
+
+
+class _NoSpan:
+    """What span() returns while tracing is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOSPAN = _NoSpan()
+
+
+class _Span:
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        event = {"name": self.name, "ph": "X", "ts": (self.start - _start) * 1e6,
+                 "dur": (end - self.start) * 1e6, "pid": os.getpid(), "tid": threading.get_ident()}
+        if self.args:
+            event["args"] = self.args
+        _events.append(event)
+        return False
+
+
+def enable():
+    """Start recording spans and counters."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Stop recording (what was recorded is kept)."""
+    global _enabled
+    _enabled = False
+
+
+def enabled():
+    """True while spans and counters are recorded."""
+    return _enabled
+
+
+def reset():
+    """Forget all recorded spans and counters."""
+    with _lock:
+        _events.clear()
+        _counters.clear()
+
+
+def span(name, **args):
+    """
+    Return a context manager timing the code it wraps.
+
+    Keyword arguments are stored with the span (shown in the trace viewer).
+    """
+    if not _enabled:
+        return _NOSPAN
+    return _Span(name, args)
+
+
+def count(name, n=1):
+    """Add n to a counter (e.g. words measured, bytes written)."""
+    if not _enabled:
+        return
+    with _lock:
+        value = _counters[name] = _counters.get(name, 0) + n
+        _events.append({"name": name, "ph": "C", "ts": (time.perf_counter() - _start) * 1e6,
+                        "pid": os.getpid(), "args": {name: value}})
+
+
+def counters():
+    """Return the current counter values."""
+    with _lock:
+        return dict(_counters)
+
+
+def write_chrome_trace(path):
+    """Write the recorded events as Chrome trace JSON."""
+    with _lock:
+        events = list(_events)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return path
+
+
+def summary():
+    """
+    Return a table of the spans (calls, total, mean and max time per name,
+    slowest total first) and the counters.
+    """
+    stats = {}
+    with _lock:
+        for e in _events:
+            if e["ph"] == "X":
+                s = stats.setdefault(e["name"], [0, 0.0, 0.0])
+                s[0] += 1
+                s[1] += e["dur"]
+                s[2] = max(s[2], e["dur"])
+        counter_values = dict(_counters)
+
+    lines = [f"{'span':<28}{'calls':>7}{'total ms':>12}{'mean ms':>11}{'max ms':>11}"]
+    for name, (calls, total, longest) in sorted(stats.items(), key=lambda kv: -kv[1][1]):
+        lines.append(f"{name:<28}{calls:>7}{total / 1000:>12.1f}{total / calls / 1000:>11.2f}"
+                     f"{longest / 1000:>11.1f}")
+    for name, value in sorted(counter_values.items()):
+        lines.append(f"{name:<28}{value:>30,}")
+    return "\n".join(lines)
+
+
+def _write_at_exit(path):
+    write_chrome_trace(path)
+    print(summary(), file=sys.stderr)
+    print(f"Trace written to {path}", file=sys.stderr)
+
+
+if os.environ.get("INTERLINEAR_TRACE"):
+    enable()
+    atexit.register(_write_at_exit, os.environ["INTERLINEAR_TRACE"].replace("%p", str(os.getpid())))
@@ -0,0 +1,36 @@
+"""
+Tests for sentence alignment (interlinear.alignment).
+
+Run from the step 3 folder:
+    python -m unittest discover tests
+"""
+
+import unittest
+
+from interlinear.alignment import align_texts
+
+
+class AlignTextsTest(unittest.TestCase):
+
+    def test_aligned_texts_come_back_unchanged(self):
+        source = ["", "", "Das", "Haus", "", "", "", "Ein", "Baum", ""]
+        target = ["", "", "The", "house", "", "", "", "A", "tree", ""]
+        self.assertEqual(align_texts(source, target), (source, target))
+
+    def test_longer_blank_run_is_used_on_both_sides(self):
+        source = ["Das", "Haus", "", "", "Ein", "Baum"]
+        target = ["The", "house", "", "A", "tree", "", ""]
+        self.assertEqual(align_texts(source, target),
+                         (["Das", "Haus", "", "", "Ein", "Baum", "", ""],
+                          ["The", "house", "", "", "A", "tree", "", ""]))
+
+    def test_blocks_are_padded(self):
+        source = ["Ich", "bin", "hier", "", "Du", "auch"]
+        target = ["I", "am", "", "You", "too"]
+        self.assertEqual(align_texts(source, target),
+                         (["Ich", "bin", "hier", "", "Du", "auch"],
+                          ["I", "am", "", "", "You", "too"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
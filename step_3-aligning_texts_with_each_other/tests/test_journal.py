@@ -0,0 +1,116 @@
+"""
+Tests for recovering unsaved edits from the edit journal (interlinear.journal).
+
+Run from the step 3 folder:
+    python -m unittest discover tests
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from interlinear.journal import EditJournal, text_digest
+
+SOURCE = "Erster Satz.\nZweiter Satz.\n"
+TARGET = "First sentence.\nSecond sentence.\n"
+
+
+class EditJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def journal(self):
+        journal = EditJournal(self.folder)
+        self.addCleanup(journal.close)
+        return journal
+
+    def write_journal(self, *records):
+        with open(os.path.join(self.folder, "edits.journal"), "w", encoding="utf-8") as f:
+            for rec in records:
+                f.write(rec if isinstance(rec, str) else json.dumps(rec) + "\n")
+
+    def journal_bytes(self):
+        with open(os.path.join(self.folder, "edits.journal"), "rb") as f:
+            return f.read()
+
+    def test_replays_recorded_edits(self):
+        journal = self.journal()
+        journal.replay(SOURCE, TARGET)
+        journal.record("orig", 0, 1, ["Erster Satz!"])
+        journal.record("tran", 1, 2, ["Second one.", "Third one."])
+        journal.close()
+
+        source, target, applied = self.journal().replay(SOURCE, TARGET)
+        self.assertEqual(applied, 2)
+        self.assertEqual(source, ["Erster Satz!", "Zweiter Satz.", ""])
+        self.assertEqual(target, ["First sentence.", "Second one.", "Third one.", ""])
+
+    def test_torn_tail_is_cut(self):
+        base = {"base": text_digest(SOURCE, TARGET)}
+        self.write_journal(base, ["orig", 0, 1, ["A"]], '["orig", 1, 2, ["B')
+        complete = len(self.journal_bytes()) - len('["orig", 1, 2, ["B')
+
+        source, _, applied = self.journal().replay(SOURCE, TARGET)
+        self.assertEqual(applied, 1)
+        self.assertEqual(source[:2], ["A", "Zweiter Satz."])
+        self.assertEqual(len(self.journal_bytes()), complete)
+
+    def test_malformed_record_stops_replay(self):
+        base = {"base": text_digest(SOURCE, TARGET)}
+        for bad in (["orig", 0, 1], ["notes", 0, 1, ["A"]], ["orig", 0, 1, "A"], ["orig", 2, 1, []]):
+            with self.subTest(record=bad):
+                self.write_journal(base, ["tran", 0, 1, ["T"]], bad, ["orig", 0, 1, ["A"]])
+                journal = EditJournal(self.folder)
+                source, target, applied = journal.replay(SOURCE, TARGET)
+                journal.close()
+                self.assertEqual(applied, 1)
+                self.assertEqual(source[0], "Erster Satz.")
+                self.assertEqual(target[0], "T")
+
+    def test_out_of_range_record_stops_replay(self):
+        base = {"base": text_digest(SOURCE, TARGET)}
+        self.write_journal(base, ["orig", 0, 1, ["A"]], ["orig", 5, 9, ["B"]], ["orig", 1, 2, ["C"]])
+        source, _, applied = self.journal().replay(SOURCE, TARGET)
+        self.assertEqual(applied, 1)
+        self.assertEqual(source[:2], ["A", "Zweiter Satz."])
+        self.assertEqual(self.journal_bytes().count(b"\n"), 2)
+
+    def test_uses_last_matching_marker(self):
+        old, new = text_digest("old", "old"), text_digest(SOURCE, TARGET)
+        self.write_journal({"base": new}, ["orig", 0, 1, ["stale"]],
+                           {"base": old}, ["orig", 0, 1, ["other texts"]],
+                           {"base": new}, ["orig", 0, 1, ["A"]])
+        source, _, applied = self.journal().replay(SOURCE, TARGET)
+        self.assertEqual(applied, 1)
+        self.assertEqual(source[0], "A")
+
+    def test_stale_journal_is_reset(self):
+        self.write_journal({"base": text_digest("old", "old")}, ["orig", 0, 1, ["A"]])
+        source, _, applied = self.journal().replay(SOURCE, TARGET)
+        self.assertEqual((applied, source[0]), (0, "Erster Satz."))
+        self.assertEqual(json.loads(self.journal_bytes()), {"base": text_digest(SOURCE, TARGET)})
+
+    def test_compact_keeps_edits_after_marker(self):
+        journal = self.journal()
+        journal.replay(SOURCE, TARGET)
+        journal.record("orig", 0, 1, ["Saved edit."])
+        saved_source = "Saved edit.\nZweiter Satz.\n"
+        digest = text_digest(saved_source, TARGET)
+        journal.mark(digest)
+        # Edited while the save is running
+        journal.record("orig", 1, 2, ["Unsaved edit."])
+        journal.compact(digest)
+        journal.close()
+
+        self.assertEqual(self.journal_bytes().splitlines()[0], json.dumps({"base": digest}).encode())
+        source, _, applied = self.journal().replay(saved_source, TARGET)
+        self.assertEqual(applied, 1)
+        self.assertEqual(source[:2], ["Saved edit.", "Unsaved edit."])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+"""
+Tests for the standard mobile size computed without rendering
+(interlinear.exporter.html_export).
+
+Run from the step 3 folder:
+    python -m unittest discover tests
+"""
+
+import random
+import unittest
+
+from interlinear.exporter.html_export import standard_mobile_size, iter_mobile_html
+
+
+def rendered_size(title, orig, trans, lang="en"):
+    return sum(len(s.encode("utf-8")) for s in iter_mobile_html(title, orig, trans, lang))
+
+
+class StandardMobileSizeTest(unittest.TestCase):
+
+    def test_matches_rendered_page(self):
+        orig = ["Das", "Häuschen", "", "", "a<b", "&", " ", "Ende"]
+        trans = ["The", "cottage", "", "", "x", "and"]
+        self.assertEqual(standard_mobile_size("Tïtle <1>", orig, trans, "de"),
+                         rendered_size("Tïtle <1>", orig, trans, "de"))
+
+    def test_empty_text(self):
+        self.assertEqual(standard_mobile_size("t", [], []), rendered_size("t", [], []))
+
+    def test_random_texts(self):
+        rng = random.Random(0)
+        words = ["", " ", "Wort", "é", "<i>", "a&b", " x "]
+        for _ in range(100):
+            orig = [rng.choice(words) for _ in range(rng.randrange(40))]
+            trans = [rng.choice(words) for _ in range(rng.randrange(40))]
+            self.assertEqual(standard_mobile_size("t", orig, trans), rendered_size("t", orig, trans))
+
+
+if __name__ == "__main__":
+    unittest.main()
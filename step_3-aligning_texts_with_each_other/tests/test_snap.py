@@ -0,0 +1,54 @@
+"""
+Tests for snapping tapped timestamps to speech onsets (interlinear.audio).
+
+Run from the step 3 folder:
+    python -m unittest discover tests
+"""
+
+import unittest
+
+try:
+    import numpy as np
+    from interlinear.audio import snap_times, SNAP_AFTER
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "needs numpy")
+class SnapTimesTest(unittest.TestCase):
+
+    def assertIncreasing(self, times):
+        self.assertTrue(all(a < b for a, b in zip(times, times[1:])), times)
+
+    def test_snaps_to_nearest_onset_in_window(self):
+        self.assertEqual(snap_times([5.0], [4.7, 5.1]).tolist(), [5.1])
+        self.assertEqual(snap_times([5.0], [4.6]).tolist(), [4.6])
+        # Outside the window (0.5 s back, 0.15 s forward) nothing moves
+        self.assertEqual(snap_times([5.0], [4.4, 5.2]).tolist(), [5.0])
+
+    def test_taps_closer_than_snap_after(self):
+        taps = [1.0, 1.0 + SNAP_AFTER / 3]
+        snapped = snap_times(taps, [1.1]).tolist()
+        self.assertIncreasing(snapped)
+        self.assertEqual(snapped, [1.0, 1.1])
+
+    def test_each_onset_used_once(self):
+        taps = [2.0, 2.05, 2.1, 2.12]
+        snapped = snap_times(taps, [1.8, 2.11]).tolist()
+        self.assertIncreasing(snapped)
+        self.assertEqual(len(set(snapped) & {1.8, 2.11}), 2)
+
+    def test_dense_random_taps_stay_increasing(self):
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            taps = np.cumsum(rng.uniform(0.01, 0.3, 50))
+            onsets = np.sort(rng.uniform(0, taps[-1] + 1, 40))
+            self.assertIncreasing(snap_times(taps, onsets).tolist())
+
+    def test_rejects_times_that_do_not_increase(self):
+        with self.assertRaises(ValueError):
+            snap_times([1.0, 0.9], [1.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
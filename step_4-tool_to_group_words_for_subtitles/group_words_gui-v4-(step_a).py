@@ -7,9 +7,20 @@ Requires: Pillow (pip install pillow)
 """
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import json, os
+import json, os, sys, contextlib
 from PIL import ImageFont, ImageDraw, Image
 
+# Optional timing spans from the step 3 package (INTERLINEAR_TRACE=trace.json);
+# without it the calls do nothing
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'step_3-aligning_texts_with_each_other'))
+try:
+    from interlinear import trace
+except ImportError:
+    class trace:
+        span = staticmethod(lambda name, **args: contextlib.nullcontext())
+        count = staticmethod(lambda name, n=1: None)
+        enabled = staticmethod(lambda: False)
+
 # ------------------ Hilfsfunktionen ------------------
 
 def measure_text_px(text, font):
@@ -40,10 +51,20 @@ def group_pairs(chde_lines, de_lines, font, max_line_px, padding):
     chde = chde_lines + [''] * (n - len(chde_lines))
     de = de_lines + [''] * (n - len(de_lines))
     pair_widths = []
-    for a,b in zip(chde,de):
-        wa = measure_text_px(a, font) if a else 0
-        wb = measure_text_px(b, font) if b else 0
-        pair_widths.append(max(wa, wb) + padding)
+    with trace.span("measure", pairs=n):
+        for a,b in zip(chde,de):
+            wa = measure_text_px(a, font) if a else 0
+            wb = measure_text_px(b, font) if b else 0
+            pair_widths.append(max(wa, wb) + padding)
+    if trace.enabled():
+        trace.count("words_measured", sum(1 for a in chde if a) + sum(1 for b in de if b))
+    with trace.span("group"):
+        groups, mapping = _greedy_groups(pair_widths, max_line_px)
+    trace.count("groups", len(groups))
+    return groups, mapping
+
+def _greedy_groups(pair_widths, max_line_px):
+    n = len(pair_widths)
     groups = []
     cur_start = 0
     acc = 0
@@ -62,6 +83,26 @@ def group_pairs(chde_lines, de_lines, font, max_line_px, padding):
             mapping[ln] = gi
     return groups, mapping
 
+def write_groups(outfolder, groups, mapping, ch_lines):
+    """Write groups.json and groups_readable.txt; returns both paths."""
+    os.makedirs(outfolder, exist_ok=True)
+    json_path = os.path.join(outfolder, "groups.json")
+    txt_path = os.path.join(outfolder, "groups_readable.txt")
+
+    # JSON
+    with open(json_path,'w',encoding='utf-8') as f:
+        json.dump({'groups':groups,'mapping':mapping}, f, ensure_ascii=False, indent=2)
+
+    # Readable TXT only with CHDE-Words
+    with open(txt_path,'w',encoding='utf-8') as f:
+        for gi,g in enumerate(groups, start=1):
+            f.write(f"Group {gi}: lines {g['start_line']}..{g['end_line']}, width_px={g['width_px']}\n")
+            for ln in range(g['start_line']-1, g['end_line']):
+                left = ch_lines[ln] if ln < len(ch_lines) else ''
+                f.write(f"  {left}\n")
+            f.write("\n")
+    return json_path, txt_path
+
 # ------------------ GUI-Class ------------------
 
 class App:
@@ -166,26 +207,12 @@ class App:
             maxpx = int(self.maxpx.get() or 1200)
             padding = int(self.padding.get() or 10)
 
-            groups, mapping = group_pairs(ch_lines, de_lines, font, maxpx, padding)
+            with trace.span("group_pairs"):
+                groups, mapping = group_pairs(ch_lines, de_lines, font, maxpx, padding)
 
             # Write files
             outpref = self.outpref_entry.get().strip() or "groups"
-            os.makedirs(outfolder, exist_ok=True)
-            json_path = os.path.join(outfolder, "groups.json")
-            txt_path = os.path.join(outfolder, "groups_readable.txt")
-
-            # JSON
-            with open(json_path,'w',encoding='utf-8') as f:
-                json.dump({'groups':groups,'mapping':mapping}, f, ensure_ascii=False, indent=2)
-
-            # Readable TXT only with CHDE-Words
-            with open(txt_path,'w',encoding='utf-8') as f:
-                for gi,g in enumerate(groups, start=1):
-                    f.write(f"Group {gi}: lines {g['start_line']}..{g['end_line']}, width_px={g['width_px']}\n")
-                    for ln in range(g['start_line']-1, g['end_line']):
-                        left = ch_lines[ln] if ln < len(ch_lines) else ''
-                        f.write(f"  {left}\n")
-                    f.write("\n")
+            json_path, txt_path = write_groups(outfolder, groups, mapping, ch_lines)
 
             messagebox.showinfo("Fertig" if self.lang_var.get()=="DE" else "Done",
                                 f"Dateien erstellt:\n{json_path}\n{txt_path}")
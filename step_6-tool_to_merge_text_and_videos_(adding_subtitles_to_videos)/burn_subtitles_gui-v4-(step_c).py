@@ -9,7 +9,76 @@ Requires: Pillow, moviepy (pip install pillow moviepy)
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip
-import json, os
+import json, os, sys, contextlib
+
+# Optional timing spans from the step 3 package (INTERLINEAR_TRACE=trace.json);
+# without it the calls do nothing
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'step_3-aligning_texts_with_each_other'))
+try:
+    from interlinear import trace
+    from interlinear.timing import TimeIndex
+except ImportError:
+    class trace:
+        span = staticmethod(lambda name, **args: contextlib.nullcontext())
+        count = staticmethod(lambda name, n=1: None)
+    TimeIndex = None
+
+
+def burn_subtitles(video_path, groups, ch_lines, de_lines, output_path, font_path=None, fontsize=36):
+    """
+    Burn the two subtitle lines of every group onto a video.
+
+    groups: the 'groups' list of a groups JSON file (1-based start_line/end_line)
+    ch_lines, de_lines: lines of the source and target language files
+
+    Groups with 'start'/'end' seconds (timestamps bound into the groups file,
+    see "python3 -m interlinear.cli bind") are shown only during that time,
+    and groups left without a time are not shown; if no group has a time,
+    every group is shown for the whole video.
+    """
+    # Load Video
+    with trace.span("load_video"):
+        clip = VideoFileClip(video_path)
+    txt_clips = []
+
+    timed = any(g.get('start') is not None for g in groups)
+    if timed:
+        groups = [g for g in groups if g.get('start') is not None]
+        if TimeIndex:
+            # Only the groups shown while the video runs
+            groups = TimeIndex(groups).groups_between(0, clip.duration)
+
+    with trace.span("text_clips", groups=len(groups)):
+        for g in groups:
+            start = g['start_line']-1
+            end = g['end_line']
+            ch_text = " ".join(ch_lines[start:end])
+            de_text = " ".join(de_lines[start:end])
+
+            # Create Textclips
+            ch_clip = TextClip(ch_text, fontsize=fontsize, font=font_path, color='white', bg_color='dimgray', align='center')
+            de_clip = TextClip(de_text, fontsize=fontsize, font=font_path, color='white', bg_color='dimgray', align='center')
+
+            # Position: 80% from the top border
+            ch_clip = ch_clip.set_position(('center', clip.h*0.8 - fontsize))
+            de_clip = de_clip.set_position(('center', clip.h*0.8))
+            if timed:
+                g_end = clip.duration if g.get('end') is None else min(g['end'], clip.duration)
+                ch_clip = ch_clip.set_start(g['start']).set_end(g_end)
+                de_clip = de_clip.set_start(g['start']).set_end(g_end)
+            else:
+                ch_clip = ch_clip.set_duration(clip.duration)
+                de_clip = de_clip.set_duration(clip.duration)
+
+            txt_clips.extend([ch_clip,de_clip])
+    trace.count("text_clips", len(txt_clips))
+
+    final = CompositeVideoClip([clip]+txt_clips)
+    with trace.span("encode", file=os.path.basename(output_path)):
+        final.write_videofile(output_path, codec="libx264")
+    trace.count("frames_composited", int(final.duration * final.fps))
+    return output_path
+
 
 class App:
     def __init__(self, root):
@@ -99,28 +168,7 @@ class App:
         with open(chde_path,'r',encoding='utf-8') as f: ch_lines = [ln.strip() for ln in f]
         with open(de_path,'r',encoding='utf-8') as f: de_lines = [ln.strip() for ln in f]
 
-        # Load Video
-        clip = VideoFileClip(video_path)
-        txt_clips = []
-
-        for g in data['groups']:
-            start = g['start_line']-1
-            end = g['end_line']
-            ch_text = " ".join(ch_lines[start:end])
-            de_text = " ".join(de_lines[start:end])
-
-            # Create Textclips
-            ch_clip = TextClip(ch_text, fontsize=fontsize, font=font_path, color='white', bg_color='dimgray', align='center')
-            de_clip = TextClip(de_text, fontsize=fontsize, font=font_path, color='white', bg_color='dimgray', align='center')
-
-            # Position: 80% from the top border
-            ch_clip = ch_clip.set_position(('center', clip.h*0.8 - fontsize)).set_duration(clip.duration)
-            de_clip = de_clip.set_position(('center', clip.h*0.8)).set_duration(clip.duration)
-
-            txt_clips.extend([ch_clip,de_clip])
-
-        final = CompositeVideoClip([clip]+txt_clips)
-        final.write_videofile(output_path, codec="libx264")
+        burn_subtitles(video_path, data['groups'], ch_lines, de_lines, output_path, font_path, fontsize)
         messagebox.showinfo("Done","Video with subtitles saved!")
 
 if __name__ == "__main__":
@@ -2,8 +2,13 @@
 # interlinear_dict_editor.py
 # GUI Wörterbuch-Editor (Windows 7 & 10 compatible)
 # Python 3.7+, standard library only
+# (optional "Vorschläge" need numpy + scipy and the step 3 folder next to this one,
+#  "Korpus-Suche" needs the step 3 folder)
 
 import os
+import sys
+import threading
+from queue import Queue, Empty
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
 from tkinter.scrolledtext import ScrolledText
@@ -21,6 +26,9 @@ LANGUAGE_OPTIONS = {
 
 DEFAULT_DICT_FOLDER = os.path.join(os.getcwd(), 'dicts')  # default folder, changeable via UI
 
+# Optional features (suggestions) come from the step 3 package "interlinear"
+STEP3_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'step_3-aligning_texts_with_each_other')
+
 
 class DictEditor(tk.Tk):
     def __init__(self):
@@ -32,6 +40,8 @@ class DictEditor(tk.Tk):
         self.orig_code = 'DE'
         self.target_code = 'EN'
         self.dict_data = {}  # {orig: [trans1, trans2, ...]}
+        self.translation_table = None  # statistical model, loaded on first use
+        self.library_root = None  # project library searched by "Korpus-Suche"
 
         self._build_ui()
 
@@ -71,6 +81,7 @@ class DictEditor(tk.Tk):
         search_entry.bind("<Return>", lambda e: self.filter_tree())
         ttk.Button(search_row, text="Suchen/Filtern", command=self.filter_tree).pack(side='left', padx=6)
         ttk.Button(search_row, text="Alle anzeigen", command=self.refresh_tree).pack(side='left', padx=6)
+        ttk.Button(search_row, text="Korpus-Suche", command=self.corpus_search).pack(side='left', padx=6)
 
         # Treeview for dictionary entries
         tree_frame = ttk.Frame(self)
@@ -106,6 +117,7 @@ class DictEditor(tk.Tk):
         ttk.Button(bottom, text="Eintrag löschen", command=self.delete_selected).pack(side='left', padx=6)
         ttk.Button(bottom, text="Import aus Textdateien", command=self.import_from_texts).pack(side='left', padx=6)
         ttk.Button(bottom, text="Export als TSV", command=self.export_as_tsv).pack(side='left', padx=6)
+        ttk.Button(bottom, text="Vorschläge", command=self.suggest_for_selected).pack(side='left', padx=6)
 
         # Status bar
         self.status = ttk.Label(self, text="Bereit", anchor='w')
@@ -316,6 +328,126 @@ class DictEditor(tk.Tk):
                 f.write(line + "\n")
         messagebox.showinfo("Export", f"TSV exportiert nach:\n{path}")
 
+    # -------------------------
+    # Suggestions (statistical model from step 3)
+    # -------------------------
+    def load_translation_table(self):
+        if self.translation_table is not None:
+            return self.translation_table
+        path = filedialog.askopenfilename(title="Übersetzungsmodell wählen", filetypes=[('Modell','*.npz'),('All files','*.*')])
+        if not path:
+            return None
+        try:
+            if STEP3_FOLDER not in sys.path:
+                sys.path.insert(0, STEP3_FOLDER)
+            from interlinear.suggest import TranslationTable
+            self.translation_table = TranslationTable.load(path)
+        except ImportError:
+            messagebox.showerror("Fehler", "Für Vorschläge werden numpy und scipy benötigt:\npip install numpy scipy")
+            return None
+        return self.translation_table
+
+    def suggest_for_selected(self):
+        sel = self.tree.selection()
+        if not sel:
+            messagebox.showinfo("Auswahl", "Bitte einen Eintrag auswählen für Vorschläge.")
+            return
+        orig = self.tree.item(sel[0])['values'][0]
+        table = self.load_translation_table()
+        if table is None:
+            return
+        candidates = table.candidates(str(orig), 5)
+        if not candidates:
+            messagebox.showinfo("Vorschläge", f"Keine Vorschläge für '{orig}'.")
+            return
+        ranked = "\n".join(f"{t}  ({p:.0%})" for t, p in candidates)
+        chosen = simpledialog.askstring("Vorschläge", f"Vorschläge für '{orig}':\n{ranked}\n\nÜbernehmen (bearbeitbar):",
+                                        initialvalue=" // ".join(t for t, _ in candidates), parent=self)
+        if chosen is None:
+            return
+        existing = self.dict_data.get(orig, [])
+        for t in self._parse_translations_input(chosen):
+            if t not in existing:
+                existing.append(t)
+        self.dict_data[orig] = existing
+        self.refresh_tree()
+
+    # -------------------------
+    # Corpus search (search index from step 3)
+    # -------------------------
+    def corpus_search(self):
+        sel = self.tree.selection()
+        query = self.search_var.get().strip() or (str(self.tree.item(sel[0])['values'][0]) if sel else "")
+        if not query:
+            messagebox.showinfo("Korpus-Suche", "Bitte einen Suchbegriff eingeben oder einen Eintrag auswählen.")
+            return
+        if self.library_root is None:
+            root = filedialog.askdirectory(title="Projekt-Bibliothek wählen", initialdir=self.current_folder)
+            if not root:
+                return
+            self.library_root = root
+        if STEP3_FOLDER not in sys.path:
+            sys.path.insert(0, STEP3_FOLDER)
+        from interlinear.search import CorpusIndex
+
+        self.status.config(text="Suchindex wird aktualisiert...")
+        root, results = self.library_root, Queue()
+
+        def update_and_search():
+            # Runs in the background; SQLite connections belong to one thread
+            try:
+                with CorpusIndex(root) as index:
+                    index.update()
+                    results.put(index.search(query, "source"))
+            except Exception as e:
+                results.put(e)
+
+        threading.Thread(target=update_and_search, daemon=True).start()
+        self.after(100, self._poll_corpus_search, query, results)
+
+    def _poll_corpus_search(self, query, results):
+        try:
+            hits = results.get_nowait()
+        except Empty:
+            self.after(100, self._poll_corpus_search, query, results)
+            return
+        if isinstance(hits, Exception):
+            self.status.config(text="Bereit")
+            messagebox.showerror("Fehler", f"Korpus-Suche fehlgeschlagen:\n{hits}")
+            return
+        self._show_corpus_hits(query, hits)
+
+    def _show_corpus_hits(self, query, hits):
+        from interlinear.search import translation_counts
+
+        counts = translation_counts(hits)
+
+        win = tk.Toplevel(self)
+        win.title(f"Korpus-Suche: {query}")
+        win.geometry("900x500")
+        text = ScrolledText(win, wrap='none', font=('Consolas', 10))
+        text.pack(fill='both', expand=True, padx=8, pady=8)
+        text.insert('end', "Übersetzungen: " + (", ".join(f"{t} ({n})" for t, n in counts) or "-") + "\n\n")
+        for h in hits:
+            text.insert('end', f"{h['source_left'][-35:]:>35} [{h['source']}] {h['source_right'][:35]:<35}"
+                               f"  {h['target']:<20}  {h['title']}:{h['line'] + 1}\n")
+        text.config(state='disabled')
+
+        def take_over():
+            chosen = simpledialog.askstring("Übernehmen", f"Übersetzungen für '{query}' (bearbeitbar):",
+                                            initialvalue=" // ".join(t for t, _ in counts[:5]), parent=win)
+            if chosen is None:
+                return
+            existing = self.dict_data.get(query, [])
+            for t in self._parse_translations_input(chosen):
+                if t not in existing:
+                    existing.append(t)
+            self.dict_data[query] = existing
+            self.refresh_tree()
+
+        ttk.Button(win, text="Übersetzungen übernehmen", command=take_over).pack(side='left', padx=8, pady=(0, 8))
+        self.status.config(text=f"{len(hits)} Treffer für '{query}' im Korpus")
+
     # -------------------------
     # Utilities
     # -------------------------